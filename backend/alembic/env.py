@@ -12,7 +12,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # Import all models so Alembic can detect them
-from app.models import Base, User, Goal  # noqa: F401
+from app.models import Base, User, Goal, GoalRollup, GoalContribution  # noqa: F401
 from app.config import settings
 
 target_metadata = Base.metadata
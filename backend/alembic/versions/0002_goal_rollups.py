@@ -0,0 +1,50 @@
+"""goal rollups
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from alembic import op
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "goal_rollups",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            "category",
+            postgresql.ENUM("financial", "career", "personal_health", name="goalcategory", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("total_saved", sa.Numeric(18, 2), nullable=False, server_default="0"),
+        sa.Column("total_target", sa.Numeric(18, 2), nullable=False, server_default="0"),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("achieved", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "category"),
+    )
+
+    # Backfill from existing goals
+    op.execute(
+        """
+        INSERT INTO goal_rollups (user_id, category, total_saved, total_target, count, achieved)
+        SELECT user_id, category, SUM(saved), SUM(target), COUNT(*),
+               COUNT(*) FILTER (WHERE saved >= target)
+        FROM goals
+        GROUP BY user_id, category
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("goal_rollups")
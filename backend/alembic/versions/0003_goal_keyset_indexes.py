@@ -0,0 +1,37 @@
+"""goal keyset pagination indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_goals_user_created",
+        "goals",
+        ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_goals_user_category_created",
+        "goals",
+        ["user_id", "category", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    # Both new indexes lead with user_id, which makes the single-column one redundant
+    op.drop_index("ix_goals_user_id", table_name="goals")
+
+
+def downgrade() -> None:
+    op.create_index("ix_goals_user_id", "goals", ["user_id"])
+    op.drop_index("ix_goals_user_category_created", table_name="goals")
+    op.drop_index("ix_goals_user_created", table_name="goals")
@@ -0,0 +1,37 @@
+"""goal contributions ledger
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from alembic import op
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # No backfill: there is no history to recover. Existing saved amounts
+    # count as each goal's starting balance.
+    op.create_table(
+        "goal_contributions",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("goal_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("amount", sa.Numeric(15, 2), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["goal_id"], ["goals.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_goal_contributions_goal_created", "goal_contributions", ["goal_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_goal_contributions_goal_created", table_name="goal_contributions")
+    op.drop_table("goal_contributions")
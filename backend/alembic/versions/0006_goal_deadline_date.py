@@ -0,0 +1,79 @@
+"""goal deadline as date (expand: deadline_date beside the string column)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+import logging
+from datetime import date, datetime
+from typing import Optional, Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+OPEN_DEADLINE = "deadline_date IS NOT NULL AND saved < target"
+
+
+def _parse(value: str) -> Optional[date]:
+    # The web client always sent ISO dates; API clients may have sent a
+    # full timestamp. Anything else is ambiguous (03/04/2027), so it's reported.
+    value = value.strip()
+    for parse in (date.fromisoformat, lambda v: datetime.fromisoformat(v).date()):
+        try:
+            return parse(value)
+        except ValueError:
+            pass
+    return None
+
+
+def upgrade() -> None:
+    # Expand only: goals.deadline (the string column) stays, because the
+    # previous release keeps reading and writing it while this one rolls out.
+    # The app writes both columns; dropping the string column is a later
+    # migration, run post-deploy once no serving revision reads it.
+    conn = op.get_bind()
+    op.add_column("goals", sa.Column("deadline_date", sa.Date(), nullable=True))
+
+    # Parse each distinct string once in Python, then apply them all in a
+    # single joined UPDATE rather than one table scan per value
+    parsed, unparseable = [], []
+    for raw, count in conn.execute(
+        sa.text("SELECT deadline, COUNT(*) FROM goals WHERE deadline IS NOT NULL GROUP BY deadline")
+    ):
+        day = _parse(raw)
+        if day is None:
+            unparseable.append((raw, count))
+        else:
+            parsed.append({"raw": raw, "day": day})
+    if parsed:
+        conn.execute(sa.text("CREATE TEMPORARY TABLE deadline_map (raw varchar(20) PRIMARY KEY, day date NOT NULL)"))
+        conn.execute(sa.text("INSERT INTO deadline_map (raw, day) VALUES (:raw, :day)"), parsed)
+        conn.execute(sa.text(
+            "UPDATE goals SET deadline_date = m.day FROM deadline_map m WHERE goals.deadline = m.raw"
+        ))
+        conn.execute(sa.text("DROP TABLE deadline_map"))
+    for raw, count in unparseable:
+        # Left as they are in goals.deadline, with no deadline_date
+        logger.warning("goals.deadline: %d goal(s) with unparseable value %r, no deadline_date", count, raw)
+
+    op.create_index(
+        "ix_goals_user_deadline_open", "goals", ["user_id", "deadline_date"],
+        postgresql_where=sa.text(OPEN_DEADLINE),
+    )
+    op.create_index(
+        "ix_goals_deadline_open", "goals", ["deadline_date", "id"], postgresql_where=sa.text(OPEN_DEADLINE)
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_goals_deadline_open", table_name="goals")
+    op.drop_index("ix_goals_user_deadline_open", table_name="goals")
+    op.drop_column("goals", "deadline_date")
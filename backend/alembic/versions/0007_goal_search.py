@@ -0,0 +1,48 @@
+"""goal search
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english'::regconfig, title), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    # Both ship with Postgres (contrib); creating them needs CREATE on the database
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    # A stored generated column rewrites the table once, under an exclusive lock
+    op.add_column(
+        "goals",
+        sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True)),
+    )
+    op.create_index("ix_goals_user_search", "goals", ["user_id", "search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_goals_user_title_trgm",
+        "goals",
+        ["user_id", "title"],
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    # The extensions stay: other objects may have come to depend on them
+    op.drop_index("ix_goals_user_title_trgm", table_name="goals")
+    op.drop_index("ix_goals_user_search", table_name="goals")
+    op.drop_column("goals", "search_vector")
@@ -1,35 +1,49 @@
 import uuid
-from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from redis.asyncio import Redis
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.dependencies import get_current_user, get_redis, rate_limit_auth
 from app.models.user import User
-from app.schemas.auth import LoginRequest, RegisterRequest, UserOut
+from app.schemas.auth import CurrentUser, LoginRequest, RegisterRequest, UserOut
 from app.schemas.common import MessageResponse
+from app.services import read_routing, session_store, user_cache
 from app.services.auth_service import (
-    blacklist_token,
     clear_auth_cookies,
     create_access_token,
     create_refresh_token,
     decode_token,
     hash_password,
-    is_blacklisted,
+    needs_rehash,
     set_auth_cookies,
     verify_password,
 )
+from app.services.session_store import Rotation
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+async def _start_session(response: Response, redis: Redis, user: User | CurrentUser) -> None:
+    family = session_store.new_family()
+    access_token, _ = create_access_token(str(user.id), user.session_version, family)
+    refresh_token, refresh_jti = create_refresh_token(str(user.id), user.session_version, family)
+    try:
+        await session_store.start(redis, family, refresh_jti)
+    except Exception:
+        # A session that isn't recorded would be rejected on first use
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Session store unavailable")
+    set_auth_cookies(response, access_token, refresh_token)
+
+
 @router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 async def register(
     body: RegisterRequest,
     response: Response,
     db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     _: None = Depends(rate_limit_auth),
 ):
     existing = await db.execute(select(User).where(User.email == body.email))
@@ -39,15 +53,14 @@ async def register(
     user = User(
         email=body.email,
         display_name=body.display_name,
-        hashed_password=hash_password(body.password),
+        hashed_password=await hash_password(body.password),
     )
     db.add(user)
     await db.flush()
     await db.refresh(user)
+    await read_routing.pin(redis, user.id)  # get_db commits after this returns
 
-    access_token, _ = create_access_token(str(user.id))
-    refresh_token, _ = create_refresh_token(str(user.id))
-    set_auth_cookies(response, access_token, refresh_token)
+    await _start_session(response, redis, user)
 
     return user
 
@@ -57,19 +70,22 @@ async def login(
     body: LoginRequest,
     response: Response,
     db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     _: None = Depends(rate_limit_auth),
 ):
     result = await db.execute(select(User).where(User.email == body.email))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(body.password, user.hashed_password):
+    if not user or not await verify_password(body.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is disabled")
 
-    access_token, _ = create_access_token(str(user.id))
-    refresh_token, _ = create_refresh_token(str(user.id))
-    set_auth_cookies(response, access_token, refresh_token)
+    # Upgrade the stored hash when BCRYPT_ROUNDS has changed since it was created
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password(body.password)
+
+    await _start_session(response, redis, user)
 
     return user
 
@@ -79,17 +95,14 @@ async def logout(
     request: Request,
     response: Response,
     redis=Depends(get_redis),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     token = request.cookies.get("__session")
     if token:
         try:
-            payload = decode_token(token)
-            jti = payload.get("jti")
-            exp = payload.get("exp", 0)
-            remaining = max(0, int(exp - datetime.now(timezone.utc).timestamp()))
-            if jti and remaining > 0:
-                await blacklist_token(jti, remaining, redis)
+            family = decode_token(token).get("fam")
+            if family:
+                await session_store.revoke(redis, family)
         except Exception:
             pass  # Redis unavailable or invalid token — still clear cookies
 
@@ -97,6 +110,18 @@ async def logout(
     return {"message": "Logged out successfully"}
 
 
+@router.post("/logout-all", response_model=MessageResponse)
+async def logout_all(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    redis=Depends(get_redis),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    await session_store.revoke_all(db, redis, current_user.id)
+    clear_auth_cookies(response)
+    return {"message": "Logged out of all sessions"}
+
+
 @router.post("/refresh", response_model=MessageResponse)
 async def refresh(
     request: Request,
@@ -116,26 +141,42 @@ async def refresh(
     if payload.get("type") != "refresh":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
 
-    jti = payload.get("jti")
-    if jti and await is_blacklisted(jti, redis):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
-
     try:
         user_id = uuid.UUID(payload["sub"])
     except (ValueError, KeyError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
 
-    user = await db.get(User, user_id)
+    user = await user_cache.get_principal(user_id, db, redis)
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    if payload.get("sv", 0) != user.session_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
 
-    access_token, _ = create_access_token(str(user.id))
-    refresh_token, _ = create_refresh_token(str(user.id))
-    set_auth_cookies(response, access_token, refresh_token)
+    family = payload.get("fam")
+    if not family:
+        # Issued before refresh rotation existed; move it onto a new family.
+        # Can go once REFRESH_TOKEN_EXPIRE_DAYS have passed since the deploy.
+        await _start_session(response, redis, user)
+        return {"message": "Token refreshed"}
+
+    access_token, _ = create_access_token(str(user.id), user.session_version, family)
+    refresh_token, refresh_jti = create_refresh_token(str(user.id), user.session_version, family)
+    try:
+        rotation = await session_store.rotate(redis, family, payload.get("jti", ""), refresh_jti)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Session store unavailable")
+
+    if rotation == Rotation.REUSED:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token reuse detected")
+    if rotation == Rotation.REVOKED:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+    # SUPERSEDED: a concurrent refresh of the same token already set new cookies
+    if rotation == Rotation.ROTATED:
+        set_auth_cookies(response, access_token, refresh_token)
 
     return {"message": "Token refreshed"}
 
 
 @router.get("/me", response_model=UserOut)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: CurrentUser = Depends(get_current_user)):
     return current_user
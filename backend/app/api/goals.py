@@ -1,92 +1,513 @@
+import asyncio
+import time
 import uuid
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.dependencies import get_current_user
+from app.config import settings
+from app.database import ReadSessionLocal, get_db, get_read_db
+from app.dependencies import get_current_user, get_redis
 from app.models.goal import GoalCategory
-from app.models.user import User
-from app.schemas.goal import GoalCreate, GoalOut, GoalSummary, GoalUpdate, SavedAmountUpdate
-from app.services import goal_service
+from app.schemas.auth import CurrentUser
+from app.schemas.goal import (
+    BulkImportResult,
+    ContributionBatch,
+    ContributionCreate,
+    GoalCreate,
+    GoalForecasts,
+    GoalOut,
+    GoalRecord,
+    GoalSummary,
+    GoalUpdate,
+    ReminderDismissal,
+    SavedAmountUpdate,
+)
+from app.services import cache_service, forecast_service, goal_events, goal_io_service, goal_service, idempotency, read_routing
 
 router = APIRouter(prefix="/goals", tags=["goals"])
 
+_goal_list_adapter = TypeAdapter(list[GoalOut])
+_goal_records_adapter = TypeAdapter(list[GoalRecord])
+_summary_adapter = TypeAdapter(GoalSummary)
+_forecast_adapter = TypeAdapter(GoalForecasts)
+_goal_adapter = TypeAdapter(GoalOut)
+
+
+def _validators(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": settings.GOALS_CACHE_CONTROL, "Vary": "Cookie"}
+
+
+def _not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """A 304 if the client already has `etag`; checked before any query runs."""
+    if cache_service.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_validators(etag))
+    return None
+
+
+def _json_response(
+    request: Request, body: bytes, etag: Optional[str], headers: Optional[dict] = None
+) -> Response:
+    # Without a generation (Redis down) tag the body itself: still saves the bytes
+    etag = etag or cache_service.body_etag(body)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    headers = {**(headers or {}), **_validators(etag)}
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _publish_upserts(redis: Redis, user_id: uuid.UUID, goals: list) -> None:
+    body = _goal_list_adapter.dump_json(_goal_list_adapter.validate_python(goals, from_attributes=True))
+    await goal_events.publish(redis, user_id, goal_events.upserted(body))
+
 
 @router.get("/summary", response_model=GoalSummary)
 async def get_summary(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    redis: Redis = Depends(get_redis),
 ):
-    return await goal_service.get_summary(db, current_user.id)
+    generation = await cache_service.generation(redis, current_user.id, db)
+    etag = cache_service.etag(current_user.id, generation, "summary")
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    async def load() -> bytes:
+        return _summary_adapter.dump_json(await goal_service.get_summary(db, current_user.id))
+
+    body = await cache_service.read_through(
+        redis, current_user.id, generation, "summary", settings.GOALS_SUMMARY_CACHE_TTL_SECONDS, load
+    )
+    return _json_response(request, body, etag)
 
 
 @router.get("/", response_model=list[GoalOut])
 async def list_goals(
+    request: Request,
     category: Optional[GoalCategory] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    redis: Redis = Depends(get_redis),
 ):
-    return await goal_service.get_goals(db, current_user.id, category, skip, limit)
+    after = None
+    if cursor:
+        try:
+            after = goal_service.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    name = f"list:{category.value if category else '*'}:{skip}:{limit}:{cursor or ''}"
+    generation = await cache_service.generation(redis, current_user.id, db)
+    etag = cache_service.etag(current_user.id, generation, name)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    async def load() -> tuple[bytes, Optional[str]]:
+        # Row tuples straight into the serializer: same bytes as list[GoalOut]
+        rows = await goal_service.get_goal_rows(db, current_user.id, category, skip, limit, after)
+        next_cursor = goal_service.encode_cursor(rows[-1].created_at, rows[-1].id) if len(rows) == limit else None
+        return _goal_records_adapter.dump_json([row._asdict() for row in rows]), next_cursor
+
+    body, next_cursor = await cache_service.read_through_page(
+        redis, current_user.id, generation, name, settings.GOALS_LIST_CACHE_TTL_SECONDS, load
+    )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return _json_response(request, body, etag, headers)
 
 
 @router.post("/", response_model=GoalOut, status_code=status.HTTP_201_CREATED)
 async def create_goal(
     body: GoalCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
+):
+    goal = await goal_service.create_goal(db, current_user.id, body)
+    await cache_service.invalidate(db, redis, current_user.id)
+    await _publish_upserts(redis, current_user.id, [goal])
+    return goal
+
+
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """The request body, or 413 as soon as it is known to exceed `max_bytes`.
+
+    Content-Length is checked first; the running total also covers chunked
+    uploads and a Content-Length that understates the body.
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Request body over {max_bytes} bytes"
+    )
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > max_bytes:
+        raise too_large
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@router.post("/bulk", response_model=BulkImportResult, status_code=status.HTTP_201_CREATED)
+async def bulk_create_goals(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
+):
+    """Import goals from a JSON array, NDJSON (application/x-ndjson) or CSV (text/csv).
+
+    All-or-nothing: if any row is invalid nothing is inserted and every
+    failing row is reported.
+    """
+    try:
+        rows = goal_io_service.parse_import(
+            await _read_body(request, settings.BULK_IMPORT_MAX_BYTES),
+            request.headers.get("content-type", "application/json"),
+            settings.BULK_IMPORT_MAX_ROWS,
+        )
+    except goal_io_service.GoalImportError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors)
+
+    goals = await goal_service.bulk_create_goals(db, current_user.id, rows) if rows else []
+    await cache_service.invalidate(db, redis, current_user.id)
+    if goals:
+        # Could be thousands of rows; let open streams refetch instead
+        await goal_events.publish(redis, current_user.id, goal_events.RESYNC)
+    return BulkImportResult(created=len(goals))
+
+
+async def _contribute(
+    deltas: dict[uuid.UUID, Decimal],
+    single: bool,
+    scope: str,
+    payload: str,
+    idempotency_key: Optional[str],
+    user_id: uuid.UUID,
+    db: AsyncSession,
+    redis: Redis,
+) -> Response:
+    payload_hash = idempotency.fingerprint(payload)
+    if idempotency_key:
+        try:
+            stored = await idempotency.begin(redis, scope, user_id, idempotency_key, payload_hash)
+        except idempotency.RequestInProgress:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+            )
+        except idempotency.KeyReused:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="This Idempotency-Key was already used with a different request body",
+            )
+        if stored is not None:
+            return Response(content=stored, media_type="application/json")
+
+    committed = False
+    try:
+        async with idempotency.held(redis, scope, user_id, idempotency_key, payload_hash):
+            goals = await goal_service.add_contributions(db, user_id, deltas)
+            if len(goals) != len(deltas):
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goal not found")
+            await cache_service.invalidate(db, redis, user_id)
+            committed = True
+
+        body = _goal_list_adapter.dump_json(_goal_list_adapter.validate_python(goals, from_attributes=True))
+        response = body[1:-1] if single else body
+        # Stored before anything else can fail or be cancelled
+        if idempotency_key:
+            await idempotency.complete(redis, scope, user_id, idempotency_key, payload_hash, response.decode())
+    finally:
+        # Also on cancellation (client gone, shutdown): the client may retry
+        if idempotency_key and not committed:
+            await idempotency.release(redis, scope, user_id, idempotency_key)
+
+    await goal_events.publish(redis, user_id, goal_events.upserted(body))
+    return Response(content=response, media_type="application/json")
+
+
+@router.post("/contributions", response_model=list[GoalOut])
+async def add_contributions(
+    body: ContributionBatch,
+    idempotency_key: Optional[str] = Header(None, max_length=200),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
 ):
-    return await goal_service.create_goal(db, current_user.id, body)
+    """Add to the saved amounts of several goals atomically (capped at each target).
+
+    Send an Idempotency-Key header to make client retries safe. Reusing a key
+    with a different body is rejected with 422.
+    """
+    deltas: dict[uuid.UUID, Decimal] = {}
+    for item in body.contributions:
+        deltas[item.goal_id] = deltas.get(item.goal_id, Decimal(0)) + Decimal(str(item.amount))
+    return await _contribute(
+        deltas, False, "contributions", body.model_dump_json(), idempotency_key, current_user.id, db, redis
+    )
+
+
+@router.get("/export")
+async def export_goals(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    current_user: CurrentUser = Depends(get_current_user),
+    redis: Redis = Depends(get_redis),
+):
+    async def rows():
+        # Own session: the request-scoped one is closed before the body streams
+        async with ReadSessionLocal(info={"transaction": True}) as db:
+            await read_routing.route(db, redis, current_user.id)
+            goals = goal_service.stream_goals(db, current_user.id)
+            encode = goal_io_service.export_csv if format == "csv" else goal_io_service.export_ndjson
+            async for chunk in encode(goals):
+                yield chunk
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="goals.{format}"'},
+    )
+
+
+@router.get("/search", response_model=list[GoalOut])
+async def search_goals(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=200),
+    skip: int = Query(0, ge=0, le=1000),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    redis: Redis = Depends(get_redis),
+):
+    q = " ".join(q.split())
+    name = f"search:{skip}:{limit}:{q}"
+    generation = await cache_service.generation(redis, current_user.id, db)
+    etag = cache_service.etag(current_user.id, generation, name)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    async def load() -> bytes:
+        rows = await goal_service.search_goal_rows(db, current_user.id, q, skip, limit)
+        return _goal_records_adapter.dump_json([row._asdict() for row in rows])
+
+    body = await cache_service.read_through(
+        redis, current_user.id, generation, name, settings.GOALS_LIST_CACHE_TTL_SECONDS, load
+    )
+    return _json_response(request, body, etag)
+
+
+@router.get("/upcoming", response_model=list[GoalOut])
+async def upcoming_goals(
+    request: Request,
+    within: str = Query("30d", pattern=r"^\d{1,3}[dw]$", description="Window ahead of today, e.g. 30d or 2w"),
+    overdue: bool = Query(False, description="Also include unachieved goals already past their deadline"),
+    limit: int = Query(100, ge=1, le=200),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    redis: Redis = Depends(get_redis),
+):
+    days = int(within[:-1]) * (7 if within.endswith("w") else 1)
+    today = datetime.now(timezone.utc).date()
+    name = f"upcoming:{today.isoformat()}:{days}:{int(overdue)}:{limit}"
+    generation = await cache_service.generation(redis, current_user.id, db)
+    etag = cache_service.etag(current_user.id, generation, name)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    async def load() -> bytes:
+        rows = await goal_service.get_upcoming_rows(
+            db, current_user.id, today, today + timedelta(days=days), overdue, limit
+        )
+        return _goal_records_adapter.dump_json([row._asdict() for row in rows])
+
+    body = await cache_service.read_through(
+        redis, current_user.id, generation, name, settings.GOALS_LIST_CACHE_TTL_SECONDS, load
+    )
+    return _json_response(request, body, etag)
+
+
+@router.get("/forecast", response_model=GoalForecasts)
+async def get_forecast(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    redis: Redis = Depends(get_redis),
+):
+    # Cached per generation, so until the next contribution (or other goal
+    # write); the date in the name rolls it over with the calendar
+    name = f"forecast:{datetime.now(timezone.utc).date().isoformat()}"
+    generation = await cache_service.generation(redis, current_user.id, db)
+    etag = cache_service.etag(current_user.id, generation, name)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    async def load() -> bytes:
+        return _forecast_adapter.dump_json(await forecast_service.get_forecast(db, current_user.id))
+
+    body = await cache_service.read_through(
+        redis, current_user.id, generation, name, settings.GOALS_FORECAST_CACHE_TTL_SECONDS, load
+    )
+    return _json_response(request, body, etag)
+
+
+@router.get("/stream")
+async def stream_goal_events(
+    current_user: CurrentUser = Depends(get_current_user),
+    redis: Redis = Depends(get_redis),
+):
+    """Server-sent events for the caller's goals.
+
+    Each event's data is {"type": "upsert", "goals": [...]},
+    {"type": "delete", "ids": [...]} or {"type": "resync"}, after which the
+    client should refetch, or {"type": "reminder", "goals": [{"id", "title",
+    "deadline"}, ...]}. Reminders not yet dismissed (POST
+    /goals/reminders/dismiss) come first. The stream ends after
+    GOAL_STREAM_MAX_SECONDS and EventSource reconnects on its own.
+    """
+    if goal_events.subscriber_count() >= settings.GOAL_STREAM_MAX_SUBSCRIBERS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open streams",
+            headers={"Retry-After": "30"},
+        )
+
+    async def events():
+        queue = await goal_events.subscribe(redis, current_user.id)
+        try:
+            yield "retry: 3000\n\n"
+            # After subscribing, so a reminder published meanwhile isn't missed
+            pending = await goal_events.pending_reminders(redis, current_user.id)
+            if pending is not None:
+                yield f"data: {pending}\n\n"
+            deadline = time.monotonic() + settings.GOAL_STREAM_MAX_SECONDS
+            while time.monotonic() < deadline:
+                try:
+                    message = await asyncio.wait_for(queue.get(), settings.GOAL_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # keeps proxies from closing an idle stream
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            await goal_events.unsubscribe(current_user.id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/reminders/dismiss", status_code=status.HTTP_204_NO_CONTENT)
+async def dismiss_reminders(
+    body: ReminderDismissal,
+    current_user: CurrentUser = Depends(get_current_user),
+    redis: Redis = Depends(get_redis),
+):
+    """Stop re-sending deadline reminders the client has shown."""
+    try:
+        await goal_events.dismiss_reminders(redis, current_user.id, body.goal_ids)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Reminder store unavailable")
 
 
 @router.get("/{goal_id}", response_model=GoalOut)
 async def get_goal(
     goal_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    redis: Redis = Depends(get_redis),
 ):
+    etag = cache_service.etag(
+        current_user.id, await cache_service.generation(redis, current_user.id, db), f"goal:{goal_id}"
+    )
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
     goal = await goal_service.get_goal(db, goal_id, current_user.id)
     if not goal:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goal not found")
-    return goal
+    body = _goal_adapter.dump_json(_goal_adapter.validate_python(goal, from_attributes=True))
+    return _json_response(request, body, etag)
 
 
 @router.patch("/{goal_id}", response_model=GoalOut)
 async def update_goal(
     goal_id: uuid.UUID,
     body: GoalUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
 ):
-    goal = await goal_service.get_goal(db, goal_id, current_user.id)
+    goal = await goal_service.update_goal(db, goal_id, current_user.id, body)
     if not goal:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goal not found")
-    return await goal_service.update_goal(db, goal, body)
+    await cache_service.invalidate(db, redis, current_user.id)
+    await _publish_upserts(redis, current_user.id, [goal])
+    return goal
 
 
 @router.patch("/{goal_id}/saved", response_model=GoalOut)
 async def update_goal_saved(
     goal_id: uuid.UUID,
     body: SavedAmountUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
 ):
-    goal = await goal_service.get_goal(db, goal_id, current_user.id)
+    goal = await goal_service.update_goal_saved(db, goal_id, current_user.id, body.amount)
     if not goal:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goal not found")
-    return await goal_service.update_goal_saved(db, goal, body.amount)
+    await cache_service.invalidate(db, redis, current_user.id)
+    await _publish_upserts(redis, current_user.id, [goal])
+    return goal
+
+
+@router.post("/{goal_id}/contributions", response_model=GoalOut)
+async def add_contribution(
+    goal_id: uuid.UUID,
+    body: ContributionCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=200),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
+):
+    deltas = {goal_id: Decimal(str(body.amount))}
+    # Keys are per goal: the same key on another goal or on the batch route is a new request
+    scope = f"goals:{goal_id}:contributions"
+    return await _contribute(
+        deltas, True, scope, body.model_dump_json(), idempotency_key, current_user.id, db, redis
+    )
 
 
 @router.delete("/{goal_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_goal(
     goal_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
 ):
-    goal = await goal_service.get_goal(db, goal_id, current_user.id)
-    if not goal:
+    if not await goal_service.delete_goal(db, goal_id, current_user.id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goal not found")
-    await goal_service.delete_goal(db, goal)
+    await cache_service.invalidate(db, redis, current_user.id)
+    await goal_events.publish(redis, current_user.id, goal_events.deleted(goal_id))
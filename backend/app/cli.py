@@ -0,0 +1,181 @@
+"""Operational commands.
+
+    python -m app.cli check-rollups [--fix [--background]]
+    python -m app.cli reconcile-deadlines
+    python -m app.cli deactivate-user EMAIL
+    python -m app.cli revoke-sessions EMAIL
+    python -m app.cli jobs [--dead N] [--requeue-dead]
+    python -m app.cli remind-deadlines [--days N]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from app import job_queue, redis_client
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.models.user import User
+from app.services import cache_service, goal_service, read_routing, rollup_service, session_store, user_cache
+
+
+async def check_rollups(fix: bool, background: bool) -> int:
+    async with AsyncSessionLocal() as db:
+        drift = await rollup_service.find_drift(db)
+        for row in drift:
+            diffs = ", ".join(
+                f"{c}: {row[f'stored_{c}']} != {row[f'actual_{c}']}"
+                for c in ("total_saved", "total_target", "count", "achieved")
+                if row[f"stored_{c}"] != row[f"actual_{c}"]
+            )
+            print(f"drift user={row['user_id']} category={row['category'].value} {diffs}")
+        print(f"{len(drift)} rollup row(s) out of sync")
+
+        if drift and fix and background:
+            redis = redis_client.create_redis()
+            try:
+                for user_id in {row["user_id"] for row in drift}:
+                    await job_queue.enqueue(redis, "rebuild_rollups", user_id=str(user_id))
+            finally:
+                await redis.aclose()
+            print("queued rollup rebuilds for affected users")
+            return 0
+        if drift and fix:
+            for user_id in {row["user_id"] for row in drift}:
+                await rollup_service.rebuild(db, user_id)
+            await db.commit()
+            print("rebuilt rollups for affected users")
+            return 0
+    return 1 if drift else 0
+
+
+async def reconcile_deadlines() -> int:
+    async with AsyncSessionLocal() as db:
+        user_ids = await goal_service.reconcile_legacy_deadlines(db)
+        await db.commit()
+        if user_ids:
+            redis = redis_client.create_redis()
+            try:
+                for user_id in user_ids:
+                    await cache_service.invalidate(db, redis, user_id)
+            finally:
+                await redis.aclose()
+    print(f"reconciled deadlines for {len(user_ids)} user(s)")
+    return 0
+
+
+async def deactivate_user(email: str) -> int:
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
+        if not user:
+            print(f"no user with email {email}")
+            return 1
+        redis = redis_client.create_redis()
+        try:
+            user.is_active = False
+            await read_routing.pin(redis, user.id)
+            await db.commit()
+            await user_cache.invalidate(user.id, redis)
+        finally:
+            await redis.aclose()
+    print(f"deactivated {email}")
+    return 0
+
+
+async def revoke_sessions(email: str) -> int:
+    redis = redis_client.create_redis()
+    try:
+        async with AsyncSessionLocal() as db:
+            user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
+            if not user:
+                print(f"no user with email {email}")
+                return 1
+            await session_store.revoke_all(db, redis, user.id)
+    finally:
+        await redis.aclose()
+    print(f"revoked all sessions for {email}")
+    return 0
+
+
+async def jobs(dead: int, requeue_dead: bool) -> int:
+    redis = redis_client.create_redis()
+    try:
+        broker = job_queue.broker(redis)
+        counts = await broker.counts()
+        print(" ".join(f"{name}={count}" for name, count in counts.items()))
+        for payload in await broker.dead(dead):
+            job = json.loads(payload)
+            print(f"dead {job['name']} {job['id']} attempts={job['attempts']} kwargs={job['kwargs']} error={job['error']}")
+        if requeue_dead:
+            print(f"requeued {await broker.requeue_dead()} dead job(s)")
+    finally:
+        await redis.aclose()
+    return 0
+
+
+async def remind_deadlines(days: int) -> int:
+    # Meant for a daily cron entry; the worker scans and sends the reminders
+    redis = redis_client.create_redis()
+    try:
+        today = datetime.now(timezone.utc).date().isoformat()
+        job_id = await job_queue.enqueue(redis, "deadline_reminders", day=today, within_days=days)
+    finally:
+        await redis.aclose()
+    print(f"queued deadline reminders for goals due {today} + {days}d ({job_id})")
+    return 0
+
+
+async def _run(args: argparse.Namespace) -> int:
+    try:
+        if args.command == "check-rollups":
+            return await check_rollups(args.fix, args.background)
+        if args.command == "reconcile-deadlines":
+            return await reconcile_deadlines()
+        if args.command == "deactivate-user":
+            return await deactivate_user(args.email)
+        if args.command == "revoke-sessions":
+            return await revoke_sessions(args.email)
+        if args.command == "jobs":
+            return await jobs(args.dead, args.requeue_dead)
+        if args.command == "remind-deadlines":
+            return await remind_deadlines(args.days)
+        return 2
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rollups = sub.add_parser("check-rollups", help="Recompute goal rollups from goals and report drift")
+    rollups.add_argument("--fix", action="store_true", help="Rebuild rollups for users with drift")
+    rollups.add_argument("--background", action="store_true", help="With --fix, queue the rebuilds for the job worker")
+
+    sub.add_parser(
+        "reconcile-deadlines", help="Set date deadlines from string ones the previous release wrote mid-deploy"
+    )
+
+    deactivate = sub.add_parser("deactivate-user", help="Disable an account and drop its cached principal")
+    deactivate.add_argument("email")
+
+    revoke = sub.add_parser("revoke-sessions", help="Sign a user out everywhere by bumping their session version")
+    revoke.add_argument("email")
+
+    queue = sub.add_parser("jobs", help="Show background job queue depth and dead-lettered jobs")
+    queue.add_argument("--dead", type=int, default=20, metavar="N", help="Dead-lettered jobs to list (newest first)")
+    queue.add_argument("--requeue-dead", action="store_true", help="Move every dead-lettered job back onto the queue")
+
+    remind = sub.add_parser("remind-deadlines", help="Queue reminders for every unachieved goal due soon")
+    remind.add_argument(
+        "--days", type=int, default=settings.DEADLINE_REMINDER_DAYS, help="Remind about goals due within N days"
+    )
+
+    sys.exit(asyncio.run(_run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
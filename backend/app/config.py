@@ -17,12 +17,114 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = 5432
 
     DATABASE_URL: str = ""
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    # Pooled connections idle longer than this are pinged before reuse. Read
+    # sessions check a connection out per statement, so pinging every checkout
+    # would double their round trips. 0 pings on every checkout.
+    DB_PING_IDLE_SECONDS: float = 10.0
+    # Optional read replicas, comma-separated URLs (same pool sizes as the primary).
+    # Goal reads and principal lookups use one unless the user wrote in the last
+    # READ_YOUR_WRITES_SECONDS or every replica lags by more than REPLICA_MAX_LAG_SECONDS.
+    # Keep READ_YOUR_WRITES_SECONDS above REPLICA_MAX_LAG_SECONDS.
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 2.0
+    REPLICA_LAG_CHECK_SECONDS: float = 1.0
+    READ_YOUR_WRITES_SECONDS: float = 10.0
     REDIS_URL: str = "redis://localhost:6379"
     SECRET_KEY: str = "change-me-in-production-use-64-random-chars"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # A just-rotated refresh token presented again within this window is treated
+    # as a concurrent refresh (e.g. two tabs), not as token theft
+    REFRESH_REUSE_GRACE_SECONDS: int = 10
     ENVIRONMENT: str = "development"
+    AUTH_RATE_LIMIT_PER_MINUTE: int = 10
+    AUTH_RATE_LIMIT_SLIDING: bool = False
+
+    # Redis pool; per-call timeout also bounds the wait for a free connection
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_CALL_TIMEOUT_SECONDS: float = 0.25
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = 1.0
+
+    # Connections opened (and hot statements prepared) at startup, before /api/ready passes
+    DB_WARM_CONNECTIONS: int = 2
+    REDIS_WARM_CONNECTIONS: int = 2
+    WARM_UP_TIMEOUT_SECONDS: float = 10.0
+
+    # bcrypt runs on a dedicated pool; beyond MAX_PENDING queued calls, auth returns 503
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Redis read-through cache for goal reads; set a TTL to 0 to disable caching it
+    GOALS_LIST_CACHE_TTL_SECONDS: int = 60
+    GOALS_SUMMARY_CACHE_TTL_SECONDS: int = 60
+    # Forecasts also project from "now", so they expire even without writes
+    GOALS_FORECAST_CACHE_TTL_SECONDS: int = 3600
+    # Sent with the ETag on goal reads. Responses are per user, so keep them
+    # private; no-cache makes browsers revalidate with If-None-Match every time.
+    GOALS_CACHE_CONTROL: str = "private, no-cache"
+
+    # GET /goals/stream (SSE). Streams end after MAX_SECONDS so the client
+    # reconnects and re-authenticates; a slow client's queue beyond QUEUE_SIZE
+    # is replaced by a single resync message. MAX_SUBSCRIBERS is per process;
+    # keep it below the server's request concurrency so API calls still fit.
+    # Production sizes both in deploy.yml: streams hold a Cloud Run request
+    # slot each, and Firebase Hosting cuts proxied requests at 60s.
+    GOAL_STREAM_HEARTBEAT_SECONDS: float = 15.0
+    GOAL_STREAM_MAX_SECONDS: int = 900
+    GOAL_STREAM_QUEUE_SIZE: int = 100
+    GOAL_STREAM_MAX_SUBSCRIBERS: int = 10_000
+
+    # Background jobs (app.job_queue), run by `python -m app.worker`. "memory"
+    # keeps the queue in the API process and runs jobs there: development only.
+    JOBS_BROKER: str = "redis"
+    JOBS_CONCURRENCY: int = 4
+    JOBS_POLL_INTERVAL_SECONDS: float = 0.5
+    JOBS_TIMEOUT_SECONDS: float = 300.0
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_RETRY_BASE_SECONDS: float = 5.0
+    JOBS_RETRY_MAX_SECONDS: float = 600.0
+    JOBS_DEAD_LETTER_MAX: int = 1000
+    JOBS_SHUTDOWN_GRACE_SECONDS: float = 20.0
+
+    # Deadline reminders (python -m app.cli remind-deadlines, e.g. from cron):
+    # goals due within DAYS, scanned across all users BATCH_SIZE at a time
+    DEADLINE_REMINDER_DAYS: int = 7
+    DEADLINE_SCAN_BATCH_SIZE: int = 1000
+
+    # Bulk import limits; the byte cap is enforced while the body streams in
+    BULK_IMPORT_MAX_ROWS: int = 5000
+    BULK_IMPORT_MAX_BYTES: int = 5 * 1024 * 1024
+    # Completed responses are replayed for TTL. A claim is refreshed while its
+    # request runs; one whose process dies blocks retries for at most PENDING_TTL
+    IDEMPOTENCY_TTL_SECONDS: int = 86_400
+    IDEMPOTENCY_PENDING_TTL_SECONDS: int = 30
+
+    # Bearer token for the operational endpoints (/api/metrics, /api/cache/stats);
+    # they answer 404 while it is unset
+    OPS_TOKEN: str = ""
+
+    # Opt-in request profiling (app.profiling); nothing is installed when disabled.
+    # A request is profiled if it sends "X-Profile: <PROFILING_TOKEN>" or is sampled.
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_SLOW_QUERY_MS: float = 50.0
+    PROFILING_N_PLUS_ONE_THRESHOLD: int = 5
+    PROFILING_OUTPUT_DIR: str = "/tmp/goalplanner-profiles"
+
+    # Authenticated-user cache (in-process LRU, then Redis) used by get_current_user
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_ENTRIES: int = 10_000
+
+    # JWT codec ("jose" or the stdlib "hmac", which handles HS256/384/512 only)
+    # and the in-process cache of already verified tokens; 0 disables the cache
+    JWT_BACKEND: str = "jose"
+    JWT_CACHE_MAX_ENTRIES: int = 10_000
 
     # str (not List[str]) so pydantic-settings never tries to JSON-decode it.
     # Use the cors_origins property (list[str]) in all application code.
@@ -37,10 +139,22 @@ class Settings(BaseSettings):
             )
         return self
 
+    @model_validator(mode="after")
+    def require_redis_in_production(self) -> "Settings":
+        # Sessions live in Redis, and auth fails closed without it: a silent
+        # fallback to localhost would only surface as 503s on every request
+        if self.is_production and "REDIS_URL" not in self.model_fields_set:
+            raise ValueError("REDIS_URL must be set in production")
+        return self
+
     @property
     def cors_origins(self) -> list[str]:
         return [o.strip() for o in self.CORS_ORIGINS.split(",") if o.strip()]
 
+    @property
+    def replica_urls(self) -> list[str]:
+        return [u.strip() for u in self.DATABASE_REPLICA_URLS.split(",") if u.strip()]
+
     @property
     def is_production(self) -> bool:
         return self.ENVIRONMENT == "production"
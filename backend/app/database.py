@@ -1,14 +1,158 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+
+from sqlalchemy import event, make_url, text
+from sqlalchemy.exc import DisconnectionError, InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app import metrics, profiling
 from app.config import settings
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.ENVIRONMENT == "development",
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+logger = logging.getLogger(__name__)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.db_pool_wait.observe(time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    metrics.db_statement_latency.observe(elapsed, statement.split(None, 1)[0].upper())
+    stats = metrics.request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def _on_checkout(dbapi_connection, record, proxy):
+    now = time.perf_counter()
+    # Replaces pool_pre_ping, which pings on every checkout: only a connection
+    # that sat idle may have been dropped by the server or a proxy meanwhile
+    idle_since = record.info.get("checked_in_at")
+    if idle_since is not None and now - idle_since > settings.DB_PING_IDLE_SECONDS:
+        try:
+            dbapi_connection.ping()
+        except Exception as e:
+            metrics.db_pool_pings.inc(record.info.get("pool_name", ""), "stale")
+            # The pool discards this connection and checks out another
+            raise DisconnectionError() from e
+        metrics.db_pool_pings.inc(record.info.get("pool_name", ""), "ok")
+    record.info["checked_out_at"] = now
+
+
+def _on_checkin(dbapi_connection, record):
+    now = time.perf_counter()
+    record.info["checked_in_at"] = now
+    checked_out_at = record.info.pop("checked_out_at", None)
+    if checked_out_at is not None:
+        metrics.db_pool_checkout.observe(now - checked_out_at, record.info.get("pool_name", ""))
+
+
+def _create_engine(url: str, name: str) -> AsyncEngine:
+    new = create_async_engine(
+        url,
+        echo=settings.ENVIRONMENT == "development",
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    )
+    event.listen(new.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(new.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(new.sync_engine, "handle_error", _handle_error)
+    event.listen(new.sync_engine.pool, "connect", lambda dbapi_connection, record: record.info.update(pool_name=name))
+    event.listen(new.sync_engine.pool, "checkout", _on_checkout)
+    event.listen(new.sync_engine.pool, "checkin", _on_checkin)
+    if settings.PROFILING_ENABLED:
+        profiling.install(new)
+    return new
+
+
+engine = _create_engine(settings.DATABASE_URL, "primary")
+
+# host:port -> engine for each DATABASE_REPLICA_URLS entry
+replicas: dict[str, AsyncEngine] = {}
+for _url in settings.replica_urls:
+    _parsed = make_url(_url)
+    _name = f"{_parsed.host}:{_parsed.port or 5432}"
+    replicas[_name] = _create_engine(_url, _name)
+
+# Seconds each replica is behind the primary, from monitor_replicas(); inf
+# until first measured or while unreachable, so an unknown replica is unused
+replica_lag: dict[str, float] = {name: float("inf") for name in replicas}
+
+_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
 )
 
+
+async def _measure_lag(name: str, replica: AsyncEngine) -> None:
+    healthy = replica_lag[name] <= settings.REPLICA_MAX_LAG_SECONDS
+    try:
+        async with replica.connect() as conn:
+            lag = float((await conn.execute(_LAG_SQL)).scalar() or 0)
+    except Exception as e:
+        lag = float("inf")
+        logger.warning("replica %s unreachable: %r", name, e)
+    replica_lag[name] = lag
+    if healthy != (lag <= settings.REPLICA_MAX_LAG_SECONDS):
+        logger.warning("replica %s %s (lag %.1fs)", name, "in rotation" if not healthy else "out of rotation", lag)
+
+
+async def monitor_replicas() -> None:
+    """Measure replica lag every REPLICA_LAG_CHECK_SECONDS until cancelled."""
+    while True:
+        await asyncio.gather(*(_measure_lag(name, replica) for name, replica in replicas.items()))
+        await asyncio.sleep(settings.REPLICA_LAG_CHECK_SECONDS)
+
+
+def pick_replica() -> Optional[AsyncEngine]:
+    healthy = [replicas[name] for name, lag in replica_lag.items() if lag <= settings.REPLICA_MAX_LAG_SECONDS]
+    return random.choice(healthy) if healthy else None
+
+
+metrics.register(metrics.Callback(
+    "db_pool_connections",
+    "Pooled DB connections by state",
+    "gauge",
+    ("state",),
+    lambda: {
+        ("checked_out",): engine.pool.checkedout(),
+        ("idle",): engine.pool.checkedin(),
+        ("overflow",): max(0, engine.pool.overflow()),
+    },
+))
+
+metrics.register(metrics.Callback(
+    "db_replica_lag_seconds",
+    "Replication lag of each read replica (+Inf when unreachable)",
+    "gauge",
+    ("replica",),
+    lambda: {(name,): lag for name, lag in replica_lag.items()},
+))
+
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
@@ -18,11 +162,112 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+# Read sessions run each statement in autocommit mode: no BEGIN/COMMIT round
+# trips. Streaming reads need a transaction for their server-side cursor and
+# get a READ ONLY one instead. Both share the underlying engine's pool.
+_read_binds: dict[tuple[AsyncEngine, bool], AsyncEngine] = {}
+for _engine in (engine, *replicas.values()):
+    _read_binds[_engine, False] = _engine.execution_options(isolation_level="AUTOCOMMIT")
+    _read_binds[_engine, True] = _engine.execution_options(postgresql_readonly=True)
+
+
+class RoutingSession(Session):
+    """Uses the replica use_replica() stored in `info`, else the primary."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        target = self.info.get("replica") or engine
+        return _read_binds[target, self.info.get("transaction", False)].sync_engine
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _refuse_writes(session, flush_context, instances):
+    raise InvalidRequestError("read-only session: use get_db for writes")
+
+
+class ReadSession(AsyncSession):
+    """Session from get_read_db.
+
+    The connection is checked out lazily, on the first statement, and goes
+    back to the pool as soon as each result is buffered. It is not held
+    through serialization or anything else the handler awaits. connection()
+    is the exception: its caller keeps using the connection, so that one is
+    held until the next statement or the session closes.
+    """
+
+    # scalars() goes through execute(); the rest call the sync session directly
+    async def execute(self, *args, **kwargs):
+        try:
+            return await super().execute(*args, **kwargs)
+        finally:
+            await self._release()
+
+    async def scalar(self, *args, **kwargs):
+        try:
+            return await super().scalar(*args, **kwargs)
+        finally:
+            await self._release()
+
+    async def get(self, *args, **kwargs):
+        try:
+            return await super().get(*args, **kwargs)
+        finally:
+            await self._release()
+
+    async def get_one(self, *args, **kwargs):
+        try:
+            return await super().get_one(*args, **kwargs)
+        finally:
+            await self._release()
+
+    async def refresh(self, *args, **kwargs):
+        try:
+            return await super().refresh(*args, **kwargs)
+        finally:
+            await self._release()
+
+    async def _release(self) -> None:
+        # Ends the (autocommit) session transaction: returns the connection
+        # without a round trip, and keeps loaded objects usable
+        if not self.info.get("transaction"):
+            await self.commit()
+
+
+ReadSessionLocal = async_sessionmaker(
+    bind=engine,
+    class_=ReadSession,
+    sync_session_class=RoutingSession,
+    expire_on_commit=False,
+    autoflush=False,
+    info={"read_only": True},
+)
+
+
+def use_replica(session: AsyncSession, replica: bool = True) -> bool:
+    """Send a ReadSessionLocal session's next queries to a healthy replica, or back to the primary."""
+    if not session.info.get("read_only"):
+        return False
+    session.info["replica"] = pick_replica() if replica else None
+    return session.info["replica"] is not None
+
+
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         try:
             yield session
+            if settings.PROFILING_ENABLED:
+                await profiling.explain_slow_queries(session)
             await session.commit()
         except Exception:
             await session.rollback()
             raise
+
+
+async def get_read_db() -> AsyncSession:
+    """Session for read-only handlers (see ReadSession). Never commits anything.
+
+    Starts on the primary; see app.services.read_routing for replicas.
+    """
+    async with ReadSessionLocal() as session:
+        yield session
+        if settings.PROFILING_ENABLED:
+            await profiling.explain_slow_queries(session)
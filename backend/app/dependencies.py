@@ -1,13 +1,16 @@
-import time
+import secrets
 import uuid
 
 from fastapi import Depends, HTTPException, Request, status
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.models.user import User
-from app.services.auth_service import decode_token, is_blacklisted
+from app.config import settings
+from app import redis_client
+from app.database import get_read_db
+from app.schemas.auth import CurrentUser
+from app.services import session_store, user_cache
+from app.services.auth_service import decode_token
 
 
 async def get_redis(request: Request) -> Redis:
@@ -16,9 +19,9 @@ async def get_redis(request: Request) -> Redis:
 
 async def get_current_user(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     redis: Redis = Depends(get_redis),
-) -> User:
+) -> CurrentUser:
     token = request.cookies.get("__session")
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
@@ -31,15 +34,15 @@ async def get_current_user(
     if payload.get("type") != "access":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
 
-    jti = payload.get("jti")
-    # Gracefully skip blacklist check if Redis is unavailable
-    try:
-        if jti and await is_blacklisted(jti, redis):
+    family = payload.get("fam")
+    # Fails closed: a revoked session must not come back while Redis is down
+    if family:
+        try:
+            active = await session_store.is_active(redis, family)
+        except Exception:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Session store unavailable")
+        if not active:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
-    except HTTPException:
-        raise
-    except Exception:
-        pass  # Redis unavailable — treat token as not blacklisted
 
     # payload["sub"] is a string UUID; db.get() with UUID(as_uuid=True) requires uuid.UUID
     try:
@@ -47,9 +50,12 @@ async def get_current_user(
     except (ValueError, KeyError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
 
-    user = await db.get(User, user_id)
+    # Served from the principal cache; `db` is only used (lazily) on a miss
+    user = await user_cache.get_principal(user_id, db, redis)
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
+    if payload.get("sv", 0) != user.session_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
 
     return user
 
@@ -57,12 +63,10 @@ async def get_current_user(
 async def rate_limit_auth(request: Request, redis: Redis = Depends(get_redis)) -> None:
     try:
         ip = request.client.host if request.client else "unknown"
-        window = int(time.time() // 60)
-        key = f"rate:auth:{ip}:{window}"
-        count = await redis.incr(key)
-        if count == 1:
-            await redis.expire(key, 60)
-        if count > 10:
+        count = await redis_client.hit_rate_limit(
+            redis, f"rate:auth:{ip}", 60, sliding=settings.AUTH_RATE_LIMIT_SLIDING
+        )
+        if count > settings.AUTH_RATE_LIMIT_PER_MINUTE:
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="Too many requests. Please try again later.",
@@ -71,3 +75,12 @@ async def rate_limit_auth(request: Request, redis: Redis = Depends(get_redis)) -
         raise  # Always propagate 429
     except Exception:
         pass  # Redis unavailable — skip rate limiting, don't block the request
+
+
+async def require_ops_token(request: Request) -> None:
+    """Gate operational endpoints behind `Authorization: Bearer <OPS_TOKEN>`."""
+    if not settings.OPS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.OPS_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
@@ -0,0 +1,396 @@
+"""Background jobs on the shared Redis.
+
+Services enqueue work by name, with JSON-serializable keyword arguments:
+
+    await job_queue.enqueue(redis, "rebuild_rollups", user_id=str(user_id))
+
+Handlers register under that name and get a fresh app.database session:
+
+    @job_queue.handler("rebuild_rollups")
+    async def rebuild_rollups(ctx: job_queue.JobContext, user_id: str) -> None: ...
+
+`python -m app.worker` runs them. Delivery is at least once, so handlers must
+be idempotent and commit their own work. A job that raises or exceeds
+JOBS_TIMEOUT_SECONDS is retried with exponential backoff. After
+JOBS_MAX_ATTEMPTS it moves to the dead-letter list (`python -m app.cli jobs`).
+
+Redis layout:
+- `jobs:queue`: a list of ready jobs.
+- `jobs:delayed`: a sorted set of retries, scored by when they are due.
+- `jobs:processing:<worker>`: one list per worker. Jobs are moved in
+  atomically when taken. If the worker's heartbeat key expires, any job
+  still listed there goes back on the queue.
+- `jobs:dead`: the newest JOBS_DEAD_LETTER_MAX failures.
+
+With JOBS_BROKER=memory the queue lives in the API process and a worker
+runs inside its lifespan. Use it for development and tests only: jobs are
+lost on restart.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Optional, Protocol
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import metrics, redis_client
+from app.config import settings
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+QUEUE = "jobs:queue"
+DELAYED = "jobs:delayed"
+DEAD = "jobs:dead"
+PROCESSING_PREFIX = "jobs:processing:"
+WORKER_PREFIX = "jobs:worker:"
+
+HEARTBEAT_SECONDS = 10
+HEARTBEAT_TTL_SECONDS = 30
+
+# KEYS[1] delayed, KEYS[2] queue; ARGV: now, max jobs to move
+_PROMOTE_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, job in ipairs(due) do
+    redis.call('ZREM', KEYS[1], job)
+    redis.call('LPUSH', KEYS[2], job)
+end
+return #due
+"""
+
+jobs_total = metrics.register(metrics.Counter(
+    "jobs_total", "Background jobs run, by outcome (ok, retry, dead)", ("job", "outcome")
+))
+job_duration = metrics.register(metrics.Histogram(
+    "job_duration_seconds", "Background job run time", ("job",)
+))
+
+
+@dataclass
+class Job:
+    name: str
+    kwargs: dict
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    enqueued_at: float = field(default_factory=time.time)
+    attempts: int = 0  # failed runs so far
+    error: Optional[str] = None
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, payload: str) -> "Job":
+        return cls(**json.loads(payload))
+
+
+@dataclass
+class JobContext:
+    db: AsyncSession
+    redis: Redis
+    job: Job
+
+
+Handler = Callable[..., Awaitable[None]]
+_handlers: dict[str, Handler] = {}
+
+
+def handler(name: str) -> Callable[[Handler], Handler]:
+    def register(fn: Handler) -> Handler:
+        if name in _handlers:
+            raise ValueError(f"job handler {name!r} is already registered")
+        _handlers[name] = fn
+        return fn
+    return register
+
+
+class Broker(Protocol):
+    """Storage for jobs. `payload` is always the exact string that was taken."""
+
+    async def push(self, payload: str, due: Optional[float] = None) -> None: ...
+    async def take(self, worker_id: str) -> Optional[str]: ...
+    async def ack(self, worker_id: str, payload: str) -> None: ...
+    async def retry(self, worker_id: str, payload: str, updated: str, due: float) -> None: ...
+    async def bury(self, worker_id: str, payload: str, updated: str) -> None: ...
+    async def promote(self, now: float) -> int: ...
+    async def heartbeat(self, worker_id: str) -> None: ...
+    async def recover(self) -> int: ...
+    async def retire(self, worker_id: str) -> None: ...
+    async def counts(self) -> dict[str, int]: ...
+    async def dead(self, limit: int) -> list[str]: ...
+    async def requeue_dead(self) -> int: ...
+
+
+class RedisBroker:
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def push(self, payload: str, due: Optional[float] = None) -> None:
+        if due is None:
+            await redis_client.call(self.redis.lpush(QUEUE, payload))
+        else:
+            await redis_client.call(self.redis.zadd(DELAYED, {payload: due}))
+
+    async def take(self, worker_id: str) -> Optional[str]:
+        # Non-blocking: BLMOVE would outlive the pool's socket timeout
+        return await self.redis.lmove(QUEUE, f"{PROCESSING_PREFIX}{worker_id}", "RIGHT", "LEFT")
+
+    async def ack(self, worker_id: str, payload: str) -> None:
+        await self.redis.lrem(f"{PROCESSING_PREFIX}{worker_id}", 1, payload)
+
+    async def retry(self, worker_id: str, payload: str, updated: str, due: float) -> None:
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.lrem(f"{PROCESSING_PREFIX}{worker_id}", 1, payload)
+        pipe.zadd(DELAYED, {updated: due})
+        await pipe.execute()
+
+    async def bury(self, worker_id: str, payload: str, updated: str) -> None:
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.lrem(f"{PROCESSING_PREFIX}{worker_id}", 1, payload)
+        pipe.lpush(DEAD, updated)
+        pipe.ltrim(DEAD, 0, settings.JOBS_DEAD_LETTER_MAX - 1)
+        await pipe.execute()
+
+    async def promote(self, now: float) -> int:
+        return await redis_client.run_script(self.redis, _PROMOTE_LUA, (DELAYED, QUEUE), now, 100)
+
+    async def heartbeat(self, worker_id: str) -> None:
+        await self.redis.set(f"{WORKER_PREFIX}{worker_id}", int(time.time()), ex=HEARTBEAT_TTL_SECONDS)
+
+    async def recover(self) -> int:
+        """Requeue jobs held by workers whose heartbeat has expired."""
+        moved = 0
+        async for key in self.redis.scan_iter(match=f"{PROCESSING_PREFIX}*", count=100):
+            worker_id = key[len(PROCESSING_PREFIX):]
+            if await self.redis.exists(f"{WORKER_PREFIX}{worker_id}"):
+                continue
+            while await self.redis.lmove(key, QUEUE, "RIGHT", "LEFT") is not None:
+                moved += 1
+        return moved
+
+    async def retire(self, worker_id: str) -> None:
+        # Anything still listed (jobs cut off by shutdown) is recovered at once
+        await self.redis.delete(f"{WORKER_PREFIX}{worker_id}")
+
+    async def counts(self) -> dict[str, int]:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.llen(QUEUE)
+        pipe.zcard(DELAYED)
+        pipe.llen(DEAD)
+        queued, delayed, dead = await pipe.execute()
+        return {"queued": queued, "delayed": delayed, "dead": dead}
+
+    async def dead(self, limit: int) -> list[str]:
+        return await self.redis.lrange(DEAD, 0, limit - 1)
+
+    async def requeue_dead(self) -> int:
+        moved = 0
+        while True:
+            payload = await self.redis.rpop(DEAD)
+            if payload is None:
+                return moved
+            job = Job.loads(payload)
+            job.attempts, job.error = 0, None
+            await self.redis.lpush(QUEUE, job.dumps())
+            moved += 1
+
+
+class MemoryBroker:
+    """In-process broker with RedisBroker's semantics, for development and tests."""
+
+    def __init__(self):
+        self.queue: deque[str] = deque()
+        self.delayed: dict[str, float] = {}
+        self.processing: dict[str, list[str]] = {}
+        self.dead_letters: deque[str] = deque(maxlen=settings.JOBS_DEAD_LETTER_MAX)
+
+    async def push(self, payload: str, due: Optional[float] = None) -> None:
+        if due is None:
+            self.queue.appendleft(payload)
+        else:
+            self.delayed[payload] = due
+
+    async def take(self, worker_id: str) -> Optional[str]:
+        if not self.queue:
+            return None
+        payload = self.queue.pop()
+        self.processing.setdefault(worker_id, []).append(payload)
+        return payload
+
+    async def ack(self, worker_id: str, payload: str) -> None:
+        self.processing[worker_id].remove(payload)
+
+    async def retry(self, worker_id: str, payload: str, updated: str, due: float) -> None:
+        self.processing[worker_id].remove(payload)
+        self.delayed[updated] = due
+
+    async def bury(self, worker_id: str, payload: str, updated: str) -> None:
+        self.processing[worker_id].remove(payload)
+        self.dead_letters.appendleft(updated)
+
+    async def promote(self, now: float) -> int:
+        due = sorted((at, p) for p, at in self.delayed.items() if at <= now)
+        for _, payload in due:
+            del self.delayed[payload]
+            self.queue.appendleft(payload)
+        return len(due)
+
+    async def heartbeat(self, worker_id: str) -> None:
+        pass
+
+    async def recover(self) -> int:
+        return 0  # workers share the process, so none can die on their own
+
+    async def retire(self, worker_id: str) -> None:
+        for payload in self.processing.pop(worker_id, []):
+            self.queue.append(payload)
+
+    async def counts(self) -> dict[str, int]:
+        return {"queued": len(self.queue), "delayed": len(self.delayed), "dead": len(self.dead_letters)}
+
+    async def dead(self, limit: int) -> list[str]:
+        return list(self.dead_letters)[:limit]
+
+    async def requeue_dead(self) -> int:
+        moved = 0
+        while self.dead_letters:
+            job = Job.loads(self.dead_letters.pop())
+            job.attempts, job.error = 0, None
+            self.queue.appendleft(job.dumps())
+            moved += 1
+        return moved
+
+
+memory_broker = MemoryBroker()
+
+
+def broker(redis: Redis) -> Broker:
+    if settings.JOBS_BROKER == "memory":
+        return memory_broker
+    return RedisBroker(redis)
+
+
+async def enqueue(redis: Redis, name: str, delay_seconds: float = 0, **kwargs) -> str:
+    """Queue a job and return its id. Raises if the broker is unreachable."""
+    job = Job(name=name, kwargs=kwargs)
+    await broker(redis).push(job.dumps(), time.time() + delay_seconds if delay_seconds > 0 else None)
+    return job.id
+
+
+def backoff(attempts: int) -> float:
+    """Seconds before retry number `attempts`: exponential, capped, with jitter."""
+    delay = min(settings.JOBS_RETRY_MAX_SECONDS, settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class Worker:
+    def __init__(self, redis: Redis, concurrency: int = settings.JOBS_CONCURRENCY):
+        self.redis = redis
+        self.broker = broker(redis)
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stopping = asyncio.Event()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._running: set[asyncio.Task] = set()
+        self._alive_at: Optional[float] = None
+
+    async def run(self) -> None:
+        """Take and run jobs until `stopping` is set, then wait for in-flight ones."""
+        logger.info("job worker %s started", self.id)
+        keepalive = asyncio.create_task(self._keepalive())
+        while not self.stopping.is_set():
+            if self._alive_at is None:
+                # Until our heartbeat exists, another worker could requeue what we take
+                await self._idle(settings.JOBS_POLL_INTERVAL_SECONDS)
+                continue
+            await self._slots.acquire()
+            try:
+                await self.broker.promote(time.time())
+                payload = await self.broker.take(self.id)
+            except Exception as e:
+                self._slots.release()
+                logger.warning("job broker unavailable: %r", e)
+                await self._idle(1.0)
+                continue
+            if payload is None:
+                self._slots.release()
+                await self._idle(settings.JOBS_POLL_INTERVAL_SECONDS)
+                continue
+            task = asyncio.create_task(self._execute(payload))
+            self._running.add(task)
+            task.add_done_callback(self._finished)
+
+        if self._running:
+            await asyncio.wait(self._running, timeout=settings.JOBS_SHUTDOWN_GRACE_SECONDS)
+            unfinished = list(self._running)
+            for task in unfinished:
+                task.cancel()  # stays in our processing list; retire() hands it back
+            await asyncio.gather(*unfinished, return_exceptions=True)
+        keepalive.cancel()
+        try:
+            await self.broker.retire(self.id)
+        except Exception:
+            pass  # the heartbeat expires on its own
+        logger.info("job worker %s stopped", self.id)
+
+    async def _keepalive(self) -> None:
+        # Separate from run(): the heartbeat must continue while every slot is busy
+        while True:
+            try:
+                await self.broker.heartbeat(self.id)
+                self._alive_at = time.time()
+                recovered = await self.broker.recover()
+                if recovered:
+                    logger.warning("requeued %d job(s) from stopped workers", recovered)
+            except Exception as e:
+                logger.warning("job worker heartbeat failed: %r", e)
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+
+    async def _idle(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self.stopping.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        self._slots.release()
+
+    async def _execute(self, payload: str) -> None:
+        job = Job.loads(payload)
+        fn = _handlers.get(job.name)
+        start = time.perf_counter()
+        try:
+            if fn is None:
+                raise LookupError(f"no handler registered for job {job.name!r}")
+            async with AsyncSessionLocal() as db:
+                await asyncio.wait_for(fn(JobContext(db, self.redis, job), **job.kwargs), settings.JOBS_TIMEOUT_SECONDS)
+        except Exception as e:
+            job.attempts += 1
+            job.error = repr(e)[:500]
+            if fn is None or job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+                outcome = "dead"
+                await self._settle(self.broker.bury(self.id, payload, job.dumps()))
+            else:
+                outcome = "retry"
+                await self._settle(self.broker.retry(self.id, payload, job.dumps(), time.time() + backoff(job.attempts)))
+            logger.warning("job %s %s failed (attempt %d, %s): %s", job.name, job.id, job.attempts, outcome, job.error)
+        else:
+            outcome = "ok"
+            await self._settle(self.broker.ack(self.id, payload))
+        job_duration.observe(time.perf_counter() - start, job.name)
+        jobs_total.inc(job.name, outcome)
+
+    async def _settle(self, update: Awaitable[None]) -> None:
+        # If this fails the job stays in our processing list and is run again
+        # after this worker restarts; handlers are idempotent.
+        try:
+            await update
+        except Exception as e:
+            logger.error("could not record job outcome: %r", e)
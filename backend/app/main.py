@@ -1,18 +1,40 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from redis.asyncio import Redis
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from app import readiness  # first, so startup timing covers the other imports
+from app import database, job_queue, metrics, profiling, redis_client
 from app.api.router import api_router
 from app.config import settings
+from app.dependencies import require_ops_token
+from app.services import auth_service, cache_service, goal_events, user_cache
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    app.state.redis = redis_client.create_redis()
+    await readiness.warm_up(app.state.redis)
+    lag_monitor = asyncio.create_task(database.monitor_replicas()) if database.replicas else None
+    user_cache.start(app.state.redis)
+    worker = None
+    if settings.JOBS_BROKER == "memory":
+        from app.services import goal_jobs  # noqa: F401  (registers the handlers)
+
+        worker = job_queue.Worker(app.state.redis)
+        worker_task = asyncio.create_task(worker.run())
     yield
+    if worker is not None:
+        worker.stopping.set()
+        await worker_task
+    await goal_events.close()
+    await user_cache.close()
+    if lag_monitor is not None:
+        lag_monitor.cancel()
     await app.state.redis.aclose()
+    auth_service.shutdown_hasher()
 
 
 app = FastAPI(
@@ -30,11 +52,52 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+if settings.PROFILING_ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(api_router)
 
 
+@app.exception_handler(auth_service.PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: auth_service.PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication is busy. Please try again shortly."},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.get("/api/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/api/ready")
+async def ready():
+    """Deep readiness: 503 until warmed, with Redis and the DB reachable and the
+    DB at or past this code's migration head."""
+    ok, report = await readiness.check(app.state.redis)
+    return JSONResponse(status_code=200 if ok else 503, content=report)
+
+
+@app.get("/api/cache/stats", dependencies=[Depends(require_ops_token)])
+async def cache_stats():
+    return cache_service.stats
+
+
+@app.get("/api/metrics", include_in_schema=False, dependencies=[Depends(require_ops_token)])
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+metrics.register(metrics.Callback(
+    "goals_cache_events_total",
+    "Goal read-through cache events",
+    "counter",
+    ("event",),
+    lambda: {(event,): count for event, count in cache_service.stats.items()},
+))
@@ -0,0 +1,181 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Deliberately tiny: counters, gauges and fixed-bucket histograms keyed by a
+label tuple, with no locking (everything runs on the event loop thread, and a
+lost increment from a worker thread is acceptable for metrics).
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.label_names = name, help, labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, _labels(self.label_names, labels), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels) -> None:
+        self.values[labels] = value
+
+
+class Callback:
+    """A metric whose samples are read from `fn` at scrape time.
+
+    `fn` returns {label values tuple: value}.
+    """
+
+    def __init__(self, name: str, help: str, kind: str, labels: tuple[str, ...], fn: Callable[[], dict]):
+        self.name, self.help, self.kind, self.label_names, self.fn = name, help, kind, labels, fn
+
+    def samples(self):
+        for labels, value in self.fn().items():
+            yield self.name, _labels(self.label_names, labels), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, labels
+        self.buckets = tuple(buckets)
+        # labels -> [bucket counts..., +Inf count, sum]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for labels, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield (
+                    f"{self.name}_bucket",
+                    _labels(self.label_names + ("le",), labels + (le,)),
+                    cumulative,
+                )
+            yield f"{self.name}_sum", _labels(self.label_names, labels), series[-1]
+            yield f"{self.name}_count", _labels(self.label_names, labels), cumulative
+
+
+_registry: list = []
+
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{labels} {value}")
+    return "\n".join(lines) + "\n"
+
+
+http_requests = register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+http_latency = register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+))
+http_in_flight = register(Gauge("http_requests_in_flight", "HTTP requests currently being served"))
+http_db_statements = register(Histogram(
+    "http_request_db_statements", "SQL statements issued per request", ("method", "route"), COUNT_BUCKETS
+))
+db_statement_latency = register(Histogram(
+    "db_statement_duration_seconds", "SQL statement execution time", ("operation",)
+))
+db_pool_wait = register(Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection"))
+db_pool_checkout = register(Histogram(
+    "db_pool_checkout_seconds", "How long each pooled DB connection was checked out", ("pool",)
+))
+db_pool_pings = register(Counter(
+    "db_pool_pings_total", "Liveness pings of idle pooled DB connections on checkout", ("pool", "outcome")
+))
+redis_latency = register(Histogram(
+    "redis_command_duration_seconds", "Redis command round-trip time", ("command", "outcome")
+))
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+
+
+# Per-request accumulator, set by MetricsMiddleware and read by the DB hooks
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: latency, status and SQL statement count per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.inc(amount=-1)
+            request_stats.reset(token)
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            http_requests.inc(method, path, status_code)
+            http_latency.observe(elapsed, method, path)
+            http_db_statements.observe(stats.statements, method, path)
@@ -1,5 +1,7 @@
 from app.models.base import Base
 from app.models.user import User
 from app.models.goal import Goal
+from app.models.goal_rollup import GoalRollup
+from app.models.goal_contribution import GoalContribution
 
-__all__ = ["Base", "User", "Goal"]
+__all__ = ["Base", "User", "Goal", "GoalRollup", "GoalContribution"]
@@ -1,7 +1,8 @@
 import uuid
 import enum
-from sqlalchemy import String, Numeric, ForeignKey, Enum as SAEnum, Text
-from sqlalchemy.dialects.postgresql import UUID
+from datetime import date
+from sqlalchemy import Column, Computed, Date, String, Numeric, ForeignKey, Index, Enum as SAEnum, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 from app.models.base import Base, TimestampMixin
 
@@ -12,6 +13,14 @@ class GoalCategory(str, enum.Enum):
     personal_health = "personal_health"
 
 
+# Title words rank above description words. The text search config is
+# spelled out: generated columns need an immutable expression.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english'::regconfig, title), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')"
+)
+
+
 class Goal(Base, TimestampMixin):
     __tablename__ = "goals"
 
@@ -22,7 +31,6 @@ class Goal(Base, TimestampMixin):
         UUID(as_uuid=True),
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     target: Mapped[float] = mapped_column(Numeric(15, 2), nullable=False)
@@ -35,6 +43,47 @@ class Goal(Base, TimestampMixin):
         default=GoalCategory.financial,
     )
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
-    deadline: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    deadline: Mapped[date | None] = mapped_column("deadline_date", Date, nullable=True)
+    # The pre-0006 string column, which the previous release still reads and
+    # writes during a rolling deploy. Written alongside `deadline` (see
+    # goal_service.with_legacy_deadline) until a later migration drops it.
+    legacy_deadline: Mapped[str | None] = mapped_column("deadline", String(20), nullable=True)
+    # Maintained by Postgres and only queried through Goal.__table__. Kept off
+    # the mapper, so a Goal loaded or RETURNed through a Session never carries
+    # it; str() of such a statement, compiled without the ORM, still lists it
+    search_vector = Column(TSVECTOR, Computed(SEARCH_VECTOR, persisted=True))
 
     user: Mapped["User"] = relationship("User", back_populates="goals")
+
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
+
+
+# Serve the newest-first listing (optionally per category) straight from an index,
+# so keyset pages cost the same at any depth. These also cover user_id lookups.
+Index("ix_goals_user_created", Goal.user_id, Goal.created_at.desc(), Goal.id.desc())
+Index(
+    "ix_goals_user_category_created",
+    Goal.user_id,
+    Goal.category,
+    Goal.created_at.desc(),
+    Goal.id.desc(),
+)
+
+# Open deadlines only: goals that have one and aren't achieved yet. The first
+# serves a user's upcoming/overdue views; the second lets the reminder scan
+# walk a date range across all users as a keyset range scan.
+_open_deadline = Goal.deadline.isnot(None) & (Goal.saved < Goal.target)
+Index("ix_goals_user_deadline_open", Goal.user_id, Goal.deadline, postgresql_where=_open_deadline)
+Index("ix_goals_deadline_open", Goal.deadline, Goal.id, postgresql_where=_open_deadline)
+
+# Search within one user's goals: full text over title and description, and
+# trigram similarity on the title for typos. user_id is part of both GIN
+# indexes (btree_gin), so matches from other users are never visited.
+Index("ix_goals_user_search", Goal.user_id, Goal.__table__.c.search_vector, postgresql_using="gin")
+Index(
+    "ix_goals_user_title_trgm",
+    Goal.user_id,
+    Goal.title,
+    postgresql_using="gin",
+    postgresql_ops={"title": "gin_trgm_ops"},
+)
@@ -0,0 +1,33 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Identity, Index, Numeric, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import mapped_column, Mapped
+from app.models.base import Base
+
+
+class GoalContribution(Base):
+    """Append-only ledger of changes to Goal.saved, written by goal_service.
+
+    `amount` is the signed change actually applied (after capping at the
+    target), so a goal's rows sum to its saved amount minus what it started with.
+    """
+
+    __tablename__ = "goal_contributions"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    goal_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("goals.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    amount: Mapped[float] = mapped_column(Numeric(15, 2), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+
+# A goal's history in time order, for forecasting
+Index("ix_goal_contributions_goal_created", GoalContribution.goal_id, GoalContribution.created_at)
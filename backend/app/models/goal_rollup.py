@@ -0,0 +1,26 @@
+import uuid
+from sqlalchemy import ForeignKey, Integer, Numeric, Enum as SAEnum
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import mapped_column, Mapped
+from app.models.base import Base
+from app.models.goal import GoalCategory
+
+
+class GoalRollup(Base):
+    """Per-user, per-category goal totals, kept in step with `goals` by goal_service."""
+
+    __tablename__ = "goal_rollups"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    category: Mapped[GoalCategory] = mapped_column(
+        SAEnum(GoalCategory, name="goalcategory", create_type=False),
+        primary_key=True,
+    )
+    total_saved: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False, default=0)
+    total_target: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False, default=0)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    achieved: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,182 @@
+"""Opt-in per-request profiling: statement log, N+1 detection, slow-query plans.
+
+Nothing here is wired up unless PROFILING_ENABLED is set. Then a request is
+profiled when it carries `X-Profile: <PROFILING_TOKEN>` or is picked by
+PROFILING_SAMPLE_RATE, and a JSON report (plus a cProfile dump when no other
+request is already being profiled) is written to PROFILING_OUTPUT_DIR.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestProfile:
+    method: str
+    path: str
+    statements: list[dict] = field(default_factory=list)
+    explaining: bool = False
+
+
+# String constants in plans: a custom plan shows the bound values inline
+_PLAN_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+# cProfile hooks the whole thread, so only one request at a time gets a trace
+_cprofile_busy = False
+
+
+def install(engine: AsyncEngine) -> None:
+    """Attach the statement-logging hooks to `engine`."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if current.get() is not None:
+            conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = current.get()
+        if profile is None or not conn.info.get("profile_start"):
+            return
+        elapsed = time.perf_counter() - conn.info["profile_start"].pop()
+        if profile.explaining:
+            return
+        profile.statements.append({
+            "sql": statement,
+            "parameters": None if executemany else parameters,
+            "ms": round(elapsed * 1000, 3),
+        })
+
+
+def _sampled(headers: list[tuple[bytes, bytes]]) -> bool:
+    if settings.PROFILING_TOKEN:
+        for name, value in headers:
+            if name == b"x-profile" and secrets.compare_digest(value.decode(), settings.PROFILING_TOKEN):
+                return True
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+async def explain_slow_queries(session: AsyncSession) -> None:
+    """EXPLAIN (without ANALYZE) each slow statement of the current request.
+
+    Called from get_db before commit, on the request's own connection.
+    """
+    profile = current.get()
+    if profile is None:
+        return
+    slow = [
+        s for s in profile.statements
+        if s["ms"] >= settings.PROFILING_SLOW_QUERY_MS and s["parameters"] is not None
+    ]
+    if not slow:
+        return
+    profile.explaining = True
+    try:
+        conn = await session.connection()
+        for s in slow:
+            try:
+                result = await conn.exec_driver_sql("EXPLAIN " + s["sql"], s["parameters"])
+                s["plan"] = [_PLAN_LITERAL.sub("'?'", row[0]) for row in result]
+            except Exception as e:
+                s["plan"] = [f"EXPLAIN failed: {e}"]
+    finally:
+        profile.explaining = False
+
+
+def _report(profile: RequestProfile, status: int, elapsed: float) -> dict:
+    # Bind parameters (emails, password hashes, tokens) never leave memory:
+    # the report on disk carries SQL text, timings and redacted plans only
+    repeats = Counter(s["sql"] for s in profile.statements)
+    return {
+        "method": profile.method,
+        "path": profile.path,
+        "status": status,
+        "ms": round(elapsed * 1000, 3),
+        "statement_count": len(profile.statements),
+        "db_ms": round(sum(s["ms"] for s in profile.statements), 3),
+        "n_plus_one": [
+            {"sql": sql, "count": count}
+            for sql, count in repeats.items()
+            if count >= settings.PROFILING_N_PLUS_ONE_THRESHOLD
+        ],
+        "slow_queries": [
+            {"sql": s["sql"], "ms": s["ms"], **({"plan": s["plan"]} if "plan" in s else {})}
+            for s in profile.statements
+            if s["ms"] >= settings.PROFILING_SLOW_QUERY_MS
+        ],
+        "statements": [{"sql": s["sql"], "ms": s["ms"]} for s in profile.statements],
+    }
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        os.makedirs(settings.PROFILING_OUTPUT_DIR, exist_ok=True)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _sampled(scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        global _cprofile_busy
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profile = RequestProfile(method=scope["method"], path=scope["path"])
+        token = current.set(profile)
+        profiler = None
+        if not _cprofile_busy:
+            _cprofile_busy = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                _cprofile_busy = False
+            current.reset(token)
+            self._write(profile, status_code, elapsed, profiler)
+
+    def _write(self, profile, status_code, elapsed, profiler) -> None:
+        report = _report(profile, status_code, elapsed)
+        stem = os.path.join(
+            settings.PROFILING_OUTPUT_DIR,
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}",
+        )
+        with open(f"{stem}.json", "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        if profiler is not None:
+            profiler.dump_stats(f"{stem}.prof")
+        if report["n_plus_one"] or report["slow_queries"]:
+            logger.warning(
+                "profiled %s %s: %d statements, %d repeated, %d slow — %s.json",
+                profile.method, profile.path, report["statement_count"],
+                len(report["n_plus_one"]), len(report["slow_queries"]), stem,
+            )
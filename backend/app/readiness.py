@@ -0,0 +1,189 @@
+"""Startup warm-up and the deep readiness probe behind /api/ready."""
+import asyncio
+import logging
+import math
+import os
+import time
+import uuid
+
+from redis.asyncio import Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database, metrics, redis_client
+from app.config import settings
+from app.database import engine
+from app.models.user import User
+from app.services import goal_service, rollup_service
+
+logger = logging.getLogger(__name__)
+
+# Taken when app.main first imports this module, so startup time includes most imports
+PROCESS_START = time.monotonic()
+
+state = {"ready": False, "startup_seconds": None, "warm_up_seconds": None}
+_scripts = None
+
+
+def _script_directory():
+    # Loaded on the first /api/ready rather than during warm-up, so startup
+    # doesn't pay for importing alembic.
+    global _scripts
+    if _scripts is None:
+        from alembic.config import Config
+        from alembic.script import ScriptDirectory
+
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        config = Config(os.path.join(backend_dir, "alembic.ini"))
+        config.set_main_option("script_location", os.path.join(backend_dir, "alembic"))
+        _scripts = ScriptDirectory.from_config(config)
+    return _scripts
+
+
+def _schema_compatible(scripts, current: str | None) -> bool:
+    """Whether the database is at or after this code's migration head.
+
+    Migrations run before the new revision deploys, so instances still on the
+    old code see a revision they don't ship; that one is ahead, not broken.
+    Any revision they do ship must have the head among its ancestors.
+    """
+    if current is None:
+        return False
+    from alembic.util import CommandError
+
+    try:
+        scripts.get_revision(current)
+    except CommandError:
+        return True  # written by a newer release
+    head = scripts.get_current_head()
+    return any(rev.revision == head for rev in scripts.iterate_revisions(current, "base"))
+
+
+async def _warm_db(count: int) -> None:
+    # Hold `count` connections at once so the pool really opens that many, and
+    # run the hot reads on each: that fills SQLAlchemy's compiled cache and
+    # asyncpg's per-connection prepared statement cache.
+    conns = [await engine.connect() for _ in range(count)]
+    try:
+        for conn in conns:
+            async with AsyncSession(bind=conn) as db:
+                probe = uuid.uuid4()
+                await db.get(User, probe)
+                await goal_service.get_goal_rows(db, probe)
+                await goal_service.get_goal(db, probe, probe)
+                await rollup_service.get_rollups(db, probe)
+            await conn.rollback()
+    finally:
+        for conn in conns:
+            await conn.close()
+
+
+async def _warm_redis(redis: Redis, count: int) -> None:
+    pool = redis.connection_pool
+    conns = [await pool.get_connection("PING") for _ in range(count)]
+    try:
+        for conn in conns:
+            await conn.send_command("PING")
+            await conn.read_response()
+    finally:
+        for conn in conns:
+            await pool.release(conn)
+
+
+async def warm_up(redis: Redis) -> None:
+    """Pre-open DB and Redis connections, then mark the instance ready.
+
+    Failures are logged rather than raised: /api/ready still reports the
+    broken dependency, and the app can serve once it recovers.
+    """
+    start = time.monotonic()
+    for name, warm in (
+        ("database", _warm_db(settings.DB_WARM_CONNECTIONS)),
+        ("redis", _warm_redis(redis, settings.REDIS_WARM_CONNECTIONS)),
+    ):
+        try:
+            await asyncio.wait_for(warm, settings.WARM_UP_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.warning("%s warm-up failed: %r", name, e)
+
+    now = time.monotonic()
+    state["warm_up_seconds"] = round(now - start, 4)
+    state["startup_seconds"] = round(now - PROCESS_START, 4)
+    state["ready"] = True
+
+
+async def _timed(awaitable) -> float:
+    start = time.perf_counter()
+    await awaitable
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+async def _check_db(report: dict) -> str | None:
+    async with engine.connect() as conn:
+        report["db"] = {"ok": True, "rtt_ms": await _timed(conn.execute(text("SELECT 1")))}
+        return (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+
+
+async def check(redis: Redis) -> tuple[bool, dict]:
+    pool = engine.pool
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    report = {
+        "warmed": state["ready"],
+        "startup_seconds": state["startup_seconds"],
+        "warm_up_seconds": state["warm_up_seconds"],
+        "db_pool": {
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "capacity": capacity,
+            "saturation": round(pool.checkedout() / capacity, 3),
+        },
+    }
+    ok = state["ready"]
+
+    try:
+        scripts = _script_directory()
+    except Exception as e:
+        logger.warning("could not read migration scripts: %s", e)
+        scripts = None
+
+    try:
+        current = await asyncio.wait_for(_check_db(report), settings.WARM_UP_TIMEOUT_SECONDS)
+        compatible = scripts is not None and _schema_compatible(scripts, current)
+        report["migration"] = {
+            "current": current,
+            "head": scripts.get_current_head() if scripts is not None else None,
+            "compatible": compatible,
+        }
+        ok = ok and compatible
+    except Exception as e:
+        report["db"] = {"ok": False, "error": repr(e)}
+        ok = False
+
+    # Replicas are optional: lagging or unreachable ones are just skipped
+    if database.replicas:
+        report["replicas"] = {
+            name: {
+                "lag_seconds": None if math.isinf(lag) else round(lag, 3),
+                "in_rotation": lag <= settings.REPLICA_MAX_LAG_SECONDS,
+            }
+            for name, lag in database.replica_lag.items()
+        }
+
+    # Redis is required: sessions are recorded and checked there, and auth
+    # answers 503 without it
+    try:
+        report["redis"] = {"ok": True, "rtt_ms": await _timed(redis_client.call(redis.ping()))}
+    except Exception as e:
+        report["redis"] = {"ok": False, "error": repr(e)}
+        ok = False
+
+    return ok, report
+
+
+metrics.register(metrics.Callback(
+    "app_startup_seconds",
+    "Process start to warmed and ready",
+    "gauge",
+    (),
+    lambda: {(): state["startup_seconds"]} if state["startup_seconds"] is not None else {},
+))
@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from typing import Awaitable, Sequence, TypeVar, Union
+
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.exceptions import NoScriptError
+
+from app import metrics
+from app.config import settings
+
+T = TypeVar("T")
+
+# INCR and set the window expiry atomically: one round trip, and a crash between
+# the two commands can no longer leave a counter without a TTL.
+_FIXED_WINDOW_LUA = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+# Sorted set of request timestamps (ms); counts requests in the trailing window.
+_SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('PEXPIRE', KEYS[1], window)
+return redis.call('ZCARD', KEYS[1])
+"""
+
+
+async def run_script(redis: Redis, script: str, key: Union[str, Sequence[str]], *args) -> int:
+    # EVALSHA keeps the request small; the first call on a fresh server loads it.
+    keys = [key] if isinstance(key, str) else list(key)
+    sha = hashlib.sha1(script.encode()).hexdigest()
+    try:
+        return int(await redis.evalsha(sha, len(keys), *keys, *args))
+    except NoScriptError:
+        return int(await redis.eval(script, len(keys), *keys, *args))
+
+
+class InstrumentedRedis(Redis):
+    """Redis client that records every command's round trip in app.metrics."""
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await super().execute_command(*args, **options)
+            outcome = "ok"
+            return result
+        finally:
+            metrics.redis_latency.observe(time.perf_counter() - start, str(args[0]).upper(), outcome)
+
+
+def create_redis() -> Redis:
+    pool = BlockingConnectionPool.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_CALL_TIMEOUT_SECONDS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+    )
+    return InstrumentedRedis.from_pool(pool)
+
+
+async def call(awaitable: Awaitable[T]) -> T:
+    """Await a Redis command, giving up after REDIS_CALL_TIMEOUT_SECONDS."""
+    return await asyncio.wait_for(awaitable, settings.REDIS_CALL_TIMEOUT_SECONDS)
+
+
+async def hit_rate_limit(redis: Redis, key: str, window_seconds: int, sliding: bool = False) -> int:
+    """Count one hit against `key` and return the hits in the current window."""
+    if sliding:
+        now_ms = int(time.time() * 1000)
+        return await call(run_script(
+            redis, _SLIDING_WINDOW_LUA, key, now_ms, window_seconds * 1000, f"{now_ms}:{uuid.uuid4().hex}"
+        ))
+    window = int(time.time() // window_seconds)
+    return await call(run_script(redis, _FIXED_WINDOW_LUA, f"{key}:{window}", window_seconds))
@@ -1,3 +1,4 @@
+import uuid
 from pydantic import BaseModel, EmailStr, Field, UUID4
 from datetime import datetime
 
@@ -20,3 +21,16 @@ class UserOut(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class CurrentUser(BaseModel):
+    """The cached principal returned by get_current_user — not a live ORM row."""
+
+    id: uuid.UUID
+    email: str
+    display_name: str
+    is_active: bool
+    created_at: datetime
+    session_version: int = 0
+
+    model_config = {"from_attributes": True}
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, UUID4
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Literal, Optional
+from typing_extensions import TypedDict
 from app.models.goal import GoalCategory
 
 
@@ -12,7 +13,7 @@ class GoalCreate(BaseModel):
     color: str = Field("blue", max_length=30)
     category: GoalCategory = GoalCategory.financial
     description: Optional[str] = None
-    deadline: Optional[str] = None
+    deadline: Optional[date] = None
 
 
 class GoalUpdate(BaseModel):
@@ -23,13 +24,33 @@ class GoalUpdate(BaseModel):
     color: Optional[str] = Field(None, max_length=30)
     category: Optional[GoalCategory] = None
     description: Optional[str] = None
-    deadline: Optional[str] = None
+    deadline: Optional[date] = None
 
 
 class SavedAmountUpdate(BaseModel):
     amount: float = Field(..., ge=0)
 
 
+class ContributionCreate(BaseModel):
+    amount: float = Field(..., gt=0)
+
+
+class ContributionItem(ContributionCreate):
+    goal_id: UUID4
+
+
+class ContributionBatch(BaseModel):
+    contributions: list[ContributionItem] = Field(..., min_length=1, max_length=500)
+
+
+class ReminderDismissal(BaseModel):
+    goal_ids: list[UUID4] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkImportResult(BaseModel):
+    created: int
+
+
 class GoalOut(BaseModel):
     id: UUID4
     user_id: UUID4
@@ -40,17 +61,49 @@ class GoalOut(BaseModel):
     color: str
     category: GoalCategory
     description: Optional[str]
-    deadline: Optional[str]
+    deadline: Optional[date]
     created_at: datetime
     updated_at: datetime
 
     model_config = {"from_attributes": True}
 
 
+# GoalOut's fields as a TypedDict, for serializing plain row dicts that are
+# already the right types: dump_json writes the same bytes as for GoalOut,
+# without per-row validation. Derived so the two can't drift apart.
+GoalRecord = TypedDict("GoalRecord", {name: f.annotation for name, f in GoalOut.model_fields.items()})
+
+
+class CategorySummary(BaseModel):
+    category: GoalCategory
+    total_saved: float
+    total_target: float
+    progress: float
+    count: int
+    achieved: int
+
+
 class GoalSummary(BaseModel):
     total_saved: float
     total_target: float
     overall_progress: float
     goals_achieved: int
     total_goals: int
-    by_category: list[dict]
+    by_category: list[CategorySummary]
+
+
+class GoalForecast(BaseModel):
+    goal_id: UUID4
+    status: Literal["achieved", "on_track", "at_risk", "stalled", "overdue", "no_data"]
+    deadline: Optional[date]
+    # Fitted from the contribution ledger; None without contributions
+    rate_per_day: Optional[float]
+    projected_completion: Optional[date]
+    # What the deadline needs from today; None without an open deadline
+    required_per_day: Optional[float]
+    contribution_days: int
+
+
+class GoalForecasts(BaseModel):
+    as_of: date
+    goals: list[GoalForecast]
@@ -1,26 +1,97 @@
+import asyncio
+import hashlib
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Tuple
 
-import bcrypt
 from fastapi import Response
-from jose import JWTError, jwt
-from redis.asyncio import Redis
 
 from app.config import settings
+from app.services import token_codec
 
-BLACKLIST_PREFIX = "blacklist:jti:"
 
+class PasswordHasherBusy(Exception):
+    """Raised when too many bcrypt calls are already queued."""
 
-def hash_password(plain: str) -> str:
-    return bcrypt.hashpw(plain.encode(), bcrypt.gensalt()).decode()
 
+# bcrypt releases the GIL, so threads give real parallelism without blocking the loop
+_hash_executor: ThreadPoolExecutor | None = None
+_hash_pending = 0
+
+
+async def _run_hasher(fn, *args):
+    global _hash_executor, _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusy()
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+        )
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_pending -= 1
+
+
+# bcrypt is imported on first use rather than at startup (and so is jose, by
+# token_codec); see benchmarks/bench_cold_start.py.
+
+
+def _hash_password(plain: str) -> str:
+    import bcrypt
+
+    return bcrypt.hashpw(plain.encode(), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode()
+
+
+def _verify_password(plain: str, hashed: str) -> bool:
+    import bcrypt
 
-def verify_password(plain: str, hashed: str) -> bool:
     return bcrypt.checkpw(plain.encode(), hashed.encode())
 
 
-def _create_token(user_id: str, token_type: str, expires_delta: timedelta) -> Tuple[str, str]:
+async def hash_password(plain: str) -> str:
+    return await _run_hasher(_hash_password, plain)
+
+
+async def verify_password(plain: str, hashed: str) -> bool:
+    return await _run_hasher(_verify_password, plain, hashed)
+
+
+def needs_rehash(hashed: str) -> bool:
+    # bcrypt hashes look like $2b$<cost>$<salt+digest>
+    try:
+        return int(hashed.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def shutdown_hasher() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+_token_codec: token_codec.TokenCodec | None = None
+
+# sha256(token) -> verified claims, least recently used first
+_verified: "OrderedDict[bytes, dict]" = OrderedDict()
+
+
+def _codec() -> token_codec.TokenCodec:
+    global _token_codec
+    if _token_codec is None:
+        _token_codec = token_codec.create(settings.JWT_BACKEND, settings.SECRET_KEY, settings.ALGORITHM)
+    return _token_codec
+
+
+def _create_token(
+    user_id: str, token_type: str, expires_delta: timedelta, session_version: int, family: str
+) -> Tuple[str, str]:
     jti = str(uuid.uuid4())
     expire = datetime.now(timezone.utc) + expires_delta
     payload = {
@@ -28,42 +99,53 @@ def _create_token(user_id: str, token_type: str, expires_delta: timedelta) -> Tu
         "type": token_type,
         "jti": jti,
         "exp": expire,
+        "sv": session_version,
+        "fam": family,
     }
-    token = jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return token, jti
+    return _codec().encode(payload), jti
 
 
-def create_access_token(user_id: str) -> Tuple[str, str]:
+def create_access_token(user_id: str, session_version: int, family: str) -> Tuple[str, str]:
     return _create_token(
         user_id,
         "access",
         timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        session_version,
+        family,
     )
 
 
-def create_refresh_token(user_id: str) -> Tuple[str, str]:
+def create_refresh_token(user_id: str, session_version: int, family: str) -> Tuple[str, str]:
     return _create_token(
         user_id,
         "refresh",
         timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        session_version,
+        family,
     )
 
 
 def decode_token(token: str) -> dict:
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
-    except JWTError as e:
-        raise ValueError(f"Invalid token: {e}")
-
-
-async def blacklist_token(jti: str, ttl_seconds: int, redis: Redis) -> None:
-    await redis.setex(f"{BLACKLIST_PREFIX}{jti}", ttl_seconds, "1")
-
-
-async def is_blacklisted(jti: str, redis: Redis) -> bool:
-    result = await redis.get(f"{BLACKLIST_PREFIX}{jti}")
-    return result is not None
+    """Verify `token` and return its claims; raises ValueError if invalid.
+
+    A token seen before is answered from the verified-token LRU until its
+    `exp`. Revocation is unaffected: callers still check the session store.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = _verified.get(key)
+    if claims is not None:
+        if claims["exp"] > time.time():
+            _verified.move_to_end(key)
+            return dict(claims)
+        del _verified[key]
+
+    claims = _codec().decode(token)
+    if settings.JWT_CACHE_MAX_ENTRIES > 0 and isinstance(claims.get("exp"), (int, float)):
+        _verified[key] = claims
+        while len(_verified) > settings.JWT_CACHE_MAX_ENTRIES:
+            _verified.popitem(last=False)
+        return dict(claims)
+    return claims
 
 
 def set_auth_cookies(response: Response, access_token: str, refresh_token: str) -> None:
@@ -0,0 +1,151 @@
+import hashlib
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.services import read_routing
+
+GENERATION_PREFIX = "cache:gen:"
+ENTRY_PREFIX = "cache:goals:"
+# Part of every ETag; bump when the JSON shape of a goal response changes
+ETAG_VERSION = "1"
+
+# Process-local counters, exposed at /api/cache/stats
+stats = {"hits": 0, "misses": 0, "errors": 0, "invalidations": 0}
+
+
+async def _generation(user_id: uuid.UUID, redis: Redis, db: Optional[AsyncSession]) -> str:
+    key = f"{GENERATION_PREFIX}{user_id}"
+    if db is not None and read_routing.enabled():
+        generation, pinned = await redis.mget(key, read_routing.pin_key(user_id))
+        database.use_replica(db, pinned is None)
+    else:
+        generation = await redis.get(key)
+    if generation is None:
+        # Seed with a clock value rather than 0: if the counter is ever evicted,
+        # entries written under the old generation can never match again.
+        await redis.set(key, time.time_ns(), nx=True)
+        generation = await redis.get(key)
+    return generation
+
+
+async def generation(
+    redis: Redis, user_id: uuid.UUID, db: Optional[AsyncSession] = None
+) -> Optional[str]:
+    """The user's current cache generation, or None if Redis is unavailable.
+
+    It changes on every goal write, so it doubles as the user's data version.
+    Pass the request's read session as `db` to route it as well (see
+    app.services.read_routing).
+    """
+    try:
+        return await _generation(user_id, redis, db)
+    except Exception:
+        stats["errors"] += 1
+        if db is not None:
+            database.use_replica(db, False)
+        return None
+
+
+def etag(user_id: uuid.UUID, generation: Optional[str], name: str) -> Optional[str]:
+    """Strong ETag for `name` at `generation`; computable without loading anything."""
+    if generation is None:
+        return None
+    digest = hashlib.blake2b(f"{ETAG_VERSION}:{user_id}:{generation}:{name}".encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def body_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    # If-None-Match uses the weak comparison, and proxies that compress
+    # (nginx gzip) hand clients W/ versions of our tags
+    if not if_none_match or etag is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+async def read_through(
+    redis: Redis,
+    user_id: uuid.UUID,
+    generation: Optional[str],
+    name: str,
+    ttl_seconds: int,
+    loader: Callable[[], Awaitable[bytes]],
+) -> bytes:
+    """Return the JSON for `name`, from Redis if cached or by calling `loader`,
+    which returns the serialized body.
+
+    Keys embed the user's cache `generation` (from `generation()`), so bumping
+    it (see `invalidate`) orphans every entry for that user at once. Without a
+    generation, or on any Redis failure, it falls back to the loader.
+    """
+    if ttl_seconds <= 0:
+        return await loader()
+
+    key = None
+    if generation is not None:
+        key = f"{ENTRY_PREFIX}{user_id}:{generation}:{name}"
+        try:
+            cached = await redis.get(key)
+            if cached is not None:
+                stats["hits"] += 1
+                return cached.encode()
+        except Exception:
+            stats["errors"] += 1  # Redis unavailable — serve from Postgres
+
+    stats["misses"] += 1
+    body = await loader()
+    if key is not None:
+        try:
+            await redis.setex(key, ttl_seconds, body.decode())
+        except Exception:
+            stats["errors"] += 1
+    return body
+
+
+async def read_through_page(
+    redis: Redis,
+    user_id: uuid.UUID,
+    generation: Optional[str],
+    name: str,
+    ttl_seconds: int,
+    loader: Callable[[], Awaitable[tuple[bytes, Optional[str]]]],
+) -> tuple[bytes, Optional[str]]:
+    """`read_through` for a page of results: `loader` returns the body and the
+    next page's cursor (None on the last page), and both are cached together.
+    """
+    async def load() -> bytes:
+        body, cursor = await loader()
+        # Cursors are URL-safe base64, so the first newline ends the cursor
+        return (cursor or "").encode() + b"\n" + body
+
+    entry = await read_through(redis, user_id, generation, f"page:{name}", ttl_seconds, load)
+    cursor, _, body = entry.partition(b"\n")
+    return body, cursor.decode() or None
+
+
+async def invalidate(db: AsyncSession, redis: Redis, user_id: uuid.UUID) -> None:
+    """Commit the pending goal write, then bump the user's cache generation.
+
+    Committing first ensures a concurrent reader can't repopulate the new
+    generation from pre-write data. The read-your-writes pin goes in before
+    the commit for the same reason.
+    """
+    await read_routing.pin(redis, user_id)
+    await db.commit()
+    try:
+        key = f"{GENERATION_PREFIX}{user_id}"
+        if await redis.incr(key) == 1:
+            await redis.set(key, time.time_ns())  # counter was evicted; reseed
+        stats["invalidations"] += 1
+    except Exception:
+        stats["errors"] += 1  # Redis unavailable — entries expire via TTL
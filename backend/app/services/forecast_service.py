@@ -0,0 +1,160 @@
+"""Savings forecasts from the contribution ledger, fitted for all of a user's goals at once.
+
+A goal's history is its running saved balance over time: the starting
+balance when it was created, one point per day with contributions, and the
+current balance now. The slope of a least-squares line through those points
+is the goal's savings rate, which projects when the target will be reached
+and whether that beats the deadline. Every goal is fitted in one vectorized
+pass: per-goal sums are np.bincount over the goal index, with no Python
+loop over goals or contributions.
+
+numpy is imported on first use rather than at startup; see
+benchmarks/bench_cold_start.py.
+"""
+import math
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.goal import Goal
+from app.models.goal_contribution import GoalContribution
+from app.schemas.goal import GoalForecast, GoalForecasts
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DAY_SECONDS = 86_400.0
+# Completion dates further out than this are reported as None
+HORIZON_DAYS = 100 * 365
+
+
+def fit_rates(
+    index: "np.ndarray", days: "np.ndarray", amounts: "np.ndarray", created: "np.ndarray", saved: "np.ndarray"
+) -> "tuple[np.ndarray, np.ndarray]":
+    """Least-squares savings rate (per day) of each goal, and its number of ledger points.
+
+    `index`, `days` and `amounts` are the ledger points sorted by goal index,
+    then time; `created` and `saved` are per goal. Times are in days relative
+    to now. Goals without ledger points get a rate of NaN.
+    """
+    import numpy as np
+
+    goals = len(saved)
+    counts = np.bincount(index, minlength=goals)
+    # Running balance per goal: the global cumulative sum, less everything
+    # before the goal's first point, on top of its starting balance
+    running = np.cumsum(amounts)
+    before = np.concatenate(([0.0], running))[np.cumsum(counts) - counts]
+    start = saved - np.bincount(index, amounts, minlength=goals)
+    balance = running - before[index] + start[index]
+
+    # Sums over each goal's points (start, ledger, now at x=0), then the
+    # least-squares slope from them. x spans at most the goal's age in days,
+    # so the uncentered sums lose nothing that matters at cent precision.
+    n = counts + 2
+    sx = created + np.bincount(index, days, minlength=goals)
+    sy = start + np.bincount(index, balance, minlength=goals) + saved
+    sxx = created * created + np.bincount(index, days * days, minlength=goals) - sx * sx / n
+    sxy = created * start + np.bincount(index, days * balance, minlength=goals) - sx * sy / n
+    rates = np.divide(sxy, sxx, out=np.zeros(goals), where=sxx > 0)
+    rates[counts == 0] = np.nan
+    return rates, counts
+
+
+def project(
+    rates: "np.ndarray", counts: "np.ndarray", saved: "np.ndarray", target: "np.ndarray", deadline: "np.ndarray"
+) -> "tuple[np.ndarray, np.ndarray, np.ndarray]":
+    """Days until each goal completes (inf if never), the rate its deadline
+    needs (NaN without one), and its status.
+
+    `deadline` is days from now, NaN for goals without one.
+    """
+    import numpy as np
+
+    remaining = np.maximum(target - saved, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eta = np.where(rates > 0, remaining / rates, np.inf)
+        required = np.where((deadline > 0) & (remaining > 0), remaining / deadline, np.nan)
+    status = np.select(
+        [
+            remaining == 0,
+            deadline < 0,
+            counts == 0,
+            ~(rates > 0),
+            np.isnan(deadline) | (eta <= deadline),
+        ],
+        ["achieved", "overdue", "no_data", "stalled", "on_track"],
+        "at_risk",
+    )
+    return eta, required, status
+
+
+async def get_forecast(db: AsyncSession, user_id: uuid.UUID) -> GoalForecasts:
+    import numpy as np
+
+    now = time.time()
+    today = datetime.fromtimestamp(now, timezone.utc).date()
+
+    goals = (await db.execute(
+        select(
+            Goal.id,
+            cast(Goal.saved, Float),
+            cast(Goal.target, Float),
+            cast(func.extract("epoch", Goal.created_at), Float),
+            Goal.deadline,
+        )
+        .where(Goal.user_id == user_id)
+        .order_by(Goal.id)
+    )).all()
+    # One point per goal and day: the fit needs no finer resolution, and it
+    # bounds the rows fetched by the age of the goals, not their activity
+    day = func.date_trunc("day", GoalContribution.created_at)
+    ledger = (await db.execute(
+        select(
+            GoalContribution.goal_id,
+            cast(func.extract("epoch", day), Float),
+            cast(func.sum(GoalContribution.amount), Float),
+        )
+        .join(Goal, Goal.id == GoalContribution.goal_id)
+        .where(Goal.user_id == user_id)
+        .group_by(GoalContribution.goal_id, day)
+        .order_by(GoalContribution.goal_id, day)
+    )).all()
+
+    position = {row[0]: i for i, row in enumerate(goals)}
+    index = np.fromiter((position[row[0]] for row in ledger), np.intp, len(ledger))
+    days = (np.fromiter((row[1] for row in ledger), float, len(ledger)) - now) / DAY_SECONDS
+    amounts = np.fromiter((row[2] for row in ledger), float, len(ledger))
+    saved = np.fromiter((row[1] for row in goals), float, len(goals))
+    target = np.fromiter((row[2] for row in goals), float, len(goals))
+    created = (np.fromiter((row[3] for row in goals), float, len(goals)) - now) / DAY_SECONDS
+    deadlines = [row[4] for row in goals]
+    # A deadline day counts in full: it falls due at the end of that day
+    deadline = np.array(
+        [(d - today).days + 1 - (now % DAY_SECONDS) / DAY_SECONDS if d else math.nan for d in deadlines],
+        dtype=float,
+    )
+
+    rates, counts = fit_rates(index, days, amounts, created, saved)
+    eta, required, status = project(rates, counts, saved, target, deadline)
+
+    forecasts = []
+    for i, row in enumerate(goals):
+        rate, days_left, need = float(rates[i]), float(eta[i]), float(required[i])
+        forecasts.append(GoalForecast(
+            goal_id=row[0],
+            status=str(status[i]),
+            deadline=deadlines[i],
+            rate_per_day=None if math.isnan(rate) else round(rate, 2),
+            projected_completion=(
+                (datetime.fromtimestamp(now, timezone.utc) + timedelta(days=days_left)).date()
+                if 0 < days_left <= HORIZON_DAYS else None
+            ),
+            required_per_day=None if math.isnan(need) else round(need, 2),
+            contribution_days=int(counts[i]),
+        ))
+    return GoalForecasts(as_of=today, goals=forecasts)
@@ -0,0 +1,180 @@
+"""Per-user goal change events: Redis pub/sub fanned out to local SSE streams.
+
+Writers publish a small JSON message to the user's channel after commit.
+Each worker holds one pub/sub connection, subscribed to the channels of
+users with an open stream here, and a single reader task hands every
+message to those users' queues. Delivery is best effort. Whenever
+messages may have been lost (Redis reconnect, a full queue), subscribers
+get {"type": "resync"} and refetch. Deadline reminders are the exception:
+they are also stored until the client dismisses them, and sent again
+whenever a stream opens.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+
+from app import metrics, redis_client
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "goals:events:"
+# user_id -> hash of goal_id -> reminder_entry(), until the client dismisses them
+REMINDERS_PREFIX = "goals:reminders:"
+RESYNC = '{"type":"resync"}'
+
+# channel -> queues of this worker's open streams for that user
+_channels: dict[str, set[asyncio.Queue]] = {}
+_pubsub: Optional[PubSub] = None
+_reader: Optional[asyncio.Task] = None
+
+
+def upserted(goals_json: bytes) -> str:
+    """Message for created or changed goals; `goals_json` is a list[GoalOut] body."""
+    return '{"type":"upsert","goals":' + goals_json.decode() + "}"
+
+
+def deleted(goal_id: uuid.UUID) -> str:
+    return json.dumps({"type": "delete", "ids": [str(goal_id)]}, separators=(",", ":"))
+
+
+def reminder_entry(goal) -> str:
+    """What a reminder stores and sends per goal; `goal` has id, title and deadline."""
+    return json.dumps(
+        {"id": str(goal.id), "title": goal.title, "deadline": goal.deadline.isoformat()}, separators=(",", ":")
+    )
+
+
+def reminder(entries: list[str]) -> str:
+    """Message for goals whose deadline is near, from reminder_entry() values."""
+    return '{"type":"reminder","goals":[' + ",".join(entries) + "]}"
+
+
+async def pending_reminders(redis: Redis, user_id: uuid.UUID) -> Optional[str]:
+    """Reminders not yet dismissed, as one message (None if there are none).
+
+    Sent when a stream opens: a reminder published while the user had no
+    stream open would otherwise be lost.
+    """
+    try:
+        entries = await redis_client.call(redis.hvals(f"{REMINDERS_PREFIX}{user_id}"))
+    except Exception:
+        return None  # Redis unavailable — they are sent on a later connect
+    return reminder(entries) if entries else None
+
+
+async def dismiss_reminders(redis: Redis, user_id: uuid.UUID, goal_ids: list[uuid.UUID]) -> None:
+    await redis_client.call(redis.hdel(f"{REMINDERS_PREFIX}{user_id}", *map(str, goal_ids)))
+
+
+async def publish(redis: Redis, user_id: uuid.UUID, message: str) -> None:
+    try:
+        await redis_client.call(redis.publish(f"{CHANNEL_PREFIX}{user_id}", message))
+    except Exception:
+        pass  # Redis unavailable — streams are down too; clients resync on reconnect
+
+
+def _deliver(queue: asyncio.Queue, message: str) -> None:
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        # Slow consumer: drop what's queued, the client refetches instead
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC)
+
+
+def _broadcast(message: str) -> None:
+    for queues in _channels.values():
+        for queue in queues:
+            _deliver(queue, message)
+
+
+async def _read() -> None:
+    lost = False
+    # Also checked, not just cancelled: get_message() can swallow a
+    # cancellation that lands while it is reading a reply
+    while _reader is asyncio.current_task():
+        try:
+            if lost:
+                # redis-py reconnects and resubscribes what it knows about;
+                # this also covers a SUBSCRIBE that failed while Redis was down
+                if _channels:
+                    await _pubsub.subscribe(*_channels)
+                _broadcast(RESYNC)  # anything published meanwhile is gone
+                lost = False
+            message = await _pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is not None:
+                for queue in _channels.get(message["channel"], ()):
+                    _deliver(queue, message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not lost:
+                logger.warning("goal event stream lost Redis: %r", e)
+            lost = True
+            await asyncio.sleep(1.0)
+
+
+async def subscribe(redis: Redis, user_id: uuid.UUID) -> asyncio.Queue:
+    global _pubsub, _reader
+    channel = f"{CHANNEL_PREFIX}{user_id}"
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.GOAL_STREAM_QUEUE_SIZE)
+    queues = _channels.setdefault(channel, set())
+    queues.add(queue)
+    if len(queues) == 1:
+        if _pubsub is None:
+            _pubsub = redis.pubsub()
+        # Not wrapped in redis_client.call: cancelling a command halfway would
+        # desync the shared connection. The pool's socket timeout bounds it.
+        try:
+            await _pubsub.subscribe(channel)
+        except Exception:
+            pass  # the reader retries once Redis is back
+        if _reader is None:
+            _reader = asyncio.create_task(_read())
+    return queue
+
+
+async def unsubscribe(user_id: uuid.UUID, queue: asyncio.Queue) -> None:
+    channel = f"{CHANNEL_PREFIX}{user_id}"
+    queues = _channels.get(channel)
+    if queues is None:
+        return
+    queues.discard(queue)
+    if not queues:
+        del _channels[channel]
+        try:
+            await _pubsub.unsubscribe(channel)
+        except Exception:
+            pass
+
+
+def subscriber_count() -> int:
+    return sum(len(queues) for queues in _channels.values())
+
+
+async def close() -> None:
+    global _pubsub, _reader
+    reader, _reader = _reader, None
+    if reader is not None:
+        reader.cancel()
+        await asyncio.wait({reader}, timeout=2.0)
+    if _pubsub is not None:
+        await _pubsub.aclose()
+        _pubsub = None
+    _channels.clear()
+
+
+metrics.register(metrics.Callback(
+    "goal_stream_subscribers",
+    "Open goal event streams on this worker",
+    "gauge",
+    (),
+    lambda: {(): subscriber_count()},
+))
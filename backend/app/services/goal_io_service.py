@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+
+from app.models.goal import Goal
+from app.schemas.goal import GoalCreate, GoalOut
+
+EXPORT_FIELDS = list(GoalOut.model_fields)
+
+
+class GoalImportError(ValueError):
+    """The import payload is malformed or contains invalid rows."""
+
+    def __init__(self, errors: list[dict]):
+        super().__init__(f"{len(errors)} invalid row(s)")
+        self.errors = errors
+
+
+def _raw_rows(body: bytes, content_type: str) -> list[tuple[int, object]]:
+    """The payload's rows as (row number, item) pairs.
+
+    An NDJSON line that isn't valid JSON becomes a JSONDecodeError item, so
+    it's reported with its row rather than failing the whole payload. NDJSON
+    rows are numbered by line, blank lines included.
+    """
+    text = body.decode("utf-8-sig")
+    if content_type == "text/csv":
+        # Blank CSV cells mean "not provided", not an empty string
+        return [
+            (i, {k: v for k, v in row.items() if k and v not in ("", None)})
+            for i, row in enumerate(csv.DictReader(io.StringIO(text)), start=1)
+        ]
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        rows = []
+        for i, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append((i, json.loads(line)))
+            except json.JSONDecodeError as e:
+                rows.append((i, e))
+        return rows
+    rows = json.loads(text)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of goals")
+    return list(enumerate(rows, start=1))
+
+
+def parse_import(body: bytes, content_type: str, max_rows: int) -> list[GoalCreate]:
+    """Parse a JSON array, NDJSON or CSV payload into validated GoalCreate rows.
+
+    Raises GoalImportError listing every invalid row (1-based; the line for
+    NDJSON) so the client can fix them all in one pass.
+    """
+    try:
+        raw = _raw_rows(body, content_type.split(";")[0].strip().lower())
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise GoalImportError([{"row": None, "errors": [str(e)]}])
+    if len(raw) > max_rows:
+        raise GoalImportError([{"row": None, "errors": [f"At most {max_rows} rows per request"]}])
+
+    rows, errors = [], []
+    for i, item in raw:
+        if isinstance(item, json.JSONDecodeError):
+            errors.append({"row": i, "errors": [f"Invalid JSON: {item}"]})
+            continue
+        try:
+            rows.append(GoalCreate.model_validate(item))
+        except ValidationError as e:
+            errors.append({
+                "row": i,
+                "errors": [f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors()],
+            })
+    if errors:
+        raise GoalImportError(errors)
+    return rows
+
+
+async def export_ndjson(goals: AsyncIterator[Goal]) -> AsyncIterator[bytes]:
+    async for goal in goals:
+        yield GoalOut.model_validate(goal).model_dump_json().encode() + b"\n"
+
+
+async def export_csv(goals: AsyncIterator[Goal]) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    async for goal in goals:
+        writer.writerow(GoalOut.model_validate(goal).model_dump(mode="json"))
+        if buf.tell() > 64 * 1024:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode()
@@ -0,0 +1,65 @@
+"""Background jobs for goals. Importing this module registers them (app.worker does)."""
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+
+from app import job_queue, redis_client
+from app.config import settings
+from app.services import cache_service, goal_events, goal_service, rollup_service
+
+REMINDED_PREFIX = "reminders:sent:"
+# How long a day's sent markers, and undismissed reminders, are kept
+REMINDER_TTL_SECONDS = 2 * 24 * 3600
+
+
+@job_queue.handler("rebuild_rollups")
+async def rebuild_rollups(ctx: job_queue.JobContext, user_id: str) -> None:
+    """Recompute one user's goal_rollups from their goals, then refresh caches and streams."""
+    uid = uuid.UUID(user_id)
+    await rollup_service.rebuild(ctx.db, uid)
+    await cache_service.invalidate(ctx.db, ctx.redis, uid)
+    await goal_events.publish(ctx.redis, uid, goal_events.RESYNC)
+
+
+@job_queue.handler("check_rollups")
+async def check_rollups(ctx: job_queue.JobContext) -> None:
+    """Find rollup drift across all users and queue a rebuild for each one affected."""
+    drift = await rollup_service.find_drift(ctx.db)
+    for user_id in {row["user_id"] for row in drift}:
+        await job_queue.enqueue(ctx.redis, "rebuild_rollups", user_id=str(user_id))
+
+
+@job_queue.handler("deadline_reminders")
+async def deadline_reminders(ctx: job_queue.JobContext, day: str, within_days: int) -> None:
+    """Remind every user of their unachieved goals due within `within_days` of `day`.
+
+    Each reminder is stored for the user (see goal_events.pending_reminders)
+    in the same transaction that marks it sent, then published to their open
+    streams. At most once per goal and day: a retried or repeated run skips
+    goals it already covered.
+    """
+    first = date.fromisoformat(day)
+    last = first + timedelta(days=within_days)
+    async for batch in goal_service.scan_open_deadlines(ctx.db, first, last, settings.DEADLINE_SCAN_BATCH_SIZE):
+        markers = [f"{REMINDED_PREFIX}{day}:{goal.id}" for goal in batch]
+        pipe = ctx.redis.pipeline(transaction=False)
+        for marker in markers:
+            pipe.exists(marker)
+        sent = await redis_client.call(pipe.execute())
+
+        by_user = defaultdict(dict)
+        pipe = ctx.redis.pipeline(transaction=True)
+        for goal, marker, done in zip(batch, markers, sent):
+            if done:
+                continue
+            entry = goal_events.reminder_entry(goal)
+            by_user[goal.user_id][goal.id] = entry
+            pipe.hset(f"{goal_events.REMINDERS_PREFIX}{goal.user_id}", str(goal.id), entry)
+            pipe.expire(f"{goal_events.REMINDERS_PREFIX}{goal.user_id}", REMINDER_TTL_SECONDS)
+            pipe.set(marker, 1, ex=REMINDER_TTL_SECONDS)
+        if not by_user:
+            continue
+        await redis_client.call(pipe.execute())
+
+        for user_id, entries in by_user.items():
+            await goal_events.publish(ctx.redis, user_id, goal_events.reminder(list(entries.values())))
@@ -1,10 +1,64 @@
+import base64
 import uuid
-from typing import Optional
-from sqlalchemy import select, func
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Optional
+from sqlalchemy import (
+    Float, Row, cast, column, delete, func, insert, literal, literal_column, select, tuple_, update, values,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.goal import Goal, GoalCategory
-from app.schemas.goal import GoalCreate, GoalUpdate, GoalSummary
+from app.models.goal_contribution import GoalContribution
+from app.schemas.goal import CategorySummary, GoalCreate, GoalOut, GoalUpdate, GoalSummary
+from app.services import rollup_service
+
+
+Cursor = tuple[datetime, uuid.UUID]
+
+
+def encode_cursor(created_at: datetime, goal_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{goal_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, goal_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(goal_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+# GoalOut's fields in order. Amounts are cast to float8 in Postgres, which
+# rounds exactly like float(Decimal), so rows need no conversion in Python.
+# Looked up by attribute, not table column: `deadline` is the deadline_date column.
+GOAL_OUT_COLUMNS = [
+    cast(Goal.__mapper__.columns[name], Float).label(name) if name in ("target", "saved")
+    else Goal.__mapper__.columns[name].label(name)
+    for name in GoalOut.model_fields
+]
+
+
+def with_legacy_deadline(values: dict) -> dict:
+    """`values` for a goal write, plus the string deadline column the previous
+    release reads (YYYY-MM-DD, as it wrote them). Every write that sets
+    `deadline` goes through this until a later migration drops that column.
+    """
+    if "deadline" not in values:
+        return values
+    deadline = values["deadline"]
+    return {**values, "legacy_deadline": deadline.isoformat() if deadline else None}
+
+
+def _page(stmt, user_id, category, skip, limit, after):
+    stmt = stmt.where(Goal.user_id == user_id)
+    if category:
+        stmt = stmt.where(Goal.category == category)
+    if after:
+        stmt = stmt.where(tuple_(Goal.created_at, Goal.id) < tuple_(*after))
+    return stmt.order_by(Goal.created_at.desc(), Goal.id.desc()).offset(skip).limit(limit)
 
 
 async def get_goals(
@@ -13,15 +67,98 @@ async def get_goals(
     category: Optional[GoalCategory] = None,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[Cursor] = None,
 ) -> list[Goal]:
-    stmt = select(Goal).where(Goal.user_id == user_id)
-    if category:
-        stmt = stmt.where(Goal.category == category)
-    stmt = stmt.order_by(Goal.created_at.desc()).offset(skip).limit(limit)
-    result = await db.execute(stmt)
+    """Newest goals first. Pass `after` (the last row's cursor) for keyset paging;
+    `skip` is kept for older clients but degrades linearly with depth."""
+    result = await db.execute(_page(select(Goal), user_id, category, skip, limit, after))
     return list(result.scalars().all())
 
 
+async def get_goal_rows(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    category: Optional[GoalCategory] = None,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Cursor] = None,
+) -> list[Row]:
+    """Same page as get_goals, as GOAL_OUT_COLUMNS tuples instead of ORM objects.
+
+    For read-only responses: skips identity-map bookkeeping and attribute
+    instrumentation. Serialize with `GoalRecord`.
+    """
+    result = await db.execute(_page(select(*GOAL_OUT_COLUMNS), user_id, category, skip, limit, after))
+    return list(result.all())
+
+
+async def search_goal_rows(
+    db: AsyncSession, user_id: uuid.UUID, q: str, skip: int = 0, limit: int = 20
+) -> list[Row]:
+    """The user's goals matching `q`, best first, as GOAL_OUT_COLUMNS tuples.
+
+    A goal matches on stemmed full text over its title and description, with
+    web-search syntax ("quoted phrase", -word, or), or when `q` is close to
+    a word of its title, which tolerates typos. Both are GIN index scans
+    within the user's goals. Rank adds text relevance to title similarity.
+    """
+    query = func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)
+    search_vector = Goal.__table__.c.search_vector
+    rank = func.ts_rank_cd(search_vector, query) + func.word_similarity(q, Goal.title)
+    stmt = (
+        select(*GOAL_OUT_COLUMNS)
+        .where(Goal.user_id == user_id, search_vector.op("@@")(query) | literal(q).op("<%")(Goal.title))
+        .order_by(rank.desc(), Goal.created_at.desc(), Goal.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return list((await db.execute(stmt)).all())
+
+
+def _open_deadline():
+    # Spelled exactly as the partial indexes' predicate so the planner can use them
+    return Goal.deadline.isnot(None) & (Goal.saved < Goal.target)
+
+
+async def get_upcoming_rows(
+    db: AsyncSession, user_id: uuid.UUID, today: date, until: date, overdue: bool = False, limit: int = 100
+) -> list[Row]:
+    """The user's unachieved goals due from `today` through `until`, soonest
+    first, as GOAL_OUT_COLUMNS tuples; with `overdue`, past deadlines too.
+
+    A range scan of ix_goals_user_deadline_open.
+    """
+    stmt = select(*GOAL_OUT_COLUMNS).where(Goal.user_id == user_id, _open_deadline(), Goal.deadline <= until)
+    if not overdue:
+        stmt = stmt.where(Goal.deadline >= today)
+    result = await db.execute(stmt.order_by(Goal.deadline, Goal.id).limit(limit))
+    return list(result.all())
+
+
+async def scan_open_deadlines(
+    db: AsyncSession, first: date, last: date, batch_size: int = 1000
+) -> AsyncIterator[list[Row]]:
+    """Every user's unachieved goals due between `first` and `last`, in batches.
+
+    Keyset pages over (deadline, id) on ix_goals_deadline_open, so each batch
+    is an index range scan and a short statement, whatever the table size.
+    Rows are (id, user_id, title, deadline).
+    """
+    after = None
+    while True:
+        stmt = select(Goal.id, Goal.user_id, Goal.title, Goal.deadline).where(
+            _open_deadline(), Goal.deadline >= first, Goal.deadline <= last
+        )
+        if after:
+            stmt = stmt.where(tuple_(Goal.deadline, Goal.id) > tuple_(*after))
+        rows = list((await db.execute(stmt.order_by(Goal.deadline, Goal.id).limit(batch_size))).all())
+        if rows:
+            yield rows
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1].deadline, rows[-1].id)
+
+
 async def get_goal(db: AsyncSession, goal_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Goal]:
     stmt = select(Goal).where(Goal.id == goal_id, Goal.user_id == user_id)
     result = await db.execute(stmt)
@@ -29,61 +166,215 @@ async def get_goal(db: AsyncSession, goal_id: uuid.UUID, user_id: uuid.UUID) ->
 
 
 async def create_goal(db: AsyncSession, user_id: uuid.UUID, data: GoalCreate) -> Goal:
-    goal = Goal(user_id=user_id, **data.model_dump())
-    db.add(goal)
-    await db.flush()
-    await db.refresh(goal)
+    # INSERT ... RETURNING brings back server defaults without a refresh SELECT
+    result = await db.execute(
+        insert(Goal).values(user_id=user_id, **with_legacy_deadline(data.model_dump())).returning(Goal)
+    )
+    goal = result.scalar_one()
+    await rollup_service.record_change(db, user_id, None, rollup_service.goal_state(goal))
     return goal
 
 
-async def update_goal(db: AsyncSession, goal: Goal, data: GoalUpdate) -> Goal:
-    update_data = data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(goal, field, value)
-    await db.flush()
-    await db.refresh(goal)
-    return goal
+async def bulk_create_goals(
+    db: AsyncSession, user_id: uuid.UUID, rows: list[GoalCreate]
+) -> list[Goal]:
+    # ORM bulk insert: batched multi-row INSERT ... RETURNING, no per-row refresh
+    result = await db.execute(
+        insert(Goal).returning(Goal),
+        [{"user_id": user_id, **with_legacy_deadline(row.model_dump())} for row in rows],
+    )
+    goals = list(result.scalars().all())
+    await rollup_service.record_changes(db, user_id, [(None, rollup_service.goal_state(g)) for g in goals])
+    return goals
+
+
+async def stream_goals(db: AsyncSession, user_id: uuid.UUID) -> AsyncIterator[Goal]:
+    """Yield every goal for the user from a server-side cursor."""
+    stmt = (
+        select(Goal)
+        .where(Goal.user_id == user_id)
+        .order_by(Goal.created_at.desc(), Goal.id.desc())
+        .execution_options(yield_per=500)
+    )
+    result = await db.stream_scalars(stmt)
+    async for goal in result:
+        yield goal
+
 
+async def _record_contributions(db: AsyncSession, changes: list[tuple[uuid.UUID, Decimal, Decimal]]) -> None:
+    """Append a ledger row for each (goal_id, old saved, new saved) that changed."""
+    rows = [{"goal_id": goal_id, "amount": new - old} for goal_id, old, new in changes if new != old]
+    if rows:
+        await db.execute(insert(GoalContribution), rows)
 
-async def update_goal_saved(db: AsyncSession, goal: Goal, amount: float) -> Goal:
-    goal.saved = min(amount, float(goal.target))
-    await db.flush()
-    await db.refresh(goal)
+
+async def _update_owned(
+    db: AsyncSession, goal_id: uuid.UUID, user_id: uuid.UUID, values: dict
+) -> Optional[Goal]:
+    """UPDATE the user's goal in one statement, apply the rollup delta and
+    record any change to saved in the contribution ledger.
+
+    Ownership is part of the WHERE clause, and the locked pre-update row is
+    joined in so RETURNING yields both the old and new state. Returns None if
+    the goal doesn't exist or belongs to someone else.
+    """
+    old = (
+        select(Goal.id, Goal.category, Goal.saved, Goal.target)
+        .where(Goal.id == goal_id, Goal.user_id == user_id)
+        .with_for_update()
+        .subquery("old")
+    )
+    stmt = (
+        update(Goal)
+        .where(Goal.id == old.c.id)
+        .values(**values)
+        .returning(Goal, old.c.category, old.c.saved, old.c.target)
+        # populate_existing: a Goal already in the session gets the new values
+        # rather than keeping its stale ones (which would hide the change)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        return None
+    goal, *before = row
+    await rollup_service.record_change(
+        db, user_id, (before[0], before[1], before[2]), rollup_service.goal_state(goal)
+    )
+    await _record_contributions(db, [(goal.id, before[1], goal.saved)])
     return goal
 
 
-async def delete_goal(db: AsyncSession, goal: Goal) -> None:
-    await db.delete(goal)
-    await db.flush()
+async def update_goal(
+    db: AsyncSession, goal_id: uuid.UUID, user_id: uuid.UUID, data: GoalUpdate
+) -> Optional[Goal]:
+    update_data = data.model_dump(exclude_unset=True)
+    if not update_data:
+        return await get_goal(db, goal_id, user_id)
+    return await _update_owned(db, goal_id, user_id, with_legacy_deadline(update_data))
 
 
-async def get_summary(db: AsyncSession, user_id: uuid.UUID) -> GoalSummary:
-    all_goals = await get_goals(db, user_id, limit=1000)
+async def update_goal_saved(
+    db: AsyncSession, goal_id: uuid.UUID, user_id: uuid.UUID, amount: float
+) -> Optional[Goal]:
+    return await _update_owned(db, goal_id, user_id, {"saved": func.least(cast(amount, Goal.saved.type), Goal.target)})
+
+
+async def add_contributions(
+    db: AsyncSession, user_id: uuid.UUID, deltas: dict[uuid.UUID, Decimal]
+) -> list[Goal]:
+    """Atomically add `deltas` to the saved amounts of the user's goals.
+
+    A single UPDATE applies saved = LEAST(saved + delta, target) to every goal,
+    so concurrent contributions can't overwrite each other. Goals the user
+    doesn't own are silently skipped; compare the result with `deltas`.
+    """
+    v = values(
+        column("id", Goal.id.type), column("delta", Goal.saved.type), name="v"
+    ).data(list(deltas.items()))
+    old = (
+        select(Goal.id, Goal.category, Goal.saved, Goal.target, v.c.delta)
+        .join(v, Goal.id == v.c.id)
+        .where(Goal.user_id == user_id)
+        .order_by(Goal.id)  # consistent lock order across concurrent batches
+        .with_for_update(of=Goal)
+        .subquery("old")
+    )
+    stmt = (
+        update(Goal)
+        .where(Goal.id == old.c.id)
+        .values(saved=func.least(Goal.saved + old.c.delta, Goal.target))
+        .returning(Goal, old.c.category, old.c.saved, old.c.target)
+        # As in _update_owned: refresh goals already in the session
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    rows = (await db.execute(stmt)).all()
+    await rollup_service.record_changes(
+        db,
+        user_id,
+        [((cat, saved, target), rollup_service.goal_state(goal)) for goal, cat, saved, target in rows],
+    )
+    await _record_contributions(db, [(goal.id, saved, goal.saved) for goal, _, saved, _ in rows])
+    return [row[0] for row in rows]
+
+
+async def delete_goal(db: AsyncSession, goal_id: uuid.UUID, user_id: uuid.UUID) -> bool:
+    stmt = (
+        delete(Goal)
+        .where(Goal.id == goal_id, Goal.user_id == user_id)
+        .returning(Goal.category, Goal.saved, Goal.target)
+    )
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        return False
+    await rollup_service.record_change(db, user_id, tuple(row), None)
+    return True
+
 
-    total_saved = sum(float(g.saved) for g in all_goals)
-    total_target = sum(float(g.target) for g in all_goals)
-    goals_achieved = sum(1 for g in all_goals if float(g.saved) >= float(g.target))
-    overall_progress = round((total_saved / total_target * 100) if total_target > 0 else 0, 1)
+def parse_legacy_deadline(value: Optional[str]) -> Optional[date]:
+    """A string deadline as migration 0006 parses it: an ISO date or timestamp, else None."""
+    value = (value or "").strip()
+    for parse in (date.fromisoformat, lambda v: datetime.fromisoformat(v).date()):
+        try:
+            return parse(value)
+        except ValueError:
+            pass
+    return None
+
+
+async def reconcile_legacy_deadlines(db: AsyncSession) -> set[uuid.UUID]:
+    """Bring deadline_date in line with string deadlines the previous release wrote.
+
+    While a deploy rolls out, the previous release still sets only the string
+    column. Run once the new release serves all traffic (post-deploy).
+    Returns the users whose goals changed; their caches need invalidating.
+    """
+    rows = (await db.execute(
+        select(Goal.id, Goal.user_id, Goal.legacy_deadline, Goal.deadline).where(
+            Goal.legacy_deadline.is_distinct_from(func.to_char(Goal.deadline, "YYYY-MM-DD"))
+        )
+    )).all()
+    changes = [
+        {"id": row.id, "deadline": parsed}
+        for row in rows
+        if (parsed := parse_legacy_deadline(row.legacy_deadline)) != row.deadline
+    ]
+    if changes:
+        await db.execute(update(Goal), changes)
+    changed = {change["id"] for change in changes}
+    return {row.user_id for row in rows if row.id in changed}
+
+
+def _progress(saved: float, target: float) -> float:
+    return round((saved / target * 100) if target > 0 else 0, 1)
+
+
+async def get_summary(db: AsyncSession, user_id: uuid.UUID) -> GoalSummary:
+    # Reads the goal_rollups rows maintained by the write paths above:
+    # at most one primary-key row per category, independent of goal count.
+    rollups = {r.category: r for r in await rollup_service.get_rollups(db, user_id)}
 
     by_category = []
     for cat in GoalCategory:
-        cat_goals = [g for g in all_goals if g.category == cat]
-        cat_saved = sum(float(g.saved) for g in cat_goals)
-        cat_target = sum(float(g.target) for g in cat_goals)
-        by_category.append({
-            "category": cat.value,
-            "total_saved": cat_saved,
-            "total_target": cat_target,
-            "progress": round((cat_saved / cat_target * 100) if cat_target > 0 else 0, 1),
-            "count": len(cat_goals),
-            "achieved": sum(1 for g in cat_goals if float(g.saved) >= float(g.target)),
-        })
+        rollup = rollups.get(cat)
+        cat_saved = float(rollup.total_saved) if rollup else 0.0
+        cat_target = float(rollup.total_target) if rollup else 0.0
+        by_category.append(CategorySummary(
+            category=cat,
+            total_saved=cat_saved,
+            total_target=cat_target,
+            progress=_progress(cat_saved, cat_target),
+            count=rollup.count if rollup else 0,
+            achieved=rollup.achieved if rollup else 0,
+        ))
+
+    total_saved = sum(c.total_saved for c in by_category)
+    total_target = sum(c.total_target for c in by_category)
 
     return GoalSummary(
         total_saved=total_saved,
         total_target=total_target,
-        overall_progress=overall_progress,
-        goals_achieved=goals_achieved,
-        total_goals=len(all_goals),
+        overall_progress=_progress(total_saved, total_target),
+        goals_achieved=sum(c.achieved for c in by_category),
+        total_goals=sum(c.count for c in by_category),
         by_category=by_category,
     )
@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from redis.asyncio import Redis
+
+from app import redis_client
+from app.config import settings
+
+IDEMPOTENCY_PREFIX = "idem:"
+_PENDING = "__pending__"
+
+# Extend the claim only while it is still this request's pending marker, so a
+# late refresh can never shorten the TTL of a stored response.
+_EXTEND_CLAIM_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class RequestInProgress(Exception):
+    """A request with the same idempotency key is still being processed."""
+
+
+class KeyReused(Exception):
+    """The idempotency key was already used with a different request body."""
+
+
+def _key(scope: str, user_id: uuid.UUID, idempotency_key: str) -> str:
+    return f"{IDEMPOTENCY_PREFIX}{scope}:{user_id}:{idempotency_key}"
+
+
+def fingerprint(payload: str) -> str:
+    """Hash of a request body, stored with its key to catch a reused key."""
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def begin(
+    redis: Redis, scope: str, user_id: uuid.UUID, idempotency_key: str, payload_hash: str
+) -> Optional[str]:
+    """Claim the key, or return the stored response body of the earlier request.
+
+    Returns None when the caller should process the request, holding the claim
+    with held() until it completes or releases it. Redis errors also return
+    None: without Redis we process the request rather than fail it.
+    """
+    key = _key(scope, user_id, idempotency_key)
+    try:
+        if await redis_client.call(redis.set(
+            key, f"{payload_hash}:{_PENDING}", nx=True, ex=settings.IDEMPOTENCY_PENDING_TTL_SECONDS
+        )):
+            return None
+        stored = await redis_client.call(redis.get(key))
+    except Exception:
+        return None
+    if stored is None:
+        return None
+    stored_hash, _, body = stored.partition(":")
+    if stored_hash != payload_hash:
+        raise KeyReused()
+    if body == _PENDING:
+        raise RequestInProgress()
+    return body
+
+
+async def _keep_claim(redis: Redis, key: str, payload_hash: str) -> None:
+    while True:
+        await asyncio.sleep(settings.IDEMPOTENCY_PENDING_TTL_SECONDS / 3)
+        try:
+            await redis_client.call(redis_client.run_script(
+                redis, _EXTEND_CLAIM_LUA, key, f"{payload_hash}:{_PENDING}", settings.IDEMPOTENCY_PENDING_TTL_SECONDS
+            ))
+        except Exception:
+            pass
+
+
+@asynccontextmanager
+async def held(
+    redis: Redis, scope: str, user_id: uuid.UUID, idempotency_key: Optional[str], payload_hash: str
+) -> AsyncIterator[None]:
+    """Keep a claim from begin() alive for as long as the block runs.
+
+    The claim is refreshed every third of IDEMPOTENCY_PENDING_TTL_SECONDS, so
+    a slow request keeps it while one whose process dies loses it within that
+    TTL. Does nothing without an idempotency key.
+    """
+    if not idempotency_key:
+        yield
+        return
+    task = asyncio.create_task(_keep_claim(redis, _key(scope, user_id, idempotency_key), payload_hash))
+    try:
+        yield
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def complete(
+    redis: Redis, scope: str, user_id: uuid.UUID, idempotency_key: str, payload_hash: str, body: str
+) -> None:
+    """Store the response body for replay, for IDEMPOTENCY_TTL_SECONDS."""
+    try:
+        await redis_client.call(redis.set(
+            _key(scope, user_id, idempotency_key), f"{payload_hash}:{body}", ex=settings.IDEMPOTENCY_TTL_SECONDS
+        ))
+    except Exception:
+        pass
+
+
+async def release(redis: Redis, scope: str, user_id: uuid.UUID, idempotency_key: str) -> None:
+    """Drop a claimed key after a failed request so the client can retry it."""
+    try:
+        await redis_client.call(redis.delete(_key(scope, user_id, idempotency_key)))
+    except Exception:
+        pass
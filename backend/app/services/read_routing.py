@@ -0,0 +1,52 @@
+"""Replica routing for read-only requests, with read-your-writes.
+
+Read handlers take a session from get_read_db. It stays on the primary
+unless the request routes it to a healthy replica (app.database.use_replica).
+Routing applies to the session's following queries, so a later decision in
+the same request overrides an earlier one. Routing is skipped for a user who wrote in the last
+READ_YOUR_WRITES_SECONDS. Writers call pin() before they commit, so any
+reader that can observe the write also sees the pin.
+
+Goal reads route in cache_service.generation(), which reads the pin and the
+cache generation in one MGET, so a new generation (and the ETag built from
+it) is never paired with a replica read from before the write. Principal
+lookups route in user_cache on a cache miss.
+"""
+import uuid
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database, redis_client
+from app.config import settings
+
+PIN_PREFIX = "db:primary:"
+
+
+def enabled() -> bool:
+    return bool(database.replicas)
+
+
+def pin_key(user_id: uuid.UUID) -> str:
+    return f"{PIN_PREFIX}{user_id}"
+
+
+async def pin(redis: Redis, user_id: uuid.UUID) -> None:
+    """Send the user's reads to the primary for READ_YOUR_WRITES_SECONDS."""
+    if not enabled():
+        return
+    try:
+        await redis_client.call(redis.set(pin_key(user_id), 1, px=int(settings.READ_YOUR_WRITES_SECONDS * 1000)))
+    except Exception:
+        pass  # Redis unavailable — readers can't see the pin either, so they stay on the primary
+
+
+async def route(db: AsyncSession, redis: Redis, user_id: uuid.UUID) -> None:
+    """Move `db` to a replica unless the user is pinned or Redis can't say."""
+    if not enabled() or not db.info.get("read_only"):
+        return
+    try:
+        pinned = await redis_client.call(redis.exists(pin_key(user_id)))
+    except Exception:
+        pinned = True
+    database.use_replica(db, not pinned)
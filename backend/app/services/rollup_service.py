@@ -0,0 +1,140 @@
+import uuid
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.goal import Goal, GoalCategory
+from app.models.goal_rollup import GoalRollup
+
+# (category, saved, target) of a goal as stored, or None for "no goal".
+GoalState = Optional[tuple[GoalCategory, Decimal, Decimal]]
+
+
+def goal_state(goal: Goal) -> tuple[GoalCategory, Decimal, Decimal]:
+    return goal.category, Decimal(goal.saved), Decimal(goal.target)
+
+
+async def _apply(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    category: GoalCategory,
+    saved: Decimal,
+    target: Decimal,
+    count: int,
+    achieved: int,
+) -> None:
+    stmt = insert(GoalRollup).values(
+        user_id=user_id,
+        category=category,
+        total_saved=saved,
+        total_target=target,
+        count=count,
+        achieved=achieved,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GoalRollup.user_id, GoalRollup.category],
+        set_={
+            "total_saved": GoalRollup.total_saved + stmt.excluded.total_saved,
+            "total_target": GoalRollup.total_target + stmt.excluded.total_target,
+            "count": GoalRollup.count + stmt.excluded.count,
+            "achieved": GoalRollup.achieved + stmt.excluded.achieved,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def record_changes(
+    db: AsyncSession, user_id: uuid.UUID, changes: list[tuple[GoalState, GoalState]]
+) -> None:
+    """Apply the rollup deltas for goals moving from `before` to `after`.
+
+    Deltas are summed per category first, so any number of changed goals
+    costs at most one upsert per category. Runs inside the caller's
+    transaction, so the rollup commits or rolls back with the goal writes.
+    """
+    totals: dict[GoalCategory, list] = {}
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            cat, saved, target = state
+            t = totals.setdefault(cat, [Decimal(0), Decimal(0), 0, 0])
+            t[0] += sign * saved
+            t[1] += sign * target
+            t[2] += sign
+            t[3] += sign * int(saved >= target)
+    # Always lock the rollup rows in the same order, so two transactions
+    # touching the same categories can't deadlock
+    for cat in sorted(totals):
+        saved, target, count, achieved = totals[cat]
+        if saved or target or count or achieved:
+            await _apply(db, user_id, cat, saved, target, count, achieved)
+
+
+async def record_change(
+    db: AsyncSession, user_id: uuid.UUID, before: GoalState, after: GoalState
+) -> None:
+    await record_changes(db, user_id, [(before, after)])
+
+
+async def get_rollups(db: AsyncSession, user_id: uuid.UUID) -> list[GoalRollup]:
+    result = await db.execute(select(GoalRollup).where(GoalRollup.user_id == user_id))
+    return list(result.scalars().all())
+
+
+def _recomputed():
+    return (
+        select(
+            Goal.user_id,
+            Goal.category,
+            func.sum(Goal.saved).label("total_saved"),
+            func.sum(Goal.target).label("total_target"),
+            func.count().label("count"),
+            func.count().filter(Goal.saved >= Goal.target).label("achieved"),
+        )
+        .group_by(Goal.user_id, Goal.category)
+        .subquery()
+    )
+
+
+async def find_drift(db: AsyncSession) -> list[dict]:
+    """Recompute totals from `goals` and return every rollup row that disagrees."""
+    actual = _recomputed()
+    stored = GoalRollup.__table__
+    columns = ("total_saved", "total_target", "count", "achieved")
+    joined = stored.join(
+        actual,
+        (stored.c.user_id == actual.c.user_id) & (stored.c.category == actual.c.category),
+        full=True,
+    )
+    stmt = select(
+        func.coalesce(stored.c.user_id, actual.c.user_id).label("user_id"),
+        func.coalesce(stored.c.category, actual.c.category).label("category"),
+        *(func.coalesce(stored.c[c], 0).label(f"stored_{c}") for c in columns),
+        *(func.coalesce(actual.c[c], 0).label(f"actual_{c}") for c in columns),
+    ).select_from(joined)
+    drift = or_(*(func.coalesce(stored.c[c], 0) != func.coalesce(actual.c[c], 0) for c in columns))
+    result = await db.execute(stmt.where(drift))
+    return [dict(row._mapping) for row in result]
+
+
+async def rebuild(db: AsyncSession, user_id: Optional[uuid.UUID] = None) -> None:
+    """Replace stored rollups with totals recomputed from `goals`."""
+    clear = delete(GoalRollup)
+    if user_id is not None:
+        clear = clear.where(GoalRollup.user_id == user_id)
+    await db.execute(clear)
+
+    actual = _recomputed()
+    source = select(actual)
+    if user_id is not None:
+        source = source.where(actual.c.user_id == user_id)
+    await db.execute(
+        insert(GoalRollup).from_select(
+            ["user_id", "category", "total_saved", "total_target", "count", "achieved"],
+            source,
+        )
+    )
@@ -0,0 +1,96 @@
+"""Login sessions: refresh-token families in Redis, session versions in Postgres.
+
+Each login starts a family, and every token carries its family id ("fam")
+and the user's session version ("sv"). One Redis hash per live family
+holds the current refresh token's jti. Refreshing rotates it, and a
+rotated-out token presented again revokes the whole family. Logging out
+deletes the family. Bumping users.session_version revokes every session
+at once. The check against the token runs on the principal that
+get_current_user already loads, so it needs no extra read.
+
+A missing family means revoked. If Redis evicts or loses a key, that
+session is logged out; a token is never silently un-revoked.
+"""
+import enum
+import time
+import uuid
+
+from redis.asyncio import Redis
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import redis_client
+from app.config import settings
+from app.models.user import User
+from app.services import read_routing, user_cache
+
+FAMILY_PREFIX = "auth:family:"
+
+# KEYS[1] family; ARGV: presented jti, new jti, ttl, now, grace
+_ROTATE_LUA = """
+local state = redis.call('HMGET', KEYS[1], 'cur', 'prev', 'at')
+if not state[1] then
+    return 0
+end
+if state[1] == ARGV[1] then
+    redis.call('HSET', KEYS[1], 'cur', ARGV[2], 'prev', ARGV[1], 'at', ARGV[4])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return 1
+end
+if state[2] == ARGV[1] and tonumber(ARGV[4]) - tonumber(state[3]) <= tonumber(ARGV[5]) then
+    return 2
+end
+redis.call('DEL', KEYS[1])
+return -1
+"""
+
+
+class Rotation(enum.IntEnum):
+    ROTATED = 1
+    SUPERSEDED = 2  # lost a race with a concurrent refresh of the same token
+    REVOKED = 0  # logged out, expired or evicted
+    REUSED = -1  # an old token came back: the family is now revoked
+
+
+def _ttl() -> int:
+    return settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+
+
+def new_family() -> str:
+    return uuid.uuid4().hex
+
+
+async def start(redis: Redis, family: str, refresh_jti: str) -> None:
+    pipe = redis.pipeline(transaction=True)
+    pipe.hset(f"{FAMILY_PREFIX}{family}", mapping={"cur": refresh_jti})
+    pipe.expire(f"{FAMILY_PREFIX}{family}", _ttl())
+    await redis_client.call(pipe.execute())
+
+
+async def rotate(redis: Redis, family: str, presented_jti: str, new_jti: str) -> Rotation:
+    result = await redis_client.call(redis_client.run_script(
+        redis, _ROTATE_LUA, f"{FAMILY_PREFIX}{family}",
+        presented_jti, new_jti, _ttl(), int(time.time()), settings.REFRESH_REUSE_GRACE_SECONDS,
+    ))
+    return Rotation(result)
+
+
+async def is_active(redis: Redis, family: str) -> bool:
+    return bool(await redis_client.call(redis.exists(f"{FAMILY_PREFIX}{family}")))
+
+
+async def revoke(redis: Redis, family: str) -> None:
+    await redis_client.call(redis.delete(f"{FAMILY_PREFIX}{family}"))
+
+
+async def revoke_all(db: AsyncSession, redis: Redis, user_id: uuid.UUID) -> None:
+    """Invalidate every token issued to the user so far.
+
+    Commits, then drops the cached principal on every worker.
+    """
+    await db.execute(
+        update(User).where(User.id == user_id).values(session_version=User.session_version + 1)
+    )
+    await read_routing.pin(redis, user_id)
+    await db.commit()
+    await user_cache.invalidate(user_id, redis)
@@ -0,0 +1,112 @@
+"""JWT encode/decode backends, chosen by settings.JWT_BACKEND.
+
+Both produce standard compact JWS tokens, so the backend can be switched
+without logging anyone out. decode() raises ValueError for any bad token.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+from calendar import timegm
+from datetime import datetime
+from typing import Protocol
+
+
+class TokenCodec(Protocol):
+    def encode(self, claims: dict) -> str: ...
+
+    def decode(self, token: str) -> dict: ...
+
+
+class JoseCodec:
+    """python-jose: any algorithm it supports, full claim validation."""
+
+    def __init__(self, key: str, algorithm: str):
+        self.key, self.algorithm = key, algorithm
+
+    def encode(self, claims: dict) -> str:
+        from jose import jwt
+
+        return jwt.encode(claims, self.key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        from jose import JWTError, jwt
+
+        try:
+            return jwt.decode(token, self.key, algorithms=[self.algorithm])
+        except JWTError as e:
+            raise ValueError(f"Invalid token: {e}")
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+class HmacCodec:
+    """Stdlib HS256/HS384/HS512, validating `exp` and `nbf` only.
+
+    That is all our own tokens carry; skipping jose's generic key and claim
+    handling makes a verify several times cheaper.
+    """
+
+    _digests = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+    def __init__(self, key: str, algorithm: str):
+        if algorithm not in self._digests:
+            raise ValueError(f"hmac JWT backend does not support {algorithm}")
+        self.key, self.algorithm = key.encode(), algorithm
+        self.digest = self._digests[algorithm]
+        self.header = _b64encode(json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":")).encode())
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        return hmac.new(self.key, signing_input, self.digest).digest()
+
+    def encode(self, claims: dict) -> str:
+        claims = {
+            k: timegm(v.utctimetuple()) if isinstance(v, datetime) and k in ("exp", "iat", "nbf") else v
+            for k, v in claims.items()
+        }
+        signing_input = self.header + b"." + _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        return (signing_input + b"." + _b64encode(self._sign(signing_input))).decode()
+
+    def decode(self, token: str) -> dict:
+        try:
+            signing_input, signature = token.encode("ascii").rsplit(b".", 1)
+            header, payload = signing_input.split(b".")
+            if json.loads(_b64decode(header)).get("alg") != self.algorithm:
+                raise ValueError("unexpected algorithm")
+            if not hmac.compare_digest(_b64decode(signature), self._sign(signing_input)):
+                raise ValueError("Signature verification failed")
+            claims = json.loads(_b64decode(payload))
+            if not isinstance(claims, dict):
+                raise ValueError("payload is not an object")
+        except (ValueError, UnicodeError, AttributeError, TypeError) as e:
+            raise ValueError(f"Invalid token: {e}")
+
+        now = time.time()
+        if "exp" in claims:
+            if not isinstance(claims["exp"], (int, float)):
+                raise ValueError("Invalid token: exp must be a number")
+            if claims["exp"] <= now:
+                raise ValueError("Invalid token: Signature has expired.")
+        if "nbf" in claims:
+            if not isinstance(claims["nbf"], (int, float)):
+                raise ValueError("Invalid token: nbf must be a number")
+            if claims["nbf"] > now:
+                raise ValueError("Invalid token: The token is not yet valid (nbf)")
+        return claims
+
+
+BACKENDS: dict[str, type] = {"jose": JoseCodec, "hmac": HmacCodec}
+
+
+def create(backend: str, key: str, algorithm: str) -> TokenCodec:
+    try:
+        return BACKENDS[backend](key, algorithm)
+    except KeyError:
+        raise ValueError(f"Unknown JWT backend {backend!r}; expected one of {', '.join(BACKENDS)}")
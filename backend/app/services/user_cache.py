@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import redis_client
+from app.config import settings
+from app.models.user import User
+from app.schemas.auth import CurrentUser
+from app.services import read_routing
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_PREFIX = "user:principal:"
+# invalidate() publishes the user id here; every worker drops its local copy
+INVALIDATE_CHANNEL = "user:principal:invalidated"
+
+# user_id -> (expires_at, principal), least recently used first
+_local: "OrderedDict[uuid.UUID, tuple[float, CurrentUser]]" = OrderedDict()
+# Set while this worker is subscribed to INVALIDATE_CHANNEL. The local LRU is
+# only trusted then: without the subscription it could miss an invalidation.
+_listening = False
+_listener: Optional[asyncio.Task] = None
+
+
+def _remember(principal: CurrentUser) -> None:
+    _local[principal.id] = (time.monotonic() + settings.USER_CACHE_TTL_SECONDS, principal)
+    _local.move_to_end(principal.id)
+    while len(_local) > settings.USER_CACHE_MAX_ENTRIES:
+        _local.popitem(last=False)
+
+
+async def get_principal(
+    user_id: uuid.UUID, db: AsyncSession, redis: Redis
+) -> Optional[CurrentUser]:
+    """Look the user up in the local LRU, then Redis, then Postgres."""
+    entry = _local.get(user_id) if _listening else None
+    if entry is not None:
+        expires_at, principal = entry
+        if expires_at > time.monotonic():
+            _local.move_to_end(user_id)
+            return principal
+        del _local[user_id]
+
+    key = f"{PRINCIPAL_PREFIX}{user_id}"
+    try:
+        cached = await redis_client.call(redis.get(key))
+        if cached is not None:
+            principal = CurrentUser.model_validate_json(cached)
+            _remember(principal)
+            return principal
+    except Exception:
+        pass  # Redis unavailable — fall through to Postgres
+
+    await read_routing.route(db, redis, user_id)
+    user = await db.get(User, user_id)
+    if not user:
+        return None
+    principal = CurrentUser.model_validate(user)
+    _remember(principal)
+    try:
+        await redis_client.call(redis.setex(key, settings.USER_CACHE_TTL_SECONDS, principal.model_dump_json()))
+    except Exception:
+        pass
+    return principal
+
+
+async def invalidate(user_id: uuid.UUID, redis: Redis) -> None:
+    """Drop a user's cached principal after a write to their row.
+
+    Clears this process and Redis, and tells the other workers to clear
+    theirs. Writers also call read_routing.pin() before committing, so the
+    next lookup doesn't refill from a replica.
+    """
+    _local.pop(user_id, None)
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.delete(f"{PRINCIPAL_PREFIX}{user_id}")
+            pipe.publish(INVALIDATE_CHANNEL, str(user_id))
+            await redis_client.call(pipe.execute())
+    except Exception:
+        pass  # Redis unavailable — listeners have stopped trusting their LRU
+
+
+async def _listen(redis: Redis) -> None:
+    global _listening
+    pubsub = redis.pubsub()
+    try:
+        # Also checked, not just cancelled: get_message() can swallow a
+        # cancellation that lands while it is reading a reply
+        while _listener is asyncio.current_task():
+            try:
+                if not _listening:
+                    await pubsub.subscribe(INVALIDATE_CHANNEL)
+                    _listening = True
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    _local.pop(uuid.UUID(message["data"]), None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if _listening:
+                    logger.warning("principal invalidations lost Redis: %r", e)
+                _listening = False
+                _local.clear()
+                await asyncio.sleep(1.0)
+    finally:
+        _listening = False
+        _local.clear()
+        await pubsub.aclose()
+
+
+def start(redis: Redis) -> None:
+    """Apply other workers' invalidations to the local LRU until close().
+
+    While the subscription is down the LRU is bypassed and emptied, since any
+    invalidation published meanwhile is lost.
+    """
+    global _listener
+    if _listener is None:
+        _listener = asyncio.create_task(_listen(redis))
+
+
+async def close() -> None:
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.cancel()
+        await asyncio.wait({listener}, timeout=2.0)
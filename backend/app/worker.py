@@ -0,0 +1,45 @@
+"""Background job worker.
+
+    python -m app.worker [--concurrency N]
+
+Runs the jobs registered in app.services.goal_jobs until SIGTERM or SIGINT,
+then gives in-flight jobs JOBS_SHUTDOWN_GRACE_SECONDS to finish. Run as many
+as needed; they share the Redis queue.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+
+from app import job_queue, redis_client
+from app.config import settings
+from app.database import engine
+from app.services import goal_jobs  # noqa: F401  (registers the handlers)
+
+
+async def _run(concurrency: int) -> None:
+    redis = redis_client.create_redis()
+    worker = job_queue.Worker(redis, concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stopping.set)
+    try:
+        await worker.run()
+    finally:
+        await redis.aclose()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.worker")
+    parser.add_argument("--concurrency", type=int, default=settings.JOBS_CONCURRENCY)
+    args = parser.parse_args()
+    if settings.JOBS_BROKER != "redis":
+        sys.exit(f"JOBS_BROKER={settings.JOBS_BROKER}: jobs run inside the API process, not here")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_run(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
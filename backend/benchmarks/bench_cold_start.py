@@ -0,0 +1,115 @@
+"""Measure cold-start cost: import time of app.main and time to first request.
+
+    python -m benchmarks.bench_cold_start [--runs 5] [--top 15] \\
+        [--import-budget-ms 2000] [--ttfr-budget-ms 3000]
+
+Each run is a fresh interpreter. Import time comes from `python -X importtime
+-c "import app.main"`; time to first request launches uvicorn and polls
+/api/health until it answers. Exits 1 if a median exceeds its budget or if a
+module that should load lazily (see DEFERRED) is imported at startup, so it
+can gate CI. Startup warm-up tries to reach Postgres and Redis; without them
+it logs a warning and carries on, which is fine for measuring.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported on first use, not at startup. (email_validator would be worth it
+# too, but fastapi.openapi.models imports it unconditionally.)
+DEFERRED = ("jose", "bcrypt", "alembic", "numpy")
+
+
+def import_profile() -> tuple[float, dict[str, int], set[str]]:
+    """Returns (total ms, self us summed per top-level package, modules imported)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    packages: dict[str, int] = {}
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.add(name)
+        if name == "app.main":
+            total_us = int(cumulative)
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + int(self_us)
+    return total_us / 1000, packages, modules
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_request(timeout: float = 30.0) -> float:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/api/health"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as resp:
+                    if resp.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"no response from {url} within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(runs: int, top: int, import_budget_ms: float, ttfr_budget_ms: float) -> int:
+    import_ms, packages, modules = [], {}, set()
+    for _ in range(runs):
+        total, packages, modules = import_profile()
+        import_ms.append(total)
+    ttfr_ms = [time_to_first_request() for _ in range(runs)]
+
+    print("import time by package (self time, last run):")
+    for name, us in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"  {name:<28} {us / 1000:8.1f} ms")
+
+    failed = False
+    eager = sorted(m for m in DEFERRED if m in modules)
+    if eager:
+        print(f"imported at startup but should be deferred: {', '.join(eager)}")
+        failed = True
+    for label, samples, budget in (
+        ("import app.main", import_ms, import_budget_ms),
+        ("time to first request", ttfr_ms, ttfr_budget_ms),
+    ):
+        median = statistics.median(samples)
+        over = median > budget
+        failed |= over
+        print(
+            f"{label:<22} median {median:8.1f} ms  min {min(samples):8.1f} ms  "
+            f"budget {budget:.0f} ms{'  OVER BUDGET' if over else ''}"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--import-budget-ms", type=float, default=2000)
+    parser.add_argument("--ttfr-budget-ms", type=float, default=3000)
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.top, args.import_budget_ms, args.ttfr_budget_ms))
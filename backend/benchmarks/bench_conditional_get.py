@@ -0,0 +1,73 @@
+"""Bytes and latency of unchanged polls, with and without If-None-Match.
+
+Start the API, then run (requires httpx):
+
+    python -m benchmarks.bench_conditional_get --base-url http://localhost:8000 \\
+        [--goals 50] [--polls 200]
+
+Registers a throwaway user with `--goals` goals, then polls the goal list, one
+goal and the summary `--polls` times each: once as a plain GET, once
+revalidating the ETag from the previous response like a browser does.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+PASSWORD = "bench-password"
+
+
+async def poll(client: httpx.AsyncClient, path: str, n: int, conditional: bool) -> tuple[list[float], int, int]:
+    """Returns (latencies ms, bytes received, 304 count)."""
+    latencies, received, not_modified = [], 0, 0
+    etag = (await client.get(path)).headers.get("etag")
+    for _ in range(n):
+        headers = {"If-None-Match": etag} if conditional and etag else {}
+        start = time.perf_counter()
+        resp = await client.get(path, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        # Approximate wire size: status line and headers plus the body
+        received += len(resp.content) + sum(len(k) + len(v) + 4 for k, v in resp.headers.items()) + 15
+        not_modified += resp.status_code == 304
+    return latencies, received, not_modified
+
+
+def fmt(latencies: list[float], received: int, not_modified: int) -> str:
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return (
+        f"median {statistics.median(latencies):6.2f} ms  p99 {p99:6.2f} ms  "
+        f"{received / len(latencies):8.0f} B/poll  304s {not_modified}"
+    )
+
+
+async def main(base_url: str, goals: int, polls: int) -> None:
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        resp = await client.post(
+            "/api/v1/auth/register",
+            json={"email": f"bench-{uuid.uuid4().hex[:12]}@example.com", "display_name": "bench", "password": PASSWORD},
+        )
+        resp.raise_for_status()
+        goal_id = None
+        for i in range(goals):
+            resp = await client.post("/api/v1/goals/", json={"title": f"goal {i}", "target": 1000})
+            resp.raise_for_status()
+            goal_id = resp.json()["id"]
+
+        for path in ("/api/v1/goals/", f"/api/v1/goals/{goal_id}", "/api/v1/goals/summary"):
+            print(path)
+            for conditional in (False, True):
+                label = "If-None-Match" if conditional else "plain GET"
+                print(f"  {label:<14} {fmt(*await poll(client, path, polls, conditional))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--goals", type=int, default=50)
+    parser.add_argument("--polls", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, max(1, args.goals), args.polls))
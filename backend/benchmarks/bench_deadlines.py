@@ -0,0 +1,127 @@
+"""Upcoming-deadline queries: the partial deadline indexes vs loading goals and filtering in Python.
+
+Run against a database migrated to head (uses settings.DATABASE_URL):
+
+    python -m benchmarks.bench_deadlines [--users 200] [--goals 500] [--days 30] [--repeat 10]
+
+Seeds `--users` throwaway users with `--goals` goals each: half without a
+deadline, a quarter of the rest already achieved, deadlines spread over two
+years around today. "per user" fetches one user's goals due within `--days`;
+"all users" walks every goal due within `--days` the way the reminder job
+does. The Python baselines load the candidate goals and filter them
+client-side, as a string deadline forced. Also prints each indexed query's
+plan, which should be an index scan on ix_goals_user_deadline_open /
+ix_goals_deadline_open rather than a sequential scan.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select, text
+
+from app.database import AsyncSessionLocal, engine
+from app.models.goal import Goal, GoalCategory
+from app.models.user import User
+from app.services import goal_service
+
+
+async def seed(users: int, goals: int) -> list[uuid.UUID]:
+    today = date.today()
+    now = datetime.now(timezone.utc)
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User), [
+            {"id": u, "email": f"bench-{u}@example.com", "display_name": "bench", "hashed_password": "x"}
+            for u in user_ids
+        ])
+        for user_id in user_ids:
+            await db.execute(insert(Goal), [
+                {
+                    "id": uuid.uuid4(),
+                    "user_id": user_id,
+                    "title": f"goal {i}",
+                    "target": 1000,
+                    "saved": 1000 if random.random() < 0.25 else 0,
+                    "icon": "🎯",
+                    "color": "blue",
+                    "category": GoalCategory.financial,
+                    "deadline": today + timedelta(days=random.randint(-365, 365)) if i % 2 else None,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in range(goals)
+            ])
+        await db.execute(text("ANALYZE goals"))
+        await db.commit()
+    return user_ids
+
+
+async def median_ms(fn, repeat: int) -> tuple[float, int]:
+    samples, found = [], 0
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            found = await fn(db)
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), found
+
+
+async def main(users: int, goals: int, days: int, repeat: int) -> None:
+    user_ids = await seed(users, goals)
+    today = date.today()
+    until = today + timedelta(days=days)
+    user_id = user_ids[0]
+    try:
+        async def user_indexed(db) -> int:
+            return len(await goal_service.get_upcoming_rows(db, user_id, today, until, limit=goals))
+
+        async def user_python(db) -> int:
+            rows = (await db.execute(
+                select(Goal.id, Goal.deadline, Goal.saved, Goal.target).where(Goal.user_id == user_id)
+            )).all()
+            return sum(1 for r in rows if r.deadline and r.saved < r.target and today <= r.deadline <= until)
+
+        async def all_indexed(db) -> int:
+            return sum([len(b) async for b in goal_service.scan_open_deadlines(db, today, until)])
+
+        async def all_python(db) -> int:
+            stmt = select(Goal.id, Goal.deadline, Goal.saved, Goal.target).execution_options(yield_per=5000)
+            result = await db.stream(stmt)
+            return sum([1 async for r in result if r.deadline and r.saved < r.target and today <= r.deadline <= until])
+
+        print(f"{users * goals:,} goals, due within {days}d")
+        for name, indexed, python in (("per user", user_indexed, user_python), ("all users", all_indexed, all_python)):
+            fast, n = await median_ms(indexed, repeat)
+            slow, m = await median_ms(python, repeat)
+            if n != m:
+                raise SystemExit(f"{name}: indexed found {n}, python found {m}")
+            print(f"  {name:<10} {n:>7,} due  indexed {fast:8.2f} ms  python {slow:8.2f} ms  ({slow / fast:.1f}x)")
+
+        open_deadline = Goal.deadline.isnot(None) & (Goal.saved < Goal.target)
+        due = (Goal.deadline >= today) & (Goal.deadline <= until)
+        async with AsyncSessionLocal() as db:
+            for stmt in (
+                select(Goal.id).where(Goal.user_id == user_id, open_deadline, due),
+                select(Goal.id).where(open_deadline, due).order_by(Goal.deadline, Goal.id).limit(1000),
+            ):
+                compiled = stmt.compile(engine.sync_engine, compile_kwargs={"literal_binds": True})
+                print("  " + "\n  ".join((await db.execute(text(f"EXPLAIN {compiled}"))).scalars()))
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.id.in_(user_ids)))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--goals", type=int, default=500)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.goals, args.days, args.repeat))
@@ -0,0 +1,79 @@
+"""Goal forecasting: one vectorized pass over every goal vs a per-goal loop.
+
+    python -m benchmarks.bench_forecast [--goals 10000] [--contributions 1000] [--repeat 3]
+
+Builds a synthetic ledger (`--contributions` points per goal over the past
+two years, already sorted by goal and time as get_forecast loads it) and
+times forecast_service.fit_rates + project over all goals against fitting
+each goal separately with np.polyfit. Checks that both agree first.
+Database time is not included: get_forecast loads one point per goal and
+day, so a real ledger is usually far smaller than this.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services import forecast_service
+
+
+def make(goals: int, contributions: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    index = np.repeat(np.arange(goals), contributions)
+    days = np.sort(rng.uniform(-730, 0, (goals, contributions)), axis=1).ravel()
+    amounts = rng.exponential(25.0, goals * contributions).round(2)
+    created = np.full(goals, -731.0)
+    saved = np.bincount(index, amounts, minlength=goals) + rng.uniform(0, 500, goals).round(2)
+    target = saved * rng.uniform(0.8, 3.0, goals)
+    deadline = np.where(rng.random(goals) < 0.5, rng.uniform(-30, 1000, goals), np.nan)
+    return index, days, amounts, created, saved, target, deadline
+
+
+def vectorized(index, days, amounts, created, saved, target, deadline) -> np.ndarray:
+    rates, counts = forecast_service.fit_rates(index, days, amounts, created, saved)
+    forecast_service.project(rates, counts, saved, target, deadline)
+    return rates
+
+
+def loop(index, days, amounts, created, saved, target, deadline) -> np.ndarray:
+    goals = len(saved)
+    bounds = np.searchsorted(index, np.arange(goals + 1))
+    rates = np.empty(goals)
+    for g in range(goals):
+        lo, hi = bounds[g], bounds[g + 1]
+        start = saved[g] - amounts[lo:hi].sum()
+        x = np.concatenate(([created[g]], days[lo:hi], [0.0]))
+        y = np.concatenate(([start], start + np.cumsum(amounts[lo:hi]), [saved[g]]))
+        rates[g] = np.polyfit(x, y, 1)[0]
+    forecast_service.project(rates, np.diff(bounds), saved, target, deadline)
+    return rates
+
+
+def best(fn, data, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*data)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(goals: int, contributions: int, repeat: int) -> None:
+    data = make(goals, contributions)
+    if not np.allclose(vectorized(*data), loop(*data), rtol=1e-6):
+        raise SystemExit("vectorized and per-goal rates differ")
+    fast = best(vectorized, data, repeat)
+    slow = best(loop, data, repeat)
+    points = goals * contributions
+    print(f"{goals:,} goals x {contributions:,} contributions ({points:,} points)")
+    print(f"  vectorized {fast * 1000:8.1f} ms  ({points / fast:>13,.0f} points/s)")
+    print(f"  per goal   {slow * 1000:8.1f} ms  ({points / slow:>13,.0f} points/s)  ({slow / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--goals", type=int, default=10_000)
+    parser.add_argument("--contributions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.goals, args.contributions, args.repeat)
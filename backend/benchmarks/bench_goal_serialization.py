@@ -0,0 +1,86 @@
+"""Rows per second serialized by the goal list's old and new response paths.
+
+    python -m benchmarks.bench_goal_serialization [--sizes 200 10000] [--seconds 2]
+
+"orm" is the previous path: ORM Goal objects validated through GoalOut with
+from_attributes, then dumped. "rows" is the current one: GOAL_OUT_COLUMNS
+row tuples dumped through GoalRecord. Both start from already-built objects, so
+the ORM hydration cost that "rows" also avoids is not included. Each size
+first checks that the two bodies are byte-identical.
+"""
+import argparse
+import random
+import time
+import uuid
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from pydantic import TypeAdapter
+
+from app.models.goal import Goal, GoalCategory
+from app.schemas.goal import GoalOut, GoalRecord
+
+GoalRow = namedtuple("GoalRow", list(GoalOut.model_fields))
+
+orm_adapter = TypeAdapter(list[GoalOut])
+rows_adapter = TypeAdapter(list[GoalRecord])
+
+
+def make(n: int) -> tuple[list[Goal], list[GoalRow]]:
+    user_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    goals, rows = [], []
+    for i in range(n):
+        values = {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "title": f"goal {i} — \"quoted\" 🎯",
+            "target": Decimal(random.randint(100, 10**9)) / 100,
+            "saved": Decimal(random.randint(0, 10**7)) / 100,
+            "icon": "🎯",
+            "color": "blue",
+            "category": random.choice(list(GoalCategory)),
+            "description": None if i % 2 else "notes",
+            "deadline": date(2027, 1, 1) if i % 3 else None,
+            "created_at": now - timedelta(seconds=i, microseconds=i % 7),
+            "updated_at": now,
+        }
+        goals.append(Goal(**values))
+        # What get_goal_rows returns: amounts already float8 from Postgres
+        rows.append(GoalRow(**{**values, "target": float(values["target"]), "saved": float(values["saved"])}))
+    return goals, rows
+
+
+def orm_path(goals: list[Goal]) -> bytes:
+    return orm_adapter.dump_json(orm_adapter.validate_python(goals, from_attributes=True))
+
+
+def rows_path(rows: list[GoalRow]) -> bytes:
+    return rows_adapter.dump_json([row._asdict() for row in rows])
+
+
+def rate(fn, arg, n: int, seconds: float) -> float:
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn(arg)
+        calls += 1
+    return n * calls / (time.perf_counter() - start)
+
+
+def main(sizes: list[int], seconds: float) -> None:
+    for n in sizes:
+        goals, rows = make(n)
+        if orm_path(goals) != rows_path(rows):
+            raise SystemExit(f"bodies differ at {n} rows")
+        orm = rate(orm_path, goals, n, seconds)
+        fast = rate(rows_path, rows, n, seconds)
+        print(f"{n:>6} rows  orm {orm:>11,.0f} rows/s  rows {fast:>11,.0f} rows/s  ({fast / orm:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 10_000])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    main(args.sizes, args.seconds)
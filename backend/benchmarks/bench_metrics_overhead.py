@@ -0,0 +1,65 @@
+"""Measure the per-request overhead of MetricsMiddleware and raw metric updates.
+
+    python -m benchmarks.bench_metrics_overhead [--requests 20000]
+
+Drives a minimal FastAPI app in-process (no network, no DB) with and without
+the middleware, so the difference is the instrumentation cost alone.
+"""
+import argparse
+import asyncio
+import time
+import timeit
+
+from fastapi import FastAPI
+
+from app import metrics
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    if instrumented:
+        app.add_middleware(metrics.MetricsMiddleware)
+    return app
+
+
+async def drive(app: FastAPI, n: int) -> float:
+    """Call the ASGI app directly `n` times; returns microseconds per request."""
+    await app.router.startup()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/items/1", "raw_path": b"/items/1", "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main(n: int) -> None:
+    bare = asyncio.run(drive(build_app(False), n))
+    instrumented = asyncio.run(drive(build_app(True), n))
+    print(f"request without middleware: {bare:7.2f} us")
+    print(f"request with middleware:    {instrumented:7.2f} us  (+{instrumented - bare:.2f} us)")
+
+    hist = metrics.Histogram("bench_seconds", "bench", ("route",))
+    per_observe = timeit.timeit(lambda: hist.observe(0.004, "/items/{item_id}"), number=n) / n * 1e6
+    print(f"histogram observe:          {per_observe:7.3f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    main(parser.parse_args().requests)
@@ -0,0 +1,93 @@
+"""Compare OFFSET and keyset (cursor) pagination of the goals list at increasing depth.
+
+Run against a database migrated to head (uses settings.DATABASE_URL):
+
+    python -m benchmarks.bench_pagination [--goals 100000] [--page-size 100] [--repeat 20]
+
+A throwaway user is seeded with `--goals` goals and removed afterwards. For each
+depth the same page is fetched via `skip` and via the cursor of the preceding row.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert
+
+from app.database import AsyncSessionLocal, engine
+from app.models.goal import Goal, GoalCategory
+from app.models.user import User
+from app.services import goal_service
+
+
+async def seed(n: int) -> uuid.UUID:
+    user_id = uuid.uuid4()
+    base = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as db:
+        db.add(User(id=user_id, email=f"bench-{user_id}@example.com", display_name="bench", hashed_password="x"))
+        await db.flush()
+        for start in range(0, n, 5000):
+            await db.execute(insert(Goal), [
+                {
+                    "id": uuid.uuid4(),
+                    "user_id": user_id,
+                    "title": f"goal {i}",
+                    "target": 1000,
+                    "saved": 0,
+                    "icon": "🎯",
+                    "color": "blue",
+                    "category": GoalCategory.financial,
+                    "created_at": base - timedelta(seconds=i),
+                    "updated_at": base,
+                }
+                for i in range(start, min(n, start + 5000))
+            ])
+        await db.commit()
+    return user_id
+
+
+async def median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            await fn(db)
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def main(n: int, page_size: int, repeat: int) -> None:
+    engine.echo = False
+    user_id = await seed(n)
+    try:
+        depths = [d for d in (0, 1_000, 10_000, 50_000, n - page_size) if 0 <= d <= n - page_size]
+        print(f"{'depth':>8}  {'offset':>10}  {'cursor':>10}")
+        for depth in depths:
+            after = None
+            if depth:
+                async with AsyncSessionLocal() as db:
+                    prev = await goal_service.get_goals(db, user_id, skip=depth - 1, limit=1)
+                after = (prev[0].created_at, prev[0].id)
+            offset = await median_ms(
+                lambda db: goal_service.get_goals(db, user_id, skip=depth, limit=page_size), repeat
+            )
+            keyset = await median_ms(
+                lambda db: goal_service.get_goals(db, user_id, limit=page_size, after=after), repeat
+            )
+            print(f"{depth:>8}  {offset:>7.2f} ms  {keyset:>7.2f} ms")
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--goals", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.goals, args.page_size, args.repeat))
@@ -0,0 +1,138 @@
+"""Concurrent read requests through get_db vs get_read_db on the same pool.
+
+Run against a database migrated to head (uses settings.DATABASE_URL and the
+DB_POOL_SIZE / DB_MAX_OVERFLOW pool):
+
+    python -m benchmarks.bench_read_session [--concurrency 200] [--requests 5000] \\
+        [--goals 50] [--work-ms 5] [--ping-idle 10]
+
+Each simulated request does what the goal list does on a principal cache
+miss: it looks up the user, selects the goal page, then spends `--work-ms`
+awaiting elsewhere (serialization, Redis, the response write). "get_db"
+runs it in a transaction that is committed at the end, holding one
+connection throughout. "get_read_db" uses the autocommit ReadSession, which
+holds a connection only while each statement runs. Reports throughput,
+latency, time waiting for the pool, how long connections were held (from
+the db_pool_checkout_seconds histogram) and liveness pings per request.
+With --ping-idle 0 every checkout pings, as pool_pre_ping did.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert
+
+from app import metrics
+from app.config import settings
+from app.database import AsyncSessionLocal, engine, get_db, get_read_db
+from app.models.goal import Goal, GoalCategory
+from app.models.user import User
+from app.services import goal_service
+
+
+async def seed(goals: int) -> uuid.UUID:
+    user_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as db:
+        db.add(User(id=user_id, email=f"bench-{user_id}@example.com", display_name="bench", hashed_password="x"))
+        await db.flush()
+        await db.execute(insert(Goal), [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "title": f"goal {i}",
+                "target": 1000,
+                "saved": 0,
+                "icon": "🎯",
+                "color": "blue",
+                "category": GoalCategory.financial,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(goals)
+        ])
+        await db.commit()
+    return user_id
+
+
+async def request(dependency, user_id: uuid.UUID, work_seconds: float) -> float:
+    start = time.perf_counter()
+    sessions = dependency()
+    db = await anext(sessions)
+    await db.get(User, user_id)
+    await goal_service.get_goal_rows(db, user_id)
+    await asyncio.sleep(work_seconds)
+    await anext(sessions, None)  # runs the dependency's exit (get_db commits here)
+    return time.perf_counter() - start
+
+
+def _histogram(histogram: metrics.Histogram) -> tuple[int, float]:
+    count = total = 0
+    for series in histogram.values.values():
+        count += sum(series[:-1])
+        total += series[-1]
+    return count, total
+
+
+async def run(
+    name: str, dependency, user_id: uuid.UUID, concurrency: int, n: int, work_seconds: float, report: bool = True
+) -> None:
+    metrics.db_pool_wait.values.clear()
+    metrics.db_pool_checkout.values.clear()
+    metrics.db_pool_pings.values.clear()
+    slots = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one() -> None:
+        async with slots:
+            latencies.append(await request(dependency, user_id, work_seconds))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    elapsed = time.perf_counter() - start
+
+    if not report:
+        return
+    latencies.sort()
+    waits, wait_total = _histogram(metrics.db_pool_wait)
+    checkouts, held_total = _histogram(metrics.db_pool_checkout)
+    pings = sum(metrics.db_pool_pings.values.values())
+    print(
+        f"{name:<12} {n / elapsed:>8,.0f} req/s  median {statistics.median(latencies) * 1000:6.1f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:6.1f} ms  "
+        f"pool wait {wait_total / max(1, waits) * 1000:6.2f} ms/checkout  "
+        f"held {held_total / max(1, checkouts) * 1000:6.2f} ms x {checkouts / n:.1f}/req  "
+        f"pings {pings / n:.1f}/req"
+    )
+
+
+async def main(concurrency: int, n: int, goals: int, work_ms: float, ping_idle: float) -> None:
+    settings.DB_PING_IDLE_SECONDS = ping_idle
+    print(
+        f"pool_size={settings.DB_POOL_SIZE} max_overflow={settings.DB_MAX_OVERFLOW} "
+        f"concurrency={concurrency} ping_idle={ping_idle}s"
+    )
+    user_id = await seed(goals)
+    try:
+        for name, dependency in (("get_db", get_db), ("get_read_db", get_read_db)):
+            await run(name, dependency, user_id, concurrency, n // 10, work_ms / 1000, report=False)
+            await run(name, dependency, user_id, concurrency, n, work_ms / 1000)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--goals", type=int, default=50)
+    parser.add_argument("--work-ms", type=float, default=5.0)
+    parser.add_argument("--ping-idle", type=float, default=settings.DB_PING_IDLE_SECONDS)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.requests, args.goals, args.work_ms, args.ping_idle))
@@ -0,0 +1,132 @@
+"""Goal search: the tsvector/trigram GIN indexes vs ILIKE '%q%'.
+
+Run against a database migrated to head (uses settings.DATABASE_URL):
+
+    python -m benchmarks.bench_search [--goals 1000000] [--users 100] [--repeat 50]
+
+Seeds `--goals` goals spread over `--users` throwaway users (10,000 each by
+default, a power user's worth), titles and descriptions drawn from a small
+vocabulary, then searches the first user's goals for a few terms: a common
+word, a rare pair, a typo and a common pair. "search" is
+goal_service.search_goal_rows; "ilike" matches title or description with
+ILIKE '%q%', newest first, with the same page size. Only search finds the
+typo or words apart. Prints median and p95 per query and the plan of the
+first search.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, event, insert, or_, select, text
+
+from app.database import AsyncSessionLocal, engine
+from app.models.goal import Goal
+from app.models.user import User
+from app.services import goal_service
+
+WORDS = [
+    "vacation", "emergency", "fund", "house", "deposit", "car", "wedding", "marathon", "guitar", "laptop",
+    "retirement", "college", "tuition", "kitchen", "renovation", "bicycle", "camera", "japan", "trip", "savings",
+    "course", "certification", "promotion", "gym", "yoga", "diet", "garden", "piano", "books", "charity",
+]
+QUERIES = ["vacation", "piano lessons", "retirment", "emergency fund"]
+RARE = "lessons"
+
+
+async def seed(goals: int, users: int) -> list[uuid.UUID]:
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User), [
+            {"id": u, "email": f"bench-{u}@example.com", "display_name": "bench", "hashed_password": "x"}
+            for u in user_ids
+        ])
+        # Generated server-side: a 1M-row insert from Python would dominate the run
+        await db.execute(
+            text("""
+                INSERT INTO goals (id, user_id, title, target, saved, icon, color, category, description)
+                SELECT gen_random_uuid(), u[1 + i % cardinality(u)],
+                       w[1 + (i * 7) % n] || ' ' || w[1 + (i * 13 / 5) % n]
+                           || CASE WHEN i % 997 = 0 THEN ' ' || CAST(:rare AS text) ELSE '' END,
+                       1000, 0, '🎯', 'blue', 'financial',
+                       CASE WHEN i % 2 = 0 THEN 'saving for ' || w[1 + (i * 31) % n] || ' and ' || w[1 + (i * 17) % n] END
+                FROM (SELECT CAST(:users AS uuid[]) AS u, CAST(:words AS text[]) AS w,
+                             cardinality(CAST(:words AS text[])) AS n) AS v,
+                     generate_series(0, CAST(:goals AS int) - 1) AS i
+            """),
+            {"users": user_ids, "goals": goals, "words": WORDS, "rare": RARE},
+        )
+        await db.commit()
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE goals"))
+        await conn.commit()
+    return user_ids
+
+
+def ilike(user_id: uuid.UUID, q: str, limit: int):
+    pattern = f"%{q}%"
+    return (
+        select(*goal_service.GOAL_OUT_COLUMNS)
+        .where(Goal.user_id == user_id, or_(Goal.title.ilike(pattern), Goal.description.ilike(pattern)))
+        .order_by(Goal.created_at.desc(), Goal.id.desc())
+        .limit(limit)
+    )
+
+
+async def timings(fn, repeat: int) -> tuple[float, float, int]:
+    samples, found = [], 0
+    async with AsyncSessionLocal() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            found = len(await fn(db))
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], found
+
+
+async def main(goals: int, users: int, repeat: int, limit: int) -> None:
+    user_ids = await seed(goals, users)
+    user_id = user_ids[0]
+    try:
+        print(f"{goals:,} goals, {goals // users:,} for the searched user, page size {limit}")
+        for q in QUERIES:
+            async def search(db, q=q):
+                return await goal_service.search_goal_rows(db, user_id, q, limit=limit)
+
+            async def scan(db, q=q):
+                return (await db.execute(ilike(user_id, q, limit))).all()
+
+            fast, fast_p95, n = await timings(search, repeat)
+            slow, slow_p95, m = await timings(scan, repeat)
+            print(
+                f"  {q!r:<18} search {fast:7.2f} ms (p95 {fast_p95:7.2f}) {n:>3} hits   "
+                f"ilike {slow:7.2f} ms (p95 {slow_p95:7.2f}) {m:>3} hits"
+            )
+
+        # The plan of the first query, as search_goal_rows actually sent it
+        sent = []
+        listener = lambda conn, cursor, statement, params, context, many: sent.append((statement, params))
+        event.listen(engine.sync_engine, "before_cursor_execute", listener)
+        async with AsyncSessionLocal() as db:
+            await goal_service.search_goal_rows(db, user_id, QUERIES[0], limit=limit)
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+        async with engine.connect() as conn:
+            statement, params = sent[-1]
+            plan = await conn.exec_driver_sql(f"EXPLAIN ANALYZE {statement}", params)
+            print("  " + "\n  ".join(row[0] for row in plan))
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.id.in_(user_ids)))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--goals", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.goals, args.users, args.repeat, args.limit))
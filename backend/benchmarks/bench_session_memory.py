@@ -0,0 +1,92 @@
+"""Redis memory held by token revocation: per-JTI blacklist vs session families.
+
+    python -m benchmarks.bench_session_memory --redis-url redis://localhost:6379/15 \\
+        [--sessions 10000] [--refreshes 20] [--logouts 500]
+
+Writes the keys each scheme holds at steady state under a `bench:` prefix,
+measures them with MEMORY USAGE and deletes them again. Use a scratch
+database. Parameters are per refresh-token lifetime:
+
+- `--sessions`: live logins.
+- `--refreshes`: rotations per session.
+- `--logouts`: logouts within one access-token lifetime.
+
+Schemes:
+
+- "blacklist": the old scheme. One key per logged-out access token. Refresh
+  tokens are never revoked.
+- "blacklist+rotation": what reuse detection would cost with per-JTI keys.
+  Every rotated-out refresh token stays listed until it expires.
+- "families": app.services.session_store, one small hash per live session.
+"""
+import argparse
+import asyncio
+import uuid
+
+from redis.asyncio import Redis
+
+from app.services import session_store
+
+PREFIX = "bench:"
+TTL = 7 * 24 * 60 * 60
+
+
+def jti() -> str:
+    return str(uuid.uuid4())
+
+
+async def measure(redis: Redis, name: str, writes) -> None:
+    keys = []
+    pipe = redis.pipeline(transaction=False)
+    for key, kind, value in writes:
+        key = f"{PREFIX}{name}:{key}"
+        keys.append(key)
+        if kind == "string":
+            pipe.set(key, value, ex=TTL)
+        else:
+            pipe.hset(key, mapping=value)
+            pipe.expire(key, TTL)
+        if len(pipe) >= 5000:
+            await pipe.execute()
+    await pipe.execute()
+
+    total = 0
+    for i in range(0, len(keys), 5000):
+        pipe = redis.pipeline(transaction=False)
+        for key in keys[i:i + 5000]:
+            pipe.memory_usage(key, samples=0)
+        total += sum(await pipe.execute())
+        await redis.delete(*keys[i:i + 5000])
+    per_key = total / len(keys) if keys else 0
+    print(f"{name:<20} {len(keys):>10,} keys {total / 1024 / 1024:>10.2f} MiB  ({per_key:.0f} B/key)")
+
+
+async def main(url: str, sessions: int, refreshes: int, logouts: int) -> None:
+    redis = Redis.from_url(url, decode_responses=True)
+    try:
+        await measure(redis, "blacklist", (
+            (f"blacklist:jti:{jti()}", "string", "1") for _ in range(logouts)
+        ))
+        await measure(redis, "blacklist+rotation", (
+            (f"blacklist:jti:{jti()}", "string", "1") for _ in range(sessions * refreshes + 2 * logouts)
+        ))
+        await measure(redis, "families", (
+            (
+                f"{session_store.FAMILY_PREFIX}{session_store.new_family()}",
+                "hash",
+                {"cur": jti(), "prev": jti(), "at": "1760000000"},
+            )
+            for _ in range(sessions)
+        ))
+    finally:
+        await redis.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--refreshes", type=int, default=20)
+    parser.add_argument("--logouts", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.redis_url, args.sessions, args.refreshes, args.logouts))
@@ -0,0 +1,116 @@
+"""Compare the legacy Python summary aggregation with the current summary path.
+
+Run against a migrated database (uses settings.DATABASE_URL):
+
+    python -m benchmarks.bench_summary [--sizes 10,1000,100000] [--repeat 20]
+
+A throwaway user is created for each size and removed afterwards.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, insert
+
+from app.database import AsyncSessionLocal, engine
+from app.models.goal import Goal, GoalCategory
+from app.models.user import User
+from app.services import goal_service, rollup_service
+
+
+async def legacy_summary(db, user_id: uuid.UUID) -> dict:
+    """The pre-aggregation implementation: hydrate up to 1000 goals, scan in Python."""
+    all_goals = await goal_service.get_goals(db, user_id, limit=1000)
+    by_category = []
+    for cat in GoalCategory:
+        cat_goals = [g for g in all_goals if g.category == cat]
+        by_category.append({
+            "category": cat.value,
+            "total_saved": sum(float(g.saved) for g in cat_goals),
+            "total_target": sum(float(g.target) for g in cat_goals),
+            "count": len(cat_goals),
+            "achieved": sum(1 for g in cat_goals if float(g.saved) >= float(g.target)),
+        })
+    return {
+        "total_saved": sum(float(g.saved) for g in all_goals),
+        "total_target": sum(float(g.target) for g in all_goals),
+        "total_goals": len(all_goals),
+        "by_category": by_category,
+    }
+
+
+async def seed(n: int) -> uuid.UUID:
+    user_id = uuid.uuid4()
+    categories = list(GoalCategory)
+    async with AsyncSessionLocal() as db:
+        db.add(User(
+            id=user_id,
+            email=f"bench-{user_id}@example.com",
+            display_name="bench",
+            hashed_password="x",
+        ))
+        await db.flush()
+        for start in range(0, n, 5000):
+            rows = []
+            for i in range(start, min(n, start + 5000)):
+                target = random.randint(100, 10000)
+                rows.append({
+                    "id": uuid.uuid4(),
+                    "user_id": user_id,
+                    "title": f"goal {i}",
+                    "target": target,
+                    "saved": random.randint(0, target),
+                    "icon": "🎯",
+                    "color": "blue",
+                    "category": categories[i % len(categories)],
+                })
+            await db.execute(insert(Goal), rows)
+        await rollup_service.rebuild(db, user_id)
+        await db.commit()
+    return user_id
+
+
+async def timed(fn, user_id: uuid.UUID, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            await fn(db, user_id)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def fmt(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"median {statistics.median(samples):8.2f} ms  p99 {p99:8.2f} ms"
+
+
+async def main(sizes: list[int], repeat: int) -> None:
+    engine.echo = False
+    for n in sizes:
+        user_id = await seed(n)
+        try:
+            legacy = await timed(legacy_summary, user_id, repeat)
+            current = await timed(goal_service.get_summary, user_id, repeat)
+            async with AsyncSessionLocal() as db:
+                exact = (await goal_service.get_summary(db, user_id)).total_goals
+                seen = (await legacy_summary(db, user_id))["total_goals"]
+            print(f"{n:>7} goals  legacy: {fmt(legacy)}  (counted {seen})")
+            print(f"{'':>7}        sql:    {fmt(current)}  (counted {exact})")
+        finally:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(User).where(User.id == user_id))
+                await db.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,1000,100000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main([int(s) for s in args.sizes.split(",")], args.repeat))
@@ -0,0 +1,51 @@
+"""Decodes per second for each JWT backend, cold (full verify) and warm (LRU hit).
+
+    python -m benchmarks.bench_token_decode [--tokens 1000] [--rounds 20]
+
+"cold" verifies a distinct token every call with the cache cleared; "warm"
+re-presents the same `--tokens` session cookies, as steady-state traffic does.
+"""
+import argparse
+import time
+
+from app.config import settings
+from app.services import auth_service, token_codec
+
+
+def rate(fn, tokens: list[str], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for t in tokens:
+            fn(t)
+    return len(tokens) * rounds / (time.perf_counter() - start)
+
+
+def cold(token: str) -> dict:
+    auth_service._verified.clear()
+    return auth_service.decode_token(token)
+
+
+def main(n: int, rounds: int) -> None:
+    for backend in token_codec.BACKENDS:
+        settings.JWT_BACKEND = backend
+        auth_service._token_codec = None
+        auth_service._verified.clear()
+        tokens = [auth_service.create_access_token(str(i), 0, "bench")[0] for i in range(n)]
+
+        raw = rate(auth_service._codec().decode, tokens, rounds)
+        uncached = rate(cold, tokens, rounds)
+        for t in tokens:
+            auth_service.decode_token(t)
+        warm = rate(auth_service.decode_token, tokens, rounds)
+        print(
+            f"{backend:<5} codec {raw:>10,.0f}/s   cold {uncached:>10,.0f}/s   "
+            f"warm {warm:>10,.0f}/s  ({warm / uncached:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    main(args.tokens, args.rounds)
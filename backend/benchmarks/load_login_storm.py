@@ -0,0 +1,88 @@
+"""Measure goals-endpoint latency while the server is absorbing a login storm.
+
+Start the API with the auth rate limit lifted, e.g.
+
+    AUTH_RATE_LIMIT_PER_MINUTE=1000000 uvicorn app.main:app --port 8000
+
+then run (requires httpx):
+
+    python -m benchmarks.load_login_storm --base-url http://localhost:8000 \\
+        [--concurrency 50] [--duration 10]
+
+GET /api/v1/goals/ is polled sequentially, first on an idle server and then
+while `concurrency` clients log in back to back. With bcrypt on the worker
+pool the two latency distributions should be close; excess logins get 503.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+PASSWORD = "load-test-password"
+
+
+def fmt(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"n={len(samples):5d}  median {statistics.median(samples):7.2f} ms  p99 {p99:7.2f} ms"
+
+
+async def poll_goals(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        resp = await client.get("/api/v1/goals/")
+        resp.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def login_loop(base_url: str, email: str, stop: asyncio.Event, statuses: Counter) -> None:
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        while not stop.is_set():
+            resp = await client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+            statuses[resp.status_code] += 1
+
+
+async def phase(base_url: str, client: httpx.AsyncClient, email: str, concurrency: int, duration: float):
+    stop = asyncio.Event()
+    statuses: Counter = Counter()
+    stormers = [asyncio.create_task(login_loop(base_url, email, stop, statuses)) for _ in range(concurrency)]
+    poller = asyncio.create_task(poll_goals(client, stop))
+    await asyncio.sleep(duration)
+    stop.set()
+    samples = await poller
+    await asyncio.gather(*stormers)
+    return samples, statuses
+
+
+async def main(base_url: str, concurrency: int, duration: float) -> None:
+    email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        resp = await client.post(
+            "/api/v1/auth/register",
+            json={"email": email, "display_name": "load", "password": PASSWORD},
+        )
+        resp.raise_for_status()
+        for i in range(20):
+            await client.post("/api/v1/goals/", json={"title": f"goal {i}", "target": 1000})
+
+        idle, _ = await phase(base_url, client, email, 0, duration)
+        storm, statuses = await phase(base_url, client, email, concurrency, duration)
+
+    print(f"goals idle:        {fmt(idle)}")
+    print(f"goals login storm: {fmt(storm)}")
+    print("login responses:   " + ", ".join(f"{code}: {n}" for code, n in sorted(statuses.items())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.concurrency, args.duration))
@@ -0,0 +1,135 @@
+"""Soak test: many idle goal event streams held open against one worker.
+
+Start the API as a single worker with the auth rate limit raised, then run
+(requires httpx):
+
+    AUTH_RATE_LIMIT_PER_MINUTE=100000 uvicorn app.main:app --port 8000 &
+    python -m benchmarks.soak_goal_stream --base-url http://localhost:8000 \\
+        [--streams 5000] [--users 500] [--seconds 120] [--pid $!]
+
+Registers `--users` throwaway users and opens `--streams` SSE connections
+spread evenly across them, then holds them for `--seconds`. Every stream
+should see a heartbeat each GOAL_STREAM_HEARTBEAT_SECONDS. Halfway through,
+one goal is created for every user and the time until each stream receives
+its event is recorded. Raise `ulimit -n` on both sides for large runs.
+With `--pid`, the worker's RSS is sampled before connecting and while
+the streams are held.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Optional
+
+import httpx
+
+PASSWORD = "bench-password"
+
+
+def rss_mib(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class Stream:
+    def __init__(self) -> None:
+        self.connected = asyncio.Event()
+        self.failed = False
+        self.heartbeats = 0
+        self.events: list[float] = []
+
+
+async def hold(client: httpx.AsyncClient, stream: Stream) -> None:
+    try:
+        async with client.stream("GET", "/api/v1/goals/stream") as resp:
+            if resp.status_code != 200:
+                stream.failed = True
+                return
+            stream.connected.set()
+            async for line in resp.aiter_lines():
+                if line.startswith(": ping"):
+                    stream.heartbeats += 1
+                elif line.startswith("data:"):
+                    stream.events.append(time.perf_counter())
+    except httpx.HTTPError:
+        stream.failed = True
+    finally:
+        stream.connected.set()
+
+
+async def register(base_url: str, per_user: int) -> httpx.AsyncClient:
+    client = httpx.AsyncClient(
+        base_url=base_url,
+        timeout=httpx.Timeout(30, read=None),
+        limits=httpx.Limits(max_connections=per_user + 1, max_keepalive_connections=1),
+    )
+    resp = await client.post(
+        "/api/v1/auth/register",
+        json={"email": f"soak-{uuid.uuid4().hex[:12]}@example.com", "display_name": "soak", "password": PASSWORD},
+    )
+    resp.raise_for_status()
+    return client
+
+
+async def main(base_url: str, streams: int, users: int, seconds: float, pid: Optional[int]) -> None:
+    per_user = -(-streams // users)
+    rss_before = rss_mib(pid) if pid else None
+    clients = await asyncio.gather(*(register(base_url, per_user) for _ in range(users)))
+
+    held: list[tuple[int, Stream]] = []
+    tasks = []
+    start = time.perf_counter()
+    for i in range(streams):
+        stream = Stream()
+        held.append((i % users, stream))
+        tasks.append(asyncio.create_task(hold(clients[i % users], stream)))
+    await asyncio.gather(*(s.connected.wait() for _, s in held))
+    connect_s = time.perf_counter() - start
+    failed = sum(s.failed for _, s in held)
+    print(f"connected {streams - failed:,} / {streams:,} streams in {connect_s:.1f}s ({failed:,} failed)")
+
+    await asyncio.sleep(seconds / 2)
+    rss_held = rss_mib(pid) if pid else None
+
+    sent: dict[int, float] = {}
+
+    async def mutate(u: int) -> None:
+        sent[u] = time.perf_counter()
+        resp = await clients[u].post("/api/v1/goals/", json={"title": "soak", "target": 100})
+        resp.raise_for_status()
+
+    await asyncio.gather(*(mutate(u) for u in range(users)))
+    await asyncio.sleep(seconds / 2)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.gather(*(c.aclose() for c in clients))
+
+    live = [(u, s) for u, s in held if not s.failed]
+    delays = sorted((s.events[0] - sent[u]) * 1000 for u, s in live if s.events)
+    heartbeats = [s.heartbeats for _, s in live]
+    if heartbeats:
+        print(f"heartbeats per stream: min {min(heartbeats)}  median {statistics.median(heartbeats):.0f}")
+    print(f"fan-out: {len(delays):,} / {len(live):,} streams got their event")
+    if delays:
+        p99 = delays[min(len(delays) - 1, int(len(delays) * 0.99))]
+        print(f"  median {statistics.median(delays):.1f} ms  p99 {p99:.1f} ms  max {delays[-1]:.1f} ms")
+    if pid:
+        per_stream = (rss_held - rss_before) * 1024 / max(1, len(live))
+        print(f"worker RSS {rss_before:.1f} MiB idle -> {rss_held:.1f} MiB held ({per_stream:.1f} KiB/stream)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--streams", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=120.0)
+    parser.add_argument("--pid", type=int, help="worker process id, to sample its RSS")
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.streams, max(1, min(args.users, args.streams)), args.seconds, args.pid))
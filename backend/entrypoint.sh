@@ -0,0 +1,30 @@
+#!/bin/sh
+# serve (default): start the API without touching the schema.
+# worker: run background jobs (app.job_queue) until SIGTERM.
+# migrate: apply pending Alembic migrations and exit. Run it once per deploy
+# (Compose `migrate` service, Cloud Run job) rather than on every cold start.
+# post-deploy: reconcile derived data once the new revision is serving. The
+# previous revision keeps writing while `migrate` runs, and it doesn't
+# maintain everything the new schema derives (goal_rollups since 0002,
+# goals.deadline_date since 0006).
+set -e
+
+case "${1:-serve}" in
+  serve)
+    # Goal event streams stay open for minutes; don't let them hold up a deploy
+    exec uvicorn app.main:app --host 0.0.0.0 --port "${PORT:-8080}" --timeout-graceful-shutdown 10
+    ;;
+  migrate)
+    exec alembic upgrade head
+    ;;
+  post-deploy)
+    python -m app.cli reconcile-deadlines
+    exec python -m app.cli check-rollups --fix
+    ;;
+  worker)
+    exec python -m app.worker
+    ;;
+  *)
+    exec "$@"
+    ;;
+esac
@@ -0,0 +1,27 @@
+"""Shared fixtures.
+
+Redis is fakeredis (with Lua, for the scripts). Tests marked
+tests.helpers.requires_db run only when TEST_DATABASE_URL points at a
+throwaway database migrated to head. It becomes the app's DATABASE_URL
+here, before any test module imports app.config.
+"""
+import os
+
+import fakeredis
+import pytest
+
+if os.environ.get("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def redis():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
@@ -0,0 +1,19 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+
+from app import metrics
+
+requires_db = pytest.mark.skipif(not os.environ.get("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL is not set")
+
+
+@contextmanager
+def count_statements():
+    """Count SQL statements, as the cursor hooks in app.database do per request."""
+    stats = metrics.RequestStats()
+    token = metrics.request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        metrics.request_stats.reset(token)
@@ -0,0 +1,38 @@
+import uuid
+
+import pytest
+
+from app.services.cache_service import etag, etag_matches
+
+TAG = '"abc"'
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [
+        ('"abc"', True),
+        ('W/"abc"', True),  # weakened by a compressing proxy
+        ('"x", "abc"', True),
+        ("*", True),
+        ('"abcd"', False),
+        ("abc", False),
+        ("", False),
+        (None, False),
+    ],
+)
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, TAG) is expected
+
+
+def test_nothing_matches_without_an_etag():
+    assert not etag_matches("*", None)
+
+
+def test_etag_depends_on_user_generation_and_name():
+    user = uuid.uuid4()
+    tag = etag(user, "1", "list")
+
+    assert tag == etag(user, "1", "list")
+    assert tag.startswith('"') and tag.endswith('"')
+    assert len({tag, etag(user, "2", "list"), etag(user, "1", "summary"), etag(uuid.uuid4(), "1", "list")}) == 4
+    assert etag(user, None, "list") is None
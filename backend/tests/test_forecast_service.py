@@ -0,0 +1,54 @@
+import numpy as np
+
+from app.services.forecast_service import fit_rates, project
+
+
+def test_rates_match_a_per_goal_least_squares_fit():
+    rng = np.random.default_rng(0)
+    index = np.repeat([0, 1, 2], [5, 1, 40])
+    days = np.concatenate([np.sort(rng.uniform(-300, 0, n)) for n in (5, 1, 40)])
+    amounts = rng.exponential(20.0, len(index)).round(2)
+    created = np.array([-301.0, -10.0, -400.0])
+    saved = np.bincount(index, amounts) + np.array([100.0, 0.0, 5.0])
+
+    rates, counts = fit_rates(index, days, amounts, created, saved)
+
+    assert counts.tolist() == [5, 1, 40]
+    for g in range(3):
+        points = index == g
+        start = saved[g] - amounts[points].sum()
+        x = np.concatenate(([created[g]], days[points], [0.0]))
+        y = np.concatenate(([start], start + np.cumsum(amounts[points]), [saved[g]]))
+        assert np.isclose(rates[g], np.polyfit(x, y, 1)[0])
+
+
+def test_steady_saver_rate_is_exact():
+    # 10 a day for 30 days, starting from 0
+    days = np.arange(-29.0, 1.0)
+    rates, _ = fit_rates(np.zeros(30, np.intp), days, np.full(30, 10.0), np.array([-30.0]), np.array([300.0]))
+
+    assert np.isclose(rates[0], 10.0)
+
+
+def test_goal_without_contributions_has_no_rate():
+    rates, counts = fit_rates(
+        np.zeros(0, np.intp), np.zeros(0), np.zeros(0), np.array([-10.0]), np.array([50.0])
+    )
+
+    assert counts.tolist() == [0]
+    assert np.isnan(rates[0])
+
+
+def test_project_statuses():
+    rates = np.array([1.0, 10.0, 1.0, np.nan, 0.0, 1.0, 5.0])
+    counts = np.array([3, 3, 3, 0, 3, 3, 3])
+    saved = np.array([100.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+    target = np.array([100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0])
+    deadline = np.array([np.nan, 30.0, 30.0, 30.0, 30.0, -1.0, np.nan])
+
+    eta, required, status = project(rates, counts, saved, target, deadline)
+
+    assert status.tolist() == ["achieved", "on_track", "at_risk", "no_data", "stalled", "overdue", "on_track"]
+    assert eta[1] == 10.0 and np.isinf(eta[4])
+    assert np.isclose(required[1], 100 / 30)
+    assert np.isnan(required[0]) and np.isnan(required[6])
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from app.models.goal import GoalCategory
+from app.services.goal_io_service import GoalImportError, parse_import
+
+ROWS = [
+    {"title": "Trip", "target": 2000, "category": "financial"},
+    {"title": "Run a marathon", "target": 1, "saved": 0, "category": "personal_health", "deadline": "2027-04-01"},
+]
+
+
+def test_json_array():
+    rows = parse_import(json.dumps(ROWS).encode(), "application/json", 10)
+
+    assert [r.title for r in rows] == ["Trip", "Run a marathon"]
+    assert rows[1].category == GoalCategory.personal_health
+
+
+def test_ndjson_skips_blank_lines():
+    body = "\n".join(json.dumps(r) for r in ROWS) + "\n\n"
+
+    rows = parse_import(body.encode(), "application/x-ndjson; charset=utf-8", 10)
+
+    assert len(rows) == 2
+
+
+def test_ndjson_reports_each_unparseable_line():
+    body = "\n".join([json.dumps(ROWS[0]), "{not json", "", json.dumps({"target": 5}), '{"title": "x",'])
+
+    with pytest.raises(GoalImportError) as e:
+        parse_import(body.encode(), "application/x-ndjson", 10)
+
+    assert [err["row"] for err in e.value.errors] == [2, 4, 5]
+    assert e.value.errors[0]["errors"][0].startswith("Invalid JSON")
+    assert e.value.errors[1]["errors"][0].startswith("title:")
+
+
+def test_csv_blank_cells_are_not_provided():
+    body = "﻿title,target,description,category\nTrip,2000,,financial\n"
+
+    (row,) = parse_import(body.encode(), "text/csv", 10)
+
+    assert row.title == "Trip"
+    assert row.target == 2000
+    assert row.description is None
+
+
+def test_every_invalid_row_is_reported():
+    body = json.dumps([ROWS[0], {"title": "", "target": -1}, {"target": 5}]).encode()
+
+    with pytest.raises(GoalImportError) as e:
+        parse_import(body, "application/json", 10)
+
+    assert [err["row"] for err in e.value.errors] == [2, 3]
+    assert any(msg.startswith("title:") for msg in e.value.errors[1]["errors"])
+
+
+def test_row_limit():
+    with pytest.raises(GoalImportError) as e:
+        parse_import(json.dumps(ROWS).encode(), "application/json", 1)
+
+    assert e.value.errors[0]["row"] is None
+
+
+@pytest.mark.parametrize(
+    "body, content_type",
+    [(b"{not json", "application/json"), (b'{"title": "x"}', "application/json"), (b"\xff\xfe", "text/csv")],
+)
+def test_malformed_payload(body, content_type):
+    with pytest.raises(GoalImportError):
+        parse_import(body, content_type, 10)
@@ -0,0 +1,54 @@
+"""What the ORM actually sends for Goal, captured on SQLite before execution."""
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.goal import Goal
+
+
+class _Sent(Exception):
+    pass
+
+
+@pytest.fixture
+def sent():
+    engine = create_engine("sqlite://")
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+        raise _Sent()
+
+    with Session(engine) as session:
+        yield session, statements
+    engine.dispose()
+
+
+ROW = {"user_id": uuid.uuid4(), "title": "x", "target": 1}
+
+
+@pytest.mark.parametrize(
+    "stmt, params",
+    [
+        (insert(Goal).values(**ROW).returning(Goal), None),
+        (insert(Goal).returning(Goal), [ROW, ROW]),  # bulk_create_goals
+        (
+            update(Goal).where(Goal.id == uuid.uuid4()).values(saved=1).returning(Goal)
+            .execution_options(synchronize_session=False),
+            None,
+        ),
+        (select(Goal).where(Goal.id == uuid.uuid4()), None),
+    ],
+    ids=["insert", "bulk insert", "update", "select"],
+)
+def test_search_vector_is_never_sent_back(sent, stmt, params):
+    session, statements = sent
+    with pytest.raises(_Sent):
+        session.execute(stmt, params)
+
+    (sql,) = statements
+    assert "search_vector" not in sql
+    assert "updated_at" in sql
@@ -0,0 +1,24 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.goal_service import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trips():
+    created_at = datetime(2026, 10, 18, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    goal_id = uuid.uuid4()
+
+    cursor = encode_cursor(created_at, goal_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, goal_id)
+
+
+@pytest.mark.parametrize(
+    "cursor", ["", "not a cursor", "bm8tc2VwYXJhdG9y", encode_cursor(datetime.now(), uuid.uuid4())[:-4]]
+)
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
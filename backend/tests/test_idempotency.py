@@ -0,0 +1,86 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.services import idempotency
+
+pytestmark = pytest.mark.anyio
+
+USER = uuid.UUID(int=1)
+BODY = idempotency.fingerprint('{"amount":10.0}')
+
+
+async def test_first_request_claims_the_key(redis):
+    assert await idempotency.begin(redis, "scope", USER, "k", BODY) is None
+
+    with pytest.raises(idempotency.RequestInProgress):
+        await idempotency.begin(redis, "scope", USER, "k", BODY)
+
+
+async def test_unheld_claim_expires_quickly(redis):
+    await idempotency.begin(redis, "scope", USER, "k", BODY)
+
+    ttl = await redis.ttl(idempotency._key("scope", USER, "k"))
+    assert 0 < ttl <= settings.IDEMPOTENCY_PENDING_TTL_SECONDS
+
+
+async def test_held_claim_outlives_its_ttl(redis, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_PENDING_TTL_SECONDS", 1)
+    await idempotency.begin(redis, "scope", USER, "k", BODY)
+
+    async with idempotency.held(redis, "scope", USER, "k", BODY):
+        await asyncio.sleep(1.5)
+        with pytest.raises(idempotency.RequestInProgress):
+            await idempotency.begin(redis, "scope", USER, "k", BODY)
+
+
+async def test_refresh_does_not_shorten_a_stored_response(redis, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_PENDING_TTL_SECONDS", 1)
+    await idempotency.begin(redis, "scope", USER, "k", BODY)
+
+    async with idempotency.held(redis, "scope", USER, "k", BODY):
+        await idempotency.complete(redis, "scope", USER, "k", BODY, '{"ok":true}')
+        await asyncio.sleep(0.5)
+
+    assert await redis.ttl(idempotency._key("scope", USER, "k")) > 1
+
+
+async def test_reused_key_with_another_body_is_rejected(redis):
+    await idempotency.begin(redis, "scope", USER, "k", BODY)
+    await idempotency.complete(redis, "scope", USER, "k", BODY, '{"ok":true}')
+
+    with pytest.raises(idempotency.KeyReused):
+        await idempotency.begin(redis, "scope", USER, "k", idempotency.fingerprint('{"amount":20.0}'))
+
+
+async def test_completed_response_is_replayed(redis):
+    await idempotency.begin(redis, "scope", USER, "k", BODY)
+    await idempotency.complete(redis, "scope", USER, "k", BODY, '{"ok":true}')
+
+    assert await idempotency.begin(redis, "scope", USER, "k", BODY) == '{"ok":true}'
+    ttl = await redis.ttl(idempotency._key("scope", USER, "k"))
+    assert settings.IDEMPOTENCY_PENDING_TTL_SECONDS < ttl <= settings.IDEMPOTENCY_TTL_SECONDS
+
+
+async def test_released_key_can_be_retried(redis):
+    await idempotency.begin(redis, "scope", USER, "k", BODY)
+    await idempotency.release(redis, "scope", USER, "k")
+
+    assert await idempotency.begin(redis, "scope", USER, "k", BODY) is None
+
+
+async def test_keys_are_scoped_per_user_and_scope(redis):
+    await idempotency.begin(redis, "scope", USER, "k", BODY)
+
+    assert await idempotency.begin(redis, "scope", uuid.UUID(int=2), "k", BODY) is None
+    assert await idempotency.begin(redis, "other", USER, "k", BODY) is None
+
+
+async def test_redis_errors_let_the_request_through():
+    class Down:
+        async def set(self, *args, **kwargs):
+            raise ConnectionError("down")
+
+    assert await idempotency.begin(Down(), "scope", USER, "k", BODY) is None
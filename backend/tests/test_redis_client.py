@@ -0,0 +1,34 @@
+import pytest
+
+from app import redis_client
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_fixed_window_counts_hits_and_sets_the_expiry(redis):
+    counts = [await redis_client.hit_rate_limit(redis, "rate:test", 60) for _ in range(3)]
+
+    assert counts == [1, 2, 3]
+    (key,) = await redis.keys("rate:test:*")
+    assert 0 < await redis.ttl(key) <= 60
+
+
+async def test_sliding_window_counts_hits(redis):
+    counts = [await redis_client.hit_rate_limit(redis, "rate:test", 60, sliding=True) for _ in range(3)]
+
+    assert counts == [1, 2, 3]
+    assert await redis.zcard("rate:test") == 3
+    assert 0 < await redis.pttl("rate:test") <= 60_000
+
+
+async def test_sliding_window_drops_old_hits(redis):
+    await redis.zadd("rate:test", {"old": 0})
+
+    assert await redis_client.hit_rate_limit(redis, "rate:test", 60, sliding=True) == 1
+
+
+async def test_run_script_loads_the_script_once(redis):
+    script = "return redis.call('INCR', KEYS[1])"
+
+    assert await redis_client.run_script(redis, script, "counter") == 1  # EVALSHA misses, falls back to EVAL
+    assert await redis_client.run_script(redis, script, "counter") == 2
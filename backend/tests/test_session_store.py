@@ -0,0 +1,59 @@
+import pytest
+
+from app.config import settings
+from app.services import session_store
+from app.services.session_store import Rotation
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_rotate_replaces_the_current_jti(redis):
+    await session_store.start(redis, "fam", "jti-1")
+
+    assert await session_store.rotate(redis, "fam", "jti-1", "jti-2") == Rotation.ROTATED
+    assert await session_store.rotate(redis, "fam", "jti-2", "jti-3") == Rotation.ROTATED
+    assert await redis.hget(f"{session_store.FAMILY_PREFIX}fam", "cur") == "jti-3"
+    assert await redis.ttl(f"{session_store.FAMILY_PREFIX}fam") > 0
+
+
+async def test_previous_jti_within_grace_is_superseded(redis):
+    await session_store.start(redis, "fam", "jti-1")
+    await session_store.rotate(redis, "fam", "jti-1", "jti-2")
+
+    # A second tab refreshing with the same token: no new tokens, family kept
+    assert await session_store.rotate(redis, "fam", "jti-1", "jti-x") == Rotation.SUPERSEDED
+    assert await session_store.is_active(redis, "fam")
+    assert await redis.hget(f"{session_store.FAMILY_PREFIX}fam", "cur") == "jti-2"
+
+
+async def test_previous_jti_after_grace_is_reuse(redis, monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_REUSE_GRACE_SECONDS", -1)
+    await session_store.start(redis, "fam", "jti-1")
+    await session_store.rotate(redis, "fam", "jti-1", "jti-2")
+
+    assert await session_store.rotate(redis, "fam", "jti-1", "jti-x") == Rotation.REUSED
+    assert not await session_store.is_active(redis, "fam")
+
+
+async def test_reused_token_revokes_the_family(redis):
+    await session_store.start(redis, "fam", "jti-1")
+    await session_store.rotate(redis, "fam", "jti-1", "jti-2")
+    await session_store.rotate(redis, "fam", "jti-2", "jti-3")
+
+    # jti-1 is two rotations old: a stolen token, not a race
+    assert await session_store.rotate(redis, "fam", "jti-1", "jti-x") == Rotation.REUSED
+    assert not await session_store.is_active(redis, "fam")
+    # Including for the legitimate holder of the latest token
+    assert await session_store.rotate(redis, "fam", "jti-3", "jti-4") == Rotation.REVOKED
+
+
+async def test_unknown_family_is_revoked(redis):
+    assert await session_store.rotate(redis, "missing", "jti-1", "jti-2") == Rotation.REVOKED
+
+
+async def test_revoke_ends_the_session(redis):
+    await session_store.start(redis, "fam", "jti-1")
+    assert await session_store.is_active(redis, "fam")
+
+    await session_store.revoke(redis, "fam")
+    assert not await session_store.is_active(redis, "fam")
@@ -0,0 +1,229 @@
+"""SQL statements per operation, counted by the cursor hooks in app.database.
+
+The hook tests run anywhere, on SQLite. The per-operation counts need
+Postgres (see helpers.requires_db). Service-level tests run in a transaction
+that is rolled back. Endpoint budgets go through the app over HTTP, as
+MetricsMiddleware counts them, with auth overridden. They commit, so each
+test's user is deleted afterwards (goals cascade).
+"""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from app import database, metrics
+from app.models.goal import GoalCategory
+from app.schemas.goal import GoalCreate
+from tests.helpers import count_statements, requires_db
+
+
+@pytest.fixture
+def sqlite_engine():
+    engine = create_engine("sqlite://")
+    event.listen(engine, "before_cursor_execute", database._before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", database._after_cursor_execute)
+    event.listen(engine, "handle_error", database._handle_error)
+    yield engine
+    engine.dispose()
+
+
+def test_hooks_count_each_statement(sqlite_engine):
+    with sqlite_engine.connect() as conn, count_statements() as stats:
+        conn.execute(text("CREATE TABLE t (x int)"))
+        conn.execute(text("INSERT INTO t VALUES (:x)"), [{"x": 1}, {"x": 2}])  # executemany: one statement
+        conn.execute(text("SELECT x FROM t")).all()
+
+    assert stats.statements == 3
+    assert stats.db_seconds > 0
+
+
+def test_failed_statement_is_not_counted(sqlite_engine):
+    with sqlite_engine.connect() as conn, count_statements() as stats:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing"))
+        conn.execute(text("SELECT 1"))
+
+        assert stats.statements == 1
+        assert conn.info["query_start"] == []
+
+
+def test_nothing_is_counted_outside_a_request(sqlite_engine):
+    with sqlite_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))  # no RequestStats set: must not fail
+
+
+@pytest.fixture
+async def db_user():
+    from app.database import AsyncSessionLocal
+    from app.models.user import User
+
+    async with AsyncSessionLocal() as db:
+        user_id = uuid.uuid4()
+        db.add(User(id=user_id, email=f"test-{user_id}@example.com", display_name="test", hashed_password="x"))
+        await db.flush()
+        try:
+            yield db, user_id
+        finally:
+            await db.rollback()
+    # Pooled connections belong to this test's event loop
+    await database.engine.dispose()
+
+
+def _goal(title: str, category: GoalCategory = GoalCategory.financial) -> GoalCreate:
+    return GoalCreate(title=title, target=100, category=category)
+
+
+@requires_db
+@pytest.mark.anyio
+async def test_create_goal_is_insert_plus_rollup(db_user):
+    from app.services import goal_service
+
+    db, user_id = db_user
+    with count_statements() as stats:
+        await goal_service.create_goal(db, user_id, _goal("one"))
+
+    assert stats.statements == 2
+
+
+@requires_db
+@pytest.mark.anyio
+async def test_bulk_create_is_one_insert_plus_one_rollup_per_category(db_user):
+    from app.services import goal_service
+
+    db, user_id = db_user
+    rows = [_goal(f"goal {i}", GoalCategory.financial if i % 2 else GoalCategory.career) for i in range(50)]
+    with count_statements() as stats:
+        goals = await goal_service.bulk_create_goals(db, user_id, rows)
+
+    assert len(goals) == 50
+    assert stats.statements == 3
+
+
+@requires_db
+@pytest.mark.anyio
+async def test_contributions_cost_the_same_for_any_number_of_goals(db_user):
+    from decimal import Decimal
+
+    from app.services import goal_service
+
+    db, user_id = db_user
+    goals = await goal_service.bulk_create_goals(db, user_id, [_goal(f"goal {i}") for i in range(20)])
+    with count_statements() as stats:
+        updated = await goal_service.add_contributions(db, user_id, {g.id: Decimal("5") for g in goals})
+
+    assert len(updated) == 20
+    assert stats.statements == 3  # UPDATE ... RETURNING, rollup upsert, ledger insert
+
+
+@requires_db
+@pytest.mark.anyio
+async def test_single_goal_writes(db_user):
+    from app.services import goal_service
+
+    db, user_id = db_user
+    goal = await goal_service.create_goal(db, user_id, _goal("one"))
+
+    with count_statements() as stats:
+        await goal_service.update_goal_saved(db, goal.id, user_id, 50)
+    assert stats.statements == 3  # UPDATE ... RETURNING, rollup upsert, ledger insert
+
+    with count_statements() as stats:
+        assert await goal_service.delete_goal(db, goal.id, user_id)
+    assert stats.statements == 2
+
+
+@requires_db
+@pytest.mark.anyio
+async def test_list_page_is_one_query(db_user):
+    from app.services import goal_service
+
+    db, user_id = db_user
+    await goal_service.bulk_create_goals(db, user_id, [_goal(f"goal {i}") for i in range(30)])
+    with count_statements() as stats:
+        rows = await goal_service.get_goal_rows(db, user_id, limit=20)
+
+    assert len(rows) == 20
+    assert stats.statements == 1
+
+
+@pytest.fixture
+async def api(redis, monkeypatch):
+    """(client, stats of each request so far) for a fresh committed user."""
+    from httpx import ASGITransport, AsyncClient
+    from sqlalchemy import delete
+
+    from app.database import AsyncSessionLocal
+    from app.dependencies import get_current_user, get_redis
+    from app.main import app
+    from app.models.user import User
+    from app.schemas.auth import CurrentUser
+
+    user_id = uuid.uuid4()
+    async with AsyncSessionLocal() as db:
+        db.add(User(id=user_id, email=f"test-{user_id}@example.com", display_name="test", hashed_password="x"))
+        await db.commit()
+    principal = CurrentUser(
+        id=user_id, email=f"test-{user_id}@example.com", display_name="test", is_active=True,
+        created_at=datetime.now(timezone.utc),
+    )
+
+    # MetricsMiddleware makes one RequestStats per request; keep them all
+    seen: list[metrics.RequestStats] = []
+    request_stats = metrics.RequestStats
+
+    def recorded() -> metrics.RequestStats:
+        seen.append(request_stats())
+        return seen[-1]
+
+    monkeypatch.setattr(metrics, "RequestStats", recorded)
+    app.dependency_overrides[get_current_user] = lambda: principal
+    app.dependency_overrides[get_redis] = lambda: redis
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test/api/v1") as client:
+            yield client, seen
+    finally:
+        app.dependency_overrides.clear()
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await database.engine.dispose()
+
+
+async def _statements(api, method: str, url: str, **kwargs) -> tuple[object, int]:
+    client, seen = api
+    response = await client.request(method, url, **kwargs)
+    assert response.status_code < 400, response.text
+    return (response.json() if response.content else None), seen[-1].statements
+
+
+GOAL = {"title": "Trip", "target": 100, "category": "financial"}
+
+
+@requires_db
+@pytest.mark.anyio
+async def test_read_endpoint_budgets(api):
+    goal, n = await _statements(api, "POST", "/goals/", json=GOAL)
+    assert n == 2  # INSERT ... RETURNING, rollup upsert
+
+    assert (await _statements(api, "GET", "/goals/"))[1] == 1
+    assert (await _statements(api, "GET", "/goals/"))[1] == 0  # served from the cache
+    assert (await _statements(api, "GET", "/goals/summary"))[1] == 1
+    assert (await _statements(api, "GET", f"/goals/{goal['id']}"))[1] == 1
+
+
+@requires_db
+@pytest.mark.anyio
+async def test_write_endpoint_budgets(api):
+    goal, _ = await _statements(api, "POST", "/goals/", json=GOAL)
+    other, _ = await _statements(api, "POST", "/goals/", json=GOAL)
+
+    assert (await _statements(api, "PATCH", f"/goals/{goal['id']}", json={"title": "Trip!"}))[1] == 1
+    # A new target changes the rollup too
+    assert (await _statements(api, "PATCH", f"/goals/{goal['id']}", json={"target": 200}))[1] == 2
+    # UPDATE ... RETURNING, rollup upsert, ledger insert
+    assert (await _statements(api, "PATCH", f"/goals/{goal['id']}/saved", json={"amount": 50}))[1] == 3
+    contributions = [{"goal_id": g["id"], "amount": 5} for g in (goal, other)]
+    assert (await _statements(api, "POST", "/goals/contributions", json={"contributions": contributions}))[1] == 3
+    assert (await _statements(api, "DELETE", f"/goals/{goal['id']}"))[1] == 2
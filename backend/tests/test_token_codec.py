@@ -0,0 +1,69 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.token_codec import HmacCodec, JoseCodec, create
+
+KEY = "test-secret"
+
+
+def test_round_trip_converts_datetimes():
+    codec = HmacCodec(KEY, "HS256")
+    exp = datetime.now(timezone.utc) + timedelta(minutes=5)
+
+    claims = codec.decode(codec.encode({"sub": "user", "exp": exp, "fam": "f"}))
+
+    assert claims == {"sub": "user", "exp": int(exp.timestamp()), "fam": "f"}
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "HS384", "HS512"])
+def test_interoperates_with_jose(algorithm):
+    claims = {"sub": "user", "exp": int(time.time()) + 60}
+
+    assert JoseCodec(KEY, algorithm).decode(HmacCodec(KEY, algorithm).encode(claims)) == claims
+    assert HmacCodec(KEY, algorithm).decode(JoseCodec(KEY, algorithm).encode(claims)) == claims
+
+
+def test_rejects_a_tampered_payload():
+    codec = HmacCodec(KEY, "HS256")
+    header, payload, signature = codec.encode({"sub": "user"}).split(".")
+    forged = HmacCodec(KEY, "HS256").encode({"sub": "admin"}).split(".")[1]
+
+    with pytest.raises(ValueError, match="Signature"):
+        codec.decode(f"{header}.{forged}.{signature}")
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "",
+        "a.b",
+        "not.a.token",
+        HmacCodec("other-secret", "HS256").encode({"sub": "user"}),
+        HmacCodec(KEY, "HS512").encode({"sub": "user"}),  # algorithm confusion
+        "é.é.é",
+    ],
+)
+def test_rejects_invalid_tokens(token):
+    with pytest.raises(ValueError):
+        HmacCodec(KEY, "HS256").decode(token)
+
+
+@pytest.mark.parametrize(
+    "claims",
+    [{"exp": int(time.time()) - 1}, {"nbf": int(time.time()) + 60}, {"exp": "tomorrow"}, {"nbf": None}],
+)
+def test_rejects_out_of_window_or_malformed_times(claims):
+    codec = HmacCodec(KEY, "HS256")
+
+    with pytest.raises(ValueError):
+        codec.decode(codec.encode(claims))
+
+
+def test_unsupported_algorithm_and_backend():
+    with pytest.raises(ValueError):
+        HmacCodec(KEY, "RS256")
+    with pytest.raises(ValueError):
+        create("nope", KEY, "HS256")
+    assert isinstance(create("hmac", KEY, "HS256"), HmacCodec)
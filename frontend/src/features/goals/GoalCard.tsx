@@ -99,7 +99,7 @@ export default function GoalCard({ goal, index, onEdit, onUpdateSaved }: Props)
         </div>
         {goal.deadline && (
           <p className="text-xs text-gray-400 mb-3">
-            Deadline: {new Date(goal.deadline).toLocaleDateString()}
+            Deadline: {new Date(goal.deadline).toLocaleDateString(undefined, { timeZone: 'UTC' })}
           </p>
         )}
         <button
@@ -1,7 +1,7 @@
 import { useState } from 'react';
 import { Plus } from 'lucide-react';
 import { Goal, GoalCategory, CATEGORY_LABELS, CATEGORY_ICONS } from '@/types';
-import { useGoals } from './hooks';
+import { useGoals, useGoalStream } from './hooks';
 import GoalCard from './GoalCard';
 import GoalModal from './GoalModal';
 import LoadingSpinner from '@/shared/components/LoadingSpinner';
@@ -19,6 +19,7 @@ export default function GoalsPage() {
   const [modal, setModal] = useState<ModalState>(null);
 
   const { data: goals, isPending, isError } = useGoals(activeCategory);
+  useGoalStream(true);
 
   return (
     <div>
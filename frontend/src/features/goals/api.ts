@@ -19,4 +19,7 @@ export const goalsApi = {
     api.patch<Goal>(`/goals/${id}/saved`, { amount }).then((r) => r.data),
 
   delete: (id: string) => api.delete(`/goals/${id}`),
+
+  dismissReminders: (goalIds: string[]) =>
+    api.post('/goals/reminders/dismiss', { goal_ids: goalIds }),
 };
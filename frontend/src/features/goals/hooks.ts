@@ -1,6 +1,8 @@
+import { useEffect, useState } from 'react';
 import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
 import { goalsApi } from './api';
-import { Goal, GoalCategory, GoalCreate, GoalUpdate } from '@/types';
+import { useToast } from '@/shared/hooks/useToast';
+import { Goal, GoalCategory, GoalCreate, GoalReminder, GoalUpdate } from '@/types';
 
 const GOALS_KEY = (category?: GoalCategory) =>
   category ? ['goals', category] : ['goals'];
@@ -93,3 +95,69 @@ export function useDeleteGoal() {
     },
   });
 }
+
+/**
+ * Refetch goals when they change in another tab or device, and show deadline
+ * reminders (server-sent events). Only mounted on goal views, and closed
+ * while the tab is hidden: every open stream holds a Cloud Run request slot.
+ */
+export function useGoalStream(enabled: boolean) {
+  const qc = useQueryClient();
+  const { showToast } = useToast();
+  const visible = usePageVisible();
+  useEffect(() => {
+    // Coming back refetches anyway (react-query refetches on focus)
+    if (!enabled || !visible) return;
+    let source: EventSource;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    let connected = false;
+
+    const connect = () => {
+      source = new EventSource('/api/v1/goals/stream', { withCredentials: true });
+      source.onopen = () => {
+        // Anything that changed while we were disconnected was missed
+        if (connected) qc.invalidateQueries({ queryKey: ['goals'] });
+        connected = true;
+      };
+      source.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type !== 'reminder') {
+          qc.invalidateQueries({ queryKey: ['goals'] });
+          return;
+        }
+        const goals: GoalReminder[] = message.goals;
+        goals.forEach((g) =>
+          // A bare YYYY-MM-DD parses as UTC midnight; format it in UTC too, or
+          // it shows the previous day west of UTC
+          showToast(
+            `"${g.title}" is due ${new Date(g.deadline).toLocaleDateString(undefined, { timeZone: 'UTC' })}`,
+            'info'
+          )
+        );
+        // The server re-sends reminders on every connect until they are dismissed
+        goalsApi.dismissReminders(goals.map((g) => g.id)).catch(() => {});
+      };
+      source.onerror = () => {
+        // EventSource retries network errors itself but gives up on an HTTP
+        // error (e.g. 401 until the next API call refreshes the session)
+        if (source.readyState === EventSource.CLOSED) retry = setTimeout(connect, 10_000);
+      };
+    };
+    connect();
+
+    return () => {
+      clearTimeout(retry);
+      source.close();
+    };
+  }, [enabled, visible, qc, showToast]);
+}
+
+function usePageVisible() {
+  const [visible, setVisible] = useState(() => document.visibilityState === 'visible');
+  useEffect(() => {
+    const onChange = () => setVisible(document.visibilityState === 'visible');
+    document.addEventListener('visibilitychange', onChange);
+    return () => document.removeEventListener('visibilitychange', onChange);
+  }, []);
+  return visible;
+}
@@ -72,6 +72,13 @@ export interface GoalUpdate {
   deadline?: string;
 }
 
+/** A goal due soon, as sent in a goal stream "reminder" event. */
+export interface GoalReminder {
+  id: string;
+  title: string;
+  deadline: string;
+}
+
 export const CATEGORY_LABELS: Record<GoalCategory, string> = {
   financial: 'Financial',
   career: 'Career',